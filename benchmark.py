@@ -0,0 +1,767 @@
+"""
+Benchmark and load-test harness for the MCP servers in this repo.
+
+Each server is driven through a real MCP client session, either in-process
+(memory streams), over stdio or over streamable HTTP, against generated
+fixtures (world.db, community.db and library data) at a chosen scale.
+For every tool, resource and prompt call it reports throughput, p50/p95/p99
+latency and server RSS, and it can save the results as a JSON baseline and
+compare later runs against it.
+
+Usage:
+    python benchmark.py                                  # all servers, in-process, 1x
+    python benchmark.py --scale 100 --transport stdio --transport streamable-http
+    python benchmark.py --server sqlite_server --iterations 500 --concurrency 16
+    python benchmark.py --save-baseline bench/baseline.json
+    python benchmark.py --compare bench/baseline.json     # exit 1 on regressions
+"""
+
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from importlib import metadata
+from typing import Any, Dict, List, Optional, Tuple
+import argparse
+import asyncio
+import importlib
+import json
+import logging
+import math
+import os
+import platform
+import random
+import socket
+import sqlite3
+import subprocess
+import sys
+import time
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+BENCH_DIR = os.path.join(REPO_DIR, "bench")
+FIXTURE_SEED = 1234
+# Files a fixture directory must hold
+FIXTURE_FILES = ("world.db", "community.db", "library.json")
+
+DEFAULT_ITERATIONS = 200
+DEFAULT_CONCURRENCY = 8
+DEFAULT_WARMUP = 10
+# Relative slowdown (p95) or throughput drop counted as a regression by --compare
+REGRESSION_TOLERANCE = 0.20
+HTTP_STARTUP_TIMEOUT = 30.0
+
+# Rows generated per table at scale 1; every table but regions/subregions
+# grows linearly with --scale (countries are capped by the two-letter ISO space)
+BASE_ROWS = {
+    "countries": 250,
+    "states": 500,
+    "cities": 1500,
+    "chatters": 1000,
+    "books": 100,
+    "members": 50,
+    "checkouts": 80,
+    "reservations": 20,
+}
+
+TRANSPORTS = ("inprocess", "stdio", "streamable-http")
+
+
+# =============================================================================
+# FIXTURES
+# =============================================================================
+
+REGIONS = ["Africa", "Americas", "Asia", "Europe", "Oceania", "Polar"]
+# Codes the workloads query come first so they exist at every scale
+KNOWN_COUNTRY_CODES = ["US", "FR", "GB", "DE", "IN", "JP", "BR", "CA"]
+CURRENCIES = [
+    ("USD", "US Dollar"), ("EUR", "Euro"), ("GBP", "British Pound"), ("JPY", "Yen"),
+    ("INR", "Indian Rupee"), ("BRL", "Real"), ("CAD", "Canadian Dollar"), ("CHF", "Swiss Franc"),
+    ("CNY", "Yuan"), ("AUD", "Australian Dollar"), ("XOF", "CFA Franc"), ("MXN", "Peso"),
+]
+SYLLABLES = [
+    "an", "ber", "co", "da", "el", "fra", "gan", "ia", "lo", "mar",
+    "nia", "san", "ta", "ur", "vi", "to", "ri", "sta", "mon", "ka",
+]
+BOOK_CATEGORIES = [
+    "Computer Science", "Software Engineering", "Database Systems", "Design",
+    "Mathematics", "Physics", "History", "Philosophy", "Economics", "Biology",
+]
+
+
+def fake_name(rng: random.Random, syllables: int = 3) -> str:
+    return "".join(rng.choice(SYLLABLES) for _ in range(syllables)).capitalize()
+
+
+def scaled(table: str, scale: int) -> int:
+    return BASE_ROWS[table] * scale
+
+
+def country_codes(count: int) -> List[str]:
+    codes = list(KNOWN_COUNTRY_CODES)
+    letters = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+    for first in letters:
+        for second in letters:
+            if len(codes) >= count:
+                return codes
+            if first + second not in codes:
+                codes.append(first + second)
+    return codes
+
+
+def insert_rows(conn: sqlite3.Connection, table: str, rows, chunk_size: int = 50000) -> None:
+    """executemany in chunks so large scales don't build every row in memory."""
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            conn.executemany(f"INSERT INTO {table} VALUES ({', '.join('?' * len(row))})", chunk)
+            chunk = []
+    if chunk:
+        conn.executemany(f"INSERT INTO {table} VALUES ({', '.join('?' * len(chunk[0]))})", chunk)
+
+
+def generate_world_db(path: str, scale: int) -> None:
+    rng = random.Random(FIXTURE_SEED)
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(
+        """
+        CREATE TABLE regions (id INTEGER PRIMARY KEY, name TEXT);
+        CREATE TABLE subregions (id INTEGER PRIMARY KEY, name TEXT, region_id INTEGER);
+        CREATE TABLE countries (
+            id INTEGER PRIMARY KEY, name TEXT, iso2 TEXT, iso3 TEXT, capital TEXT,
+            currency TEXT, currency_name TEXT, region TEXT, subregion TEXT
+        );
+        CREATE TABLE states (id INTEGER PRIMARY KEY, name TEXT, country_id INTEGER, country_code TEXT);
+        CREATE TABLE cities (
+            id INTEGER PRIMARY KEY, name TEXT, state_id INTEGER, country_id INTEGER,
+            country_code TEXT, latitude REAL, longitude REAL
+        );
+        """
+    )
+    with conn:
+        insert_rows(conn, "regions", ((i + 1, name) for i, name in enumerate(REGIONS)))
+        subregions = [
+            (len(REGIONS) * position + region_id, f"{position + 1} {REGIONS[region_id - 1]}", region_id)
+            for region_id in range(1, len(REGIONS) + 1)
+            for position in range(4)
+        ]
+        insert_rows(conn, "subregions", subregions)
+
+        codes = country_codes(min(scaled("countries", scale), 676))
+        countries = []
+        for country_id, code in enumerate(codes, start=1):
+            region_id = rng.randint(1, len(REGIONS))
+            currency, currency_name = rng.choice(CURRENCIES)
+            countries.append(
+                (
+                    country_id, fake_name(rng), code, code + rng.choice("ABCDEFGHIJ"), fake_name(rng, 2),
+                    currency, currency_name, REGIONS[region_id - 1], f"{rng.randint(1, 4)} {REGIONS[region_id - 1]}",
+                )
+            )
+        insert_rows(conn, "countries", countries)
+
+        state_count = scaled("states", scale)
+        states_of = {}
+        state_rows = []
+        for state_id in range(1, state_count + 1):
+            # The first states go round-robin so every country has at least one
+            country_id = state_id if state_id <= len(codes) else rng.randint(1, len(codes))
+            states_of.setdefault(country_id, []).append(state_id)
+            state_rows.append((state_id, fake_name(rng), country_id, codes[country_id - 1]))
+        insert_rows(conn, "states", state_rows)
+
+        def cities():
+            for city_id in range(1, scaled("cities", scale) + 1):
+                country_id = rng.randint(1, len(codes))
+                state_id = rng.choice(states_of.get(country_id, [None]))
+                yield (
+                    city_id, fake_name(rng), state_id, country_id, codes[country_id - 1],
+                    round(rng.uniform(-90, 90), 5), round(rng.uniform(-180, 180), 5),
+                )
+
+        insert_rows(conn, "cities", cities())
+    conn.close()
+
+
+def generate_community_db(path: str, scale: int) -> None:
+    rng = random.Random(FIXTURE_SEED + 1)
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(
+        """CREATE TABLE chatters (
+               id INTEGER PRIMARY KEY,
+               name TEXT NOT NULL,
+               messages INTEGER NOT NULL,
+               last_message_at TEXT NOT NULL
+           )"""
+    )
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+    def chatters():
+        for chatter_id in range(1, scaled("chatters", scale) + 1):
+            # Long-tailed message counts, like a real community
+            messages = int(rng.paretovariate(1.2) * 10)
+            last = start + timedelta(minutes=rng.randint(0, 525600))
+            yield chatter_id, fake_name(rng, 2), messages, last.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+    with conn:
+        insert_rows(conn, "chatters", chatters())
+    conn.close()
+
+
+def generate_library_data(scale: int) -> Dict[str, list]:
+    """Library data in the LIBRARY_DATA format of mcp_resources.py."""
+    rng = random.Random(FIXTURE_SEED + 2)
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+
+    def stamp(moment: datetime) -> str:
+        return moment.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+    categories = BOOK_CATEGORIES + [f"Topic {i}" for i in range(1, scale)]
+    books = []
+    for number in range(1, scaled("books", scale) + 1):
+        copies_total = rng.randint(1, 6)
+        books.append(
+            {
+                "id": f"B{number:07d}",
+                "title": f"{fake_name(rng)} {fake_name(rng, 2)}",
+                "authors": [f"{fake_name(rng, 2)} {fake_name(rng)}" for _ in range(rng.randint(1, 3))],
+                "isbn": f"978-{rng.randint(0, 9999999999):010d}",
+                "category": rng.choice(categories),
+                "publisher": fake_name(rng, 2),
+                "publication_year": rng.randint(1950, 2024),
+                "copies_total": copies_total,
+                "copies_available": copies_total,
+                "location": f"Section-{rng.choice('ABCDEFG')}-Shelf-{rng.randint(1, 40):02d}",
+                "status": "available",
+                "last_updated": stamp(now - timedelta(days=rng.randint(0, 365))),
+            }
+        )
+
+    members = []
+    for number in range(1, scaled("members", scale) + 1):
+        faculty = rng.random() < 0.2
+        members.append(
+            {
+                "id": f"M{number:07d}",
+                "name": f"{fake_name(rng, 2)} {fake_name(rng)}",
+                "email": f"member{number}@university.edu",
+                "member_type": "faculty" if faculty else "student",
+                "registration_date": stamp(now - timedelta(days=rng.randint(30, 1500))),
+                "books_checked_out": [],
+                "max_books": 10 if faculty else 5,
+                "status": "active" if rng.random() < 0.95 else "suspended",
+            }
+        )
+
+    checkouts = []
+    for number in range(1, scaled("checkouts", scale) + 1):
+        book = rng.choice(books)
+        member = rng.choice(members)
+        if book["copies_available"] == 0 or len(member["books_checked_out"]) >= member["max_books"]:
+            continue
+        book["copies_available"] -= 1
+        if book["copies_available"] == 0:
+            book["status"] = "checked_out"
+        member["books_checked_out"].append(book["id"])
+        # Due dates on both sides of now so some checkouts are overdue
+        due = now + timedelta(days=rng.randint(-60, 30))
+        checkouts.append(
+            {
+                "id": f"CO{number:07d}",
+                "book_id": book["id"],
+                "member_id": member["id"],
+                "checkout_date": stamp(due - timedelta(days=30)),
+                "due_date": stamp(due),
+                "return_date": None,
+                "status": "active",
+                "renewal_count": 0,
+            }
+        )
+
+    reservations = []
+    queue_length = {}
+    for number in range(1, scaled("reservations", scale) + 1):
+        book = rng.choice(books)
+        queue_length[book["id"]] = queue_length.get(book["id"], 0) + 1
+        reservations.append(
+            {
+                "id": f"R{number:07d}",
+                "book_id": book["id"],
+                "member_id": rng.choice(members)["id"],
+                "reservation_date": stamp(now - timedelta(days=rng.randint(0, 20))),
+                "status": "active",
+                "priority": queue_length[book["id"]],
+            }
+        )
+
+    return {"books": books, "members": members, "checkouts": checkouts, "reservations": reservations}
+
+
+def ensure_fixtures(scale: int, root: str = BENCH_DIR, fixture_dir: str = None) -> str:
+    """
+    Generate the fixtures for a scale once and return their directory.
+
+    fixture_dir replaces the default bench/fixtures/{scale}x. If it does not
+    exist or is empty the fixtures are generated there; otherwise it is used
+    as is and must already hold every fixture file.
+    """
+    if fixture_dir is not None:
+        if os.path.isdir(fixture_dir) and os.listdir(fixture_dir):
+            missing = [
+                name for name in FIXTURE_FILES
+                if not os.path.exists(os.path.join(fixture_dir, name))
+            ]
+            if missing:
+                sys.exit(
+                    f"Fixture directory {fixture_dir} is missing {', '.join(missing)}; "
+                    "pass a new or empty directory to generate fixtures there"
+                )
+            return fixture_dir
+    else:
+        fixture_dir = os.path.join(root, "fixtures", f"{scale}x")
+    marker = os.path.join(fixture_dir, "complete")
+    if os.path.exists(marker):
+        return fixture_dir
+
+    os.makedirs(fixture_dir, exist_ok=True)
+    for name in os.listdir(fixture_dir):
+        os.remove(os.path.join(fixture_dir, name))
+
+    started = time.perf_counter()
+    generate_world_db(os.path.join(fixture_dir, "world.db"), scale)
+    generate_community_db(os.path.join(fixture_dir, "community.db"), scale)
+    with open(os.path.join(fixture_dir, "library.json"), "w") as f:
+        json.dump(generate_library_data(scale), f)
+    with open(marker, "w") as f:
+        f.write(datetime.now(timezone.utc).isoformat())
+    print(f"Generated {scale}x fixtures in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+    return fixture_dir
+
+
+# =============================================================================
+# WORKLOADS
+# =============================================================================
+
+
+@dataclass(frozen=True)
+class Operation:
+    kind: str  # "tool", "resource" or "prompt"
+    name: str  # tool or prompt name, or resource URI
+    arguments: Dict[str, Any] = field(default_factory=dict)
+    transports: Tuple[str, ...] = TRANSPORTS
+
+    @property
+    def label(self) -> str:
+        return f"{self.kind}:{self.name}"
+
+
+@dataclass(frozen=True)
+class ServerSpec:
+    module: str
+    workload: Tuple[Operation, ...]
+
+
+SERVERS = {
+    "sqlite_server": ServerSpec(
+        "sqlite_server",
+        (
+            Operation("tool", "get_country", {"country_code": "US"}),
+            Operation("tool", "get_countries_batch", {"codes": ["US", "FR", "GB", "DE"]}),
+            Operation("tool", "search_countries", {"name": "an"}),
+            Operation("tool", "get_countries"),
+            Operation("tool", "get_countries_by_region", {"region": "Europe"}),
+            Operation("tool", "get_countries_by_currency", {"currency": "EUR"}),
+            Operation("tool", "search_cities", {"name": "san"}),
+            Operation("tool", "get_cities_in_country", {"country_code": "US"}),
+            Operation("tool", "get_cities_in_countries", {"codes": ["US", "FR", "GB"]}),
+            Operation("tool", "search_states", {"name": "mar"}),
+            Operation("tool", "get_states_in_country", {"country_code": "US"}),
+            Operation("tool", "get_states_in_countries", {"codes": ["US", "FR", "GB"]}),
+            Operation("tool", "get_all_regions"),
+            Operation("tool", "get_subregions_in_region", {"region_id": 1}),
+            Operation("tool", "get_database_stats"),
+            Operation("tool", "get_countries_summary"),
+            Operation("tool", "get_popular_currencies"),
+            Operation("tool", "get_top_chatters", {"page_size": 50}),
+            Operation("tool", "get_chatter_leaderboard", {"limit": 25}),
+            Operation("tool", "get_chatter_rank", {"chatter_id": 500}),
+        ),
+    ),
+    "mcp_resources": ServerSpec(
+        "mcp_resources",
+        (
+            Operation("resource", "library://catalog"),
+            Operation("resource", "library://available"),
+            Operation("resource", "library://category/computer-science"),
+            Operation("resource", "library://categories"),
+            Operation("resource", "library://members"),
+            Operation("resource", "library://overdue"),
+            Operation("resource", "library://overdue/50/0"),
+            Operation("resource", "library://stats"),
+            Operation("resource", "library://versions"),
+        ),
+    ),
+    "hello_mcp": ServerSpec("hello_mcp", (Operation("tool", "get_random_name"),)),
+    "mcp_prompt": ServerSpec(
+        "mcp_prompt", (Operation("prompt", "get_prompt", {"topic": "database indexing"}),)
+    ),
+    "stream_tester": ServerSpec(
+        "stream_tester",
+        (Operation("tool", "get_random_name", {"names": ["Ada", "Grace", "Linus"]}),),
+    ),
+}
+
+
+def configure_server(server: str, fixture_dir: str, library_backend: str = "memory"):
+    """Import a server module, point it at the fixtures and return its FastMCP app."""
+    module = importlib.import_module(SERVERS[server].module)
+
+    if server == "sqlite_server":
+        module.DB_PATH = os.path.join(fixture_dir, "")
+        # Same startup work as running the server directly
+        for db_name in module.RECOMMENDED_INDEXES:
+            module.create_recommended_indexes(db_name)
+        module.build_search_index("world.db")
+    elif server == "mcp_resources":
+        with open(os.path.join(fixture_dir, "library.json")) as f:
+            data = json.load(f)
+        if library_backend == "sqlite":
+            db_file = os.path.join(fixture_dir, "library.db")
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(db_file + suffix):
+                    os.remove(db_file + suffix)
+            module.store = module.SQLiteLibraryStore(db_file, seed=data)
+        else:
+            module.store = module.LibraryStore(data)
+        module.subscriptions.watch(module.store)
+
+    return module.mcp
+
+
+def current_rss_mb() -> float:
+    """Resident set size of this process in MiB (peak RSS where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, AttributeError):
+        import resource
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is KiB on Linux and bytes on macOS
+        return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+def serve(server: str, fixture_dir: str, transport: str, port: int, library_backend: str) -> None:
+    """Run a configured server for an out-of-process benchmark."""
+    mcp = configure_server(server, fixture_dir, library_backend)
+
+    # Lets the harness sample the server's memory; only registered here
+    @mcp.tool(name="benchmark_rss_mb")
+    def benchmark_rss_mb() -> float:
+        return current_rss_mb()
+
+    mcp.settings.host = "127.0.0.1"
+    mcp.settings.port = port
+    mcp.settings.log_level = "WARNING"
+    logging.getLogger().setLevel(logging.WARNING)
+    mcp.run(transport=transport)
+
+
+# =============================================================================
+# CLIENT SESSIONS
+# =============================================================================
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def serve_command(server: str, fixture_dir: str, transport: str, port: int, library_backend: str) -> List[str]:
+    return [
+        os.path.abspath(__file__), "--serve", server, "--fixtures", fixture_dir,
+        "--transport", transport, "--port", str(port), "--library-backend", library_backend,
+    ]
+
+
+@asynccontextmanager
+async def open_session(server: str, transport: str, fixture_dir: str, library_backend: str):
+    """Yield (client session, async RSS probe) for a server over a transport."""
+    from mcp import ClientSession, StdioServerParameters
+
+    if transport == "inprocess":
+        from mcp.shared.memory import create_connected_server_and_client_session
+
+        mcp = configure_server(server, fixture_dir, library_backend)
+
+        async def rss_probe() -> float:
+            # Client and server share this process
+            return current_rss_mb()
+
+        async with create_connected_server_and_client_session(mcp._mcp_server) as session:
+            yield session, rss_probe
+        return
+
+    async def make_probe(session):
+        async def rss_probe() -> Optional[float]:
+            result = await session.call_tool("benchmark_rss_mb", {})
+            return None if result.isError else float(result.content[0].text)
+
+        return rss_probe
+
+    if transport == "stdio":
+        from mcp.client.stdio import stdio_client
+
+        params = StdioServerParameters(
+            command=sys.executable,
+            args=serve_command(server, fixture_dir, "stdio", 0, library_backend),
+            cwd=REPO_DIR,
+        )
+        with open(os.devnull, "w") as devnull:
+            async with stdio_client(params, errlog=devnull) as (read, write):
+                async with ClientSession(read, write) as session:
+                    await session.initialize()
+                    yield session, await make_probe(session)
+        return
+
+    if transport == "streamable-http":
+        from mcp.client.streamable_http import streamablehttp_client
+
+        port = free_port()
+        process = subprocess.Popen(
+            [sys.executable, *serve_command(server, fixture_dir, "streamable-http", port, library_backend)],
+            cwd=REPO_DIR,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            deadline = time.monotonic() + HTTP_STARTUP_TIMEOUT
+            while True:
+                try:
+                    socket.create_connection(("127.0.0.1", port), timeout=0.5).close()
+                    break
+                except OSError:
+                    if process.poll() is not None or time.monotonic() > deadline:
+                        raise RuntimeError(f"{server} did not start on port {port}")
+                    await asyncio.sleep(0.1)
+
+            async with streamablehttp_client(f"http://127.0.0.1:{port}/mcp") as (read, write, _):
+                async with ClientSession(read, write) as session:
+                    await session.initialize()
+                    yield session, await make_probe(session)
+        finally:
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        return
+
+    raise ValueError(f"Unknown transport: {transport}")
+
+
+# =============================================================================
+# MEASUREMENT
+# =============================================================================
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(pct / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float, rss_mb: Optional[float]) -> dict:
+    ordered = sorted(latencies)
+    return {
+        "calls": len(latencies),
+        "errors": errors,
+        "throughput_per_s": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(ordered, 50) * 1000, 3),
+        "p95_ms": round(percentile(ordered, 95) * 1000, 3),
+        "p99_ms": round(percentile(ordered, 99) * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3) if ordered else 0.0,
+        "rss_mb": round(rss_mb, 1) if rss_mb is not None else None,
+    }
+
+
+def make_call(session, operation: Operation):
+    if operation.kind == "tool":
+        return lambda: session.call_tool(operation.name, operation.arguments)
+    if operation.kind == "resource":
+        return lambda: session.read_resource(operation.name)
+    if operation.kind == "prompt":
+        return lambda: session.get_prompt(operation.name, operation.arguments)
+    raise ValueError(f"Unknown operation kind: {operation.kind}")
+
+
+async def measure(call, iterations: int, concurrency: int, warmup: int) -> Tuple[List[float], int, float]:
+    """Run call iterations times from concurrency workers; returns (latencies, errors, wall time)."""
+    errors = 0
+    for _ in range(warmup):
+        await call()
+
+    latencies = []
+    remaining = iter(range(iterations))
+
+    async def worker() -> None:
+        nonlocal errors
+        for _ in remaining:
+            started = time.perf_counter()
+            try:
+                result = await call()
+                if getattr(result, "isError", False):
+                    errors += 1
+            except Exception:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, errors, time.perf_counter() - started
+
+
+async def benchmark_server(
+    server: str,
+    transport: str,
+    fixture_dir: str,
+    iterations: int,
+    concurrency: int,
+    warmup: int,
+    library_backend: str,
+) -> Dict[str, dict]:
+    results = {}
+    async with open_session(server, transport, fixture_dir, library_backend) as (session, rss_probe):
+        for operation in SERVERS[server].workload:
+            if transport not in operation.transports:
+                continue
+            latencies, errors, elapsed = await measure(
+                make_call(session, operation), iterations, concurrency, warmup
+            )
+            key = f"{server}/{transport}/{operation.label}"
+            results[key] = summarize(latencies, errors, elapsed, await rss_probe())
+            print(format_row(key, results[key]), flush=True)
+    return results
+
+
+# =============================================================================
+# REPORTING
+# =============================================================================
+
+HEADER = f"{'operation':<76} {'calls':>6} {'err':>4} {'ops/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'rss MB':>7}"
+
+
+def format_row(key: str, row: dict) -> str:
+    rss = "-" if row["rss_mb"] is None else f"{row['rss_mb']:.1f}"
+    return (
+        f"{key:<76} {row['calls']:>6} {row['errors']:>4} {row['throughput_per_s']:>9.1f} "
+        f"{row['p50_ms']:>8.2f} {row['p95_ms']:>8.2f} {row['p99_ms']:>8.2f} {rss:>7}"
+    )
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], tolerance: float) -> List[str]:
+    """Describe every operation that got slower or lost throughput beyond tolerance."""
+    regressions = []
+    for key, row in results.items():
+        before = baseline.get(key)
+        if not before:
+            continue
+        if before["p95_ms"] and row["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{key}: p95 {before['p95_ms']:.2f}ms -> {row['p95_ms']:.2f}ms")
+        if before["throughput_per_s"] and row["throughput_per_s"] < before["throughput_per_s"] * (1 - tolerance):
+            regressions.append(
+                f"{key}: throughput {before['throughput_per_s']:.1f}/s -> {row['throughput_per_s']:.1f}/s"
+            )
+        if row["errors"] > before["errors"]:
+            regressions.append(f"{key}: errors {before['errors']} -> {row['errors']}")
+    return regressions
+
+
+def run_metadata(args) -> dict:
+    try:
+        mcp_version = metadata.version("mcp")
+    except metadata.PackageNotFoundError:
+        mcp_version = None
+    return {
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "mcp_version": mcp_version,
+        "scale": args.scale,
+        "iterations": args.iterations,
+        "concurrency": args.concurrency,
+        "warmup": args.warmup,
+        "library_backend": args.library_backend,
+    }
+
+
+def parse_args(argv: List[str]):
+    parser = argparse.ArgumentParser(description="Benchmark the MCP servers in this repo.")
+    parser.add_argument("--server", action="append", choices=sorted(SERVERS), help="Servers to run (default: all)")
+    parser.add_argument("--transport", action="append", choices=TRANSPORTS, help="Transports (default: inprocess)")
+    parser.add_argument("--scale", type=int, default=1, help="Fixture scale factor, e.g. 1, 100, 10000")
+    parser.add_argument("--iterations", type=int, default=DEFAULT_ITERATIONS, help="Calls per operation")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="Concurrent calls in flight")
+    parser.add_argument("--warmup", type=int, default=DEFAULT_WARMUP, help="Unmeasured calls per operation")
+    parser.add_argument("--library-backend", choices=("memory", "sqlite"), default="memory")
+    parser.add_argument("--fixtures", help="Fixture directory, generated if new or empty (default: under bench/fixtures)")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    parser.add_argument("--save-baseline", metavar="PATH", help="Write the results as the regression baseline")
+    parser.add_argument("--compare", metavar="PATH", help="Compare against a saved baseline; exit 1 on regressions")
+    parser.add_argument("--tolerance", type=float, default=REGRESSION_TOLERANCE)
+    # Internal: run one server for the stdio and HTTP transports
+    parser.add_argument("--serve", choices=sorted(SERVERS), help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, default=0, help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+async def main(args) -> int:
+    fixture_dir = ensure_fixtures(args.scale, fixture_dir=args.fixtures)
+    servers = args.server or list(SERVERS)
+    transports = args.transport or ["inprocess"]
+
+    results = {}
+    print(HEADER)
+    for transport in transports:
+        for server in servers:
+            results.update(
+                await benchmark_server(
+                    server, transport, fixture_dir, args.iterations, args.concurrency,
+                    args.warmup, args.library_backend,
+                )
+            )
+
+    report = {"meta": run_metadata(args), "results": results}
+    for path in (args.output, args.save_baseline):
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            with open(path, "w") as f:
+                json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline["results"], args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) against {args.compare}:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"\nNo regressions against {args.compare}")
+    return 0
+
+
+if __name__ == "__main__":
+    args = parse_args(sys.argv[1:])
+    if args.serve:
+        serve(args.serve, args.fixtures, args.transport[0], args.port, args.library_backend)
+        sys.exit(0)
+
+    # FastMCP logs every request at INFO, which would swamp the in-process report
+    logging.basicConfig(level=logging.WARNING)
+    logging.getLogger("mcp").setLevel(logging.WARNING)
+    sys.exit(asyncio.run(main(args)))
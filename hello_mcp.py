@@ -1,6 +1,8 @@
 from mcp.server.fastmcp import FastMCP
 from random import choice
 
+import instrumentation
+
 mcp = FastMCP("Random Name")
 
 @mcp.tool()
@@ -18,5 +20,7 @@ def get_random_name(names: list = None) -> str:
         default_names = ["Alice", "Bob", "Charlie", "Diana", "Eve"]
         return choice(default_names)
 
+instrumentation.instrument(mcp)
+
 if __name__ == "__main__":
     mcp.run()
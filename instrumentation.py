@@ -0,0 +1,437 @@
+"""
+Per-call metrics for the MCP servers in this repo.
+
+instrument() wraps every registered tool, resource and prompt of a FastMCP
+app and records, per operation, call and error counts, a latency histogram,
+time spent in the registered function vs. turning its result into MCP
+content, SQL time and rows fetched, and response bytes. The numbers are
+served as a JSON resource and, on the HTTP transports, as Prometheus text.
+
+SQL time and rows are only seen for connections opened with
+factory=InstrumentedConnection.
+"""
+
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+import functools
+import inspect
+import sqlite3
+import threading
+import time
+
+from mcp import types
+
+from json_codec import dumps
+
+# Upper bounds (seconds) of the request latency histogram buckets
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Resource the JSON metrics are served from
+METRICS_URI = "metrics://calls"
+# HTTP path of the Prometheus text endpoint (streamable-http and sse only); None disables it
+PROMETHEUS_PATH = "/metrics"
+
+
+class CallMetrics:
+    """Measurements accumulated while one request is being handled."""
+
+    __slots__ = ("kind", "name", "execute_seconds", "sql_seconds", "sql_statements", "rows")
+
+    def __init__(self, kind: str, name: str):
+        self.kind = kind
+        self.name = name
+        self.execute_seconds = 0.0
+        self.sql_seconds = 0.0
+        self.sql_statements = 0
+        self.rows = 0
+
+
+# Set for the duration of each request; worker threads see it through copied contexts
+_current_call: ContextVar[Optional[CallMetrics]] = ContextVar("current_call", default=None)
+
+
+def current_call() -> Optional[CallMetrics]:
+    """The metrics of the request being handled in this context, if any."""
+    return _current_call.get()
+
+
+@contextmanager
+def untracked():
+    """Keep the block's SQL out of the current call's metrics, e.g. connection housekeeping."""
+    token = _current_call.set(None)
+    try:
+        yield
+    finally:
+        _current_call.reset(token)
+
+
+# =============================================================================
+# SQL HOOKS
+# =============================================================================
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """Cursor that charges statement and fetch time, and rows fetched, to the current call."""
+
+    def execute(self, sql, parameters=()):
+        call = _current_call.get()
+        if call is None:
+            return super().execute(sql, parameters)
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            call.sql_seconds += time.perf_counter() - started
+            call.sql_statements += 1
+
+    def executemany(self, sql, seq_of_parameters):
+        call = _current_call.get()
+        if call is None:
+            return super().executemany(sql, seq_of_parameters)
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            call.sql_seconds += time.perf_counter() - started
+            call.sql_statements += 1
+
+    def fetchone(self):
+        call = _current_call.get()
+        if call is None:
+            return super().fetchone()
+        started = time.perf_counter()
+        row = super().fetchone()
+        call.sql_seconds += time.perf_counter() - started
+        call.rows += row is not None
+        return row
+
+    def fetchmany(self, size=None):
+        call = _current_call.get()
+        size = self.arraysize if size is None else size
+        if call is None:
+            return super().fetchmany(size)
+        started = time.perf_counter()
+        rows = super().fetchmany(size)
+        call.sql_seconds += time.perf_counter() - started
+        call.rows += len(rows)
+        return rows
+
+    def fetchall(self):
+        call = _current_call.get()
+        if call is None:
+            return super().fetchall()
+        started = time.perf_counter()
+        rows = super().fetchall()
+        call.sql_seconds += time.perf_counter() - started
+        call.rows += len(rows)
+        return rows
+
+    def __next__(self):
+        call = _current_call.get()
+        if call is None:
+            return super().__next__()
+        started = time.perf_counter()
+        try:
+            row = super().__next__()
+        finally:
+            call.sql_seconds += time.perf_counter() - started
+        call.rows += 1
+        return row
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """Connection whose cursors, including those behind execute(), are InstrumentedCursors."""
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    # The C shortcuts create plain cursors, so route them through cursor()
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+# =============================================================================
+# AGGREGATION
+# =============================================================================
+
+
+class OperationStats:
+    """Running totals and latency histogram for one tool, resource or prompt."""
+
+    def __init__(self, kind: str, name: str):
+        self.kind = kind
+        self.name = name
+        self.calls = 0
+        self.errors = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)  # Last bucket is +Inf
+        self.execute_seconds = 0.0
+        self.serialize_seconds = 0.0
+        self.sql_seconds = 0.0
+        self.sql_statements = 0
+        self.rows = 0
+        self.response_bytes = 0
+        self.max_response_bytes = 0
+
+    def add(self, call: CallMetrics, seconds: float, failed: bool, response_bytes: int) -> None:
+        self.calls += 1
+        self.errors += failed
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        self.buckets[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.execute_seconds += call.execute_seconds
+        # Whatever the handler spent outside the registered function
+        self.serialize_seconds += max(seconds - call.execute_seconds, 0.0)
+        self.sql_seconds += call.sql_seconds
+        self.sql_statements += call.sql_statements
+        self.rows += call.rows
+        self.response_bytes += response_bytes
+        self.max_response_bytes = max(self.max_response_bytes, response_bytes)
+
+    def quantile(self, q: float) -> float:
+        """Estimate a latency quantile in seconds as the upper bound of its bucket."""
+        target = q * self.calls
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS, self.buckets):
+            seen += count
+            if seen >= target:
+                return bound
+        return self.max_seconds
+
+    def to_dict(self) -> Dict[str, Any]:
+        calls = self.calls or 1
+        return {
+            "kind": self.kind,
+            "name": self.name,
+            "calls": self.calls,
+            "errors": self.errors,
+            "total_ms": round(self.total_seconds * 1000, 3),
+            "avg_ms": round(self.total_seconds / calls * 1000, 3),
+            "max_ms": round(self.max_seconds * 1000, 3),
+            "p50_ms_le": round(self.quantile(0.50) * 1000, 3),
+            "p95_ms_le": round(self.quantile(0.95) * 1000, 3),
+            "p99_ms_le": round(self.quantile(0.99) * 1000, 3),
+            "avg_execute_ms": round(self.execute_seconds / calls * 1000, 3),
+            "avg_sql_ms": round(self.sql_seconds / calls * 1000, 3),
+            "avg_serialize_ms": round(self.serialize_seconds / calls * 1000, 3),
+            "sql_statements": self.sql_statements,
+            "rows": self.rows,
+            "avg_rows": round(self.rows / calls, 1),
+            "response_bytes": self.response_bytes,
+            "avg_response_bytes": round(self.response_bytes / calls),
+            "max_response_bytes": self.max_response_bytes,
+            "latency_buckets": {
+                **{str(bound): count for bound, count in zip(LATENCY_BUCKETS, self.buckets)},
+                "+Inf": self.buckets[-1],
+            },
+        }
+
+
+class MetricsRegistry:
+    """Thread-safe collection of OperationStats for one server."""
+
+    def __init__(self, server: str):
+        self.server = server
+        self.started_at = datetime.now(timezone.utc)
+        self._operations: Dict[tuple, OperationStats] = {}
+        self._lock = threading.Lock()
+
+    def record(self, call: CallMetrics, seconds: float, failed: bool, response_bytes: int) -> None:
+        with self._lock:
+            stats = self._operations.get((call.kind, call.name))
+            if stats is None:
+                stats = self._operations[(call.kind, call.name)] = OperationStats(call.kind, call.name)
+            stats.add(call, seconds, failed, response_bytes)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """All operations, hottest (most total time) first."""
+        with self._lock:
+            operations = sorted(self._operations.values(), key=lambda s: s.total_seconds, reverse=True)
+            rendered = [stats.to_dict() for stats in operations]
+        return {
+            "server": self.server,
+            "started_at": self.started_at,
+            "uptime_seconds": round((datetime.now(timezone.utc) - self.started_at).total_seconds(), 1),
+            "operations": rendered,
+        }
+
+    def prometheus(self) -> str:
+        """Render every operation in the Prometheus text exposition format."""
+        counters = [
+            ("mcp_requests_total", "Requests handled", lambda s: s.calls),
+            ("mcp_request_errors_total", "Requests that failed", lambda s: s.errors),
+            ("mcp_execute_seconds_total", "Time spent in the registered function", lambda s: s.execute_seconds),
+            ("mcp_serialize_seconds_total", "Time spent building the response", lambda s: s.serialize_seconds),
+            ("mcp_sql_seconds_total", "Time spent executing SQL and fetching rows", lambda s: s.sql_seconds),
+            ("mcp_sql_statements_total", "SQL statements executed", lambda s: s.sql_statements),
+            ("mcp_rows_total", "Rows fetched from SQLite", lambda s: s.rows),
+            ("mcp_response_bytes_total", "Bytes of response content", lambda s: s.response_bytes),
+        ]
+        with self._lock:
+            operations = list(self._operations.values())
+            lines = []
+            for metric, help_text, value in counters:
+                lines.append(f"# HELP {metric} {help_text}")
+                lines.append(f"# TYPE {metric} counter")
+                for stats in operations:
+                    lines.append(f"{metric}{{{self._labels(stats)}}} {value(stats)}")
+
+            metric = "mcp_request_duration_seconds"
+            lines.append(f"# HELP {metric} Request latency")
+            lines.append(f"# TYPE {metric} histogram")
+            for stats in operations:
+                labels = self._labels(stats)
+                cumulative = 0
+                for bound, count in zip(LATENCY_BUCKETS, stats.buckets):
+                    cumulative += count
+                    lines.append(f'{metric}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'{metric}_bucket{{{labels},le="+Inf"}} {stats.calls}')
+                lines.append(f"{metric}_sum{{{labels}}} {stats.total_seconds}")
+                lines.append(f"{metric}_count{{{labels}}} {stats.calls}")
+        return "\n".join(lines) + "\n"
+
+    def _labels(self, stats: OperationStats) -> str:
+        return ",".join(
+            f'{key}="{_escape_label(value)}"'
+            for key, value in (("server", self.server), ("kind", stats.kind), ("name", stats.name))
+        )
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _content_bytes(item) -> int:
+    data = getattr(item, "text", None) or getattr(item, "blob", None) or ""
+    return len(data) if data.isascii() else len(data.encode("utf-8"))
+
+
+def _response_bytes(result) -> int:
+    """Size of the text and blob content of a CallTool, ReadResource or GetPrompt result."""
+    root = result.root
+    if isinstance(root, types.CallToolResult):
+        items = root.content
+    elif isinstance(root, types.ReadResourceResult):
+        items = root.contents
+    elif isinstance(root, types.GetPromptResult):
+        items = [message.content for message in root.messages]
+    else:
+        return 0
+    return sum(_content_bytes(item) for item in items)
+
+
+# =============================================================================
+# WRAPPING
+# =============================================================================
+
+
+def _timed(fn, name: str):
+    """Wrap a registered function to charge its run time to the current call."""
+
+    def finish(started: float) -> None:
+        call = _current_call.get()
+        if call is not None:
+            # Templates register under their URI template, not the concrete URI
+            call.name = name
+            call.execute_seconds += time.perf_counter() - started
+
+    if inspect.iscoroutinefunction(fn):
+
+        @functools.wraps(fn)
+        async def async_wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await fn(*args, **kwargs)
+            finally:
+                finish(started)
+
+        return async_wrapper
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            finish(started)
+
+    return wrapper
+
+
+def _timed_handler(registry: MetricsRegistry, handler, kind: str, request_name):
+    @functools.wraps(handler)
+    async def wrapper(request):
+        call = CallMetrics(kind, request_name(request))
+        token = _current_call.set(call)
+        started = time.perf_counter()
+        result = None
+        try:
+            result = await handler(request)
+            return result
+        finally:
+            _current_call.reset(token)
+            elapsed = time.perf_counter() - started
+            if result is None:
+                registry.record(call, elapsed, True, 0)
+            else:
+                failed = bool(getattr(result.root, "isError", False))
+                registry.record(call, elapsed, failed, _response_bytes(result))
+
+    return wrapper
+
+
+_registries: Dict[str, MetricsRegistry] = {}
+
+
+def instrument(mcp, metrics_uri: str = METRICS_URI, prometheus_path: Optional[str] = PROMETHEUS_PATH) -> MetricsRegistry:
+    """
+    Record metrics for every tool, resource and prompt registered on mcp.
+
+    Call after everything is registered. Also registers the JSON metrics
+    resource at metrics_uri and, unless prometheus_path is None, a GET route
+    serving Prometheus text on the HTTP transports.
+
+    Returns:
+        The server's MetricsRegistry
+    """
+    registry = _registries[mcp.name] = MetricsRegistry(mcp.name)
+
+    @mcp.resource(metrics_uri, mime_type="application/json")
+    def call_metrics() -> str:
+        """Per tool, resource and prompt call counts, latency, SQL time, rows and response sizes."""
+        return dumps(registry.snapshot())
+
+    if prometheus_path:
+        from starlette.responses import PlainTextResponse
+
+        @mcp.custom_route(prometheus_path, methods=["GET"])
+        async def prometheus_metrics(request):
+            return PlainTextResponse(registry.prometheus(), media_type="text/plain; version=0.0.4")
+
+    for tool in mcp._tool_manager.list_tools():
+        tool.fn = _timed(tool.fn, tool.name)
+    for uri, resource in mcp._resource_manager._resources.items():
+        if hasattr(resource, "fn"):
+            resource.fn = _timed(resource.fn, uri)
+    for template in mcp._resource_manager.list_templates():
+        template.fn = _timed(template.fn, template.uri_template)
+    for prompt in mcp._prompt_manager.list_prompts():
+        prompt.fn = _timed(prompt.fn, prompt.name)
+
+    handlers = mcp._mcp_server.request_handlers
+    handlers[types.CallToolRequest] = _timed_handler(
+        registry, handlers[types.CallToolRequest], "tool", lambda request: request.params.name
+    )
+    handlers[types.ReadResourceRequest] = _timed_handler(
+        registry, handlers[types.ReadResourceRequest], "resource", lambda request: str(request.params.uri)
+    )
+    handlers[types.GetPromptRequest] = _timed_handler(
+        registry, handlers[types.GetPromptRequest], "prompt", lambda request: request.params.name
+    )
+    return registry
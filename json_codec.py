@@ -0,0 +1,147 @@
+"""
+JSON encoding shared by the MCP servers in this repo.
+
+Payloads are encoded with orjson or msgspec when one is installed and with
+the standard library json module otherwise. Output is indented for
+readability by default; compact mode drops all optional whitespace, which
+makes large payloads noticeably smaller and faster to produce.
+"""
+
+from datetime import date, datetime, timedelta
+from typing import Any, List
+import dataclasses
+import json
+
+from mcp.server.fastmcp.utilities.func_metadata import FuncMetadata
+from mcp.server.fastmcp.utilities.types import Audio, Image
+from mcp.types import ContentBlock, TextContent
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+# Encoder backend: "auto" picks the fastest installed of orjson, msgspec, stdlib
+JSON_ENCODER = "auto"
+# Emit JSON without indentation or spaces after separators
+COMPACT_JSON = False
+
+
+def _default(value: Any) -> Any:
+    """Fallback for values JSON has no type for."""
+    if isinstance(value, datetime) and value.utcoffset() == timedelta(0):
+        return value.isoformat().replace("+00:00", "Z")
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if dataclasses.is_dataclass(value):
+        return {field.name: getattr(value, field.name) for field in dataclasses.fields(value)}
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _dumps_orjson(value: Any, compact: bool) -> str:
+    option = orjson.OPT_PASSTHROUGH_DATETIME
+    if not compact:
+        option |= orjson.OPT_INDENT_2
+    return orjson.dumps(value, default=_default, option=option).decode()
+
+
+def _dumps_msgspec(value: Any, compact: bool) -> str:
+    encoded = msgspec.json.encode(value, enc_hook=_default)
+    if not compact:
+        encoded = msgspec.json.format(encoded, indent=2)
+    return encoded.decode()
+
+
+def _dumps_stdlib(value: Any, compact: bool) -> str:
+    if compact:
+        return json.dumps(value, default=_default, separators=(",", ":"))
+    return json.dumps(value, default=_default, indent=2)
+
+
+ENCODERS = {
+    "orjson": _dumps_orjson,
+    "msgspec": _dumps_msgspec,
+    "stdlib": _dumps_stdlib,
+}
+
+
+def encoder_name() -> str:
+    """Name of the encoder backend dumps() uses under the current configuration."""
+    if JSON_ENCODER != "auto":
+        return JSON_ENCODER
+    if orjson is not None:
+        return "orjson"
+    if msgspec is not None:
+        return "msgspec"
+    return "stdlib"
+
+
+def dumps(value: Any, compact: bool = None) -> str:
+    """
+    Encode a value as JSON text.
+
+    Args:
+        value: Dicts, lists, scalars and dataclasses; datetimes are written
+            in ISO 8601, with a "Z" suffix for UTC.
+        compact: Override COMPACT_JSON for this call.
+
+    Returns:
+        The JSON document as a string.
+    """
+    if compact is None:
+        compact = COMPACT_JSON
+    return ENCODERS[encoder_name()](value, compact)
+
+
+def to_content(result: Any) -> List[ContentBlock]:
+    """
+    FastMCP's conversion of a tool result to content blocks, encoding with dumps().
+
+    As in FastMCP, a list or tuple gives one block per item and strings are
+    passed through as text.
+    """
+    if result is None:
+        return []
+    if isinstance(result, ContentBlock):
+        return [result]
+    if isinstance(result, Image):
+        return [result.to_image_content()]
+    if isinstance(result, Audio):
+        return [result.to_audio_content()]
+    if isinstance(result, (list, tuple)):
+        return [block for item in result for block in to_content(item)]
+    if not isinstance(result, str):
+        result = dumps(result)
+    return [TextContent(type="text", text=result)]
+
+
+class EncodedFuncMetadata(FuncMetadata):
+    """Tool metadata that renders results with dumps() instead of FastMCP's encoder."""
+
+    def convert_result(self, result: Any) -> Any:
+        unstructured_content = to_content(result)
+        if self.output_schema is None:
+            return unstructured_content
+
+        if self.wrap_output:
+            result = {"result": result}
+        validated = self.output_model.model_validate(result)
+        return unstructured_content, validated.model_dump(mode="json", by_alias=True)
+
+
+def use_for_tools(mcp) -> None:
+    """
+    Render the text content of every registered tool's results with dumps().
+
+    Call after all tools are registered.
+    """
+    for tool in mcp._tool_manager.list_tools():
+        if type(tool.fn_metadata) is FuncMetadata:
+            tool.fn_metadata = EncodedFuncMetadata.model_construct(
+                **dict(tool.fn_metadata)
+            )
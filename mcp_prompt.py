@@ -1,5 +1,7 @@
 from mcp.server.fastmcp import FastMCP
 
+import instrumentation
+
 
 mcp = FastMCP("Prompt Tester")
 
@@ -18,5 +20,8 @@ def get_prompt(topic: str) -> str:
     )
 
 
+instrumentation.instrument(mcp)
+
+
 if __name__ == "__main__":
     mcp.run()
\ No newline at end of file
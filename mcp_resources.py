@@ -1,9 +1,43 @@
-from datetime import datetime, timezone
+from bisect import bisect_left, bisect_right, insort
+from collections import defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass, fields
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+import asyncio
+import copy
+import hashlib
 import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import unicodedata
+import uuid
 from mcp.server.fastmcp import FastMCP
 
+from json_codec import dumps
+import instrumentation
+import json_codec
+
 mcp = FastMCP("Library Management System", "1.0.0")
 
+# Storage backend: "memory" serves LIBRARY_DATA from RAM, "sqlite" persists to LIBRARY_DB
+LIBRARY_BACKEND = "memory"
+LIBRARY_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), "db", "library.db")
+# Overdue fine charged per full day past the due date
+FINE_PER_DAY = 0.50
+# Loan length for a checkout, and the extension granted by each renewal
+LOAN_PERIOD_DAYS = 30
+MAX_RENEWALS = 2
+# Most circulation events accepted by one apply_circulation_events call
+MAX_BULK_EVENTS = 10000
+# Seconds to collect data changes before notifying resource subscribers
+NOTIFY_COALESCE_SECONDS = 0.2
+# Recompute library://stats from scratch on every read and fail on drift (for tests)
+LIBRARY_STATS_VERIFY = False
+
 # Mock database - In production, this would be a real database
 LIBRARY_DATA = {
     "books": [
@@ -111,24 +145,1717 @@ LIBRARY_DATA = {
 }
 
 
+# Tables making up the library data, in load order
+LIBRARY_TABLES = ("books", "members", "checkouts", "reservations")
+
+
+def parse_timestamp(value: str) -> datetime:
+    """
+    Parse the ISO-8601 'Z' timestamps used in the library data.
+
+    Timestamps without an offset are taken as UTC, so every datetime in a
+    store is aware and they all compare with each other.
+    """
+    if not isinstance(value, str):
+        raise ValueError(f"Invalid timestamp: {value!r}")
+    moment = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment
+
+
+def format_timestamp(moment: datetime) -> str:
+    """Format an aware datetime the way the library data stores timestamps."""
+    return moment.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def split_day(moment: datetime) -> tuple:
+    """(whole UTC days since the epoch, time into that day) for an aware datetime."""
+    return divmod(moment - EPOCH, timedelta(days=1))
+
+
+def category_slug(category: str) -> str:
+    """URL slug for a category name: lowercase words joined by hyphens ("Computer Science" -> "computer-science")."""
+    ascii_name = unicodedata.normalize("NFKD", category).encode("ascii", "ignore").decode()
+    return re.sub(r"[^a-z0-9]+", "-", ascii_name.lower()).strip("-") or "category"
+
+
+def unique_category_slug(category: str, taken) -> str:
+    """
+    category_slug(category), numbered while it is already taken by another
+    category: "C Programming", "C++ Programming" and "C# Programming" get
+    c-programming, c-programming-2 and c-programming-3 in the order they appear.
+    """
+    base = category_slug(category)
+    slug, number = base, 1
+    while slug in taken:
+        number += 1
+        slug = f"{base}-{number}"
+    return slug
+
+
+class Record:
+    """
+    Base for the library's typed records.
+
+    Subclasses are slots dataclasses: timestamp fields hold aware datetimes
+    parsed once on the way in, and enum-like fields (statuses, categories,
+    ids referenced from other records) are interned so equal values share
+    one string. Records stay typed inside the stores and are turned into
+    JSON only at the response boundary, by json_codec.
+    """
+
+    __slots__ = ()
+
+    TIMESTAMP_FIELDS = ()
+    INTERNED_FIELDS = ()
+
+    @classmethod
+    def coerce(cls, values: dict) -> dict:
+        """Field values with timestamps parsed and enum-like strings interned."""
+        names = cls.field_names()
+        coerced = {}
+        for name, value in values.items():
+            if name not in names:
+                raise TypeError(f"Unknown {cls.__name__} field: {name}")
+            if isinstance(value, str):
+                if name in cls.TIMESTAMP_FIELDS:
+                    value = parse_timestamp(value)
+                elif name in cls.INTERNED_FIELDS:
+                    value = sys.intern(value)
+            coerced[name] = value
+        return coerced
+
+    @classmethod
+    def from_dict(cls, values):
+        """Build a record from a plain dict as found in LIBRARY_DATA (records pass through)."""
+        if isinstance(values, cls):
+            return values
+        return cls(**cls.coerce(values))
+
+    @classmethod
+    def field_names(cls) -> tuple:
+        return tuple(field.name for field in fields(cls))
+
+    @classmethod
+    def dump(cls, values: dict) -> dict:
+        """Plain storage form of field values, with timestamps formatted as text."""
+        return {
+            name: format_timestamp(value)
+            if name in cls.TIMESTAMP_FIELDS and value is not None
+            else value
+            for name, value in values.items()
+        }
+
+    def update(self, changes: dict) -> None:
+        for name, value in self.coerce(changes).items():
+            setattr(self, name, value)
+
+    def fields(self) -> dict:
+        """Shallow field dict, leaving timestamps as datetimes."""
+        return {name: getattr(self, name) for name in self.field_names()}
+
+    def to_dict(self) -> dict:
+        return self.dump(self.fields())
+
+
+@dataclass(slots=True)
+class Book(Record):
+    id: str
+    title: str
+    authors: List[str]
+    isbn: str
+    category: str
+    publisher: str
+    publication_year: int
+    copies_total: int
+    copies_available: int
+    location: str
+    status: str
+    last_updated: Optional[datetime] = None
+
+    TIMESTAMP_FIELDS = ("last_updated",)
+    INTERNED_FIELDS = ("category", "status")
+
+
+@dataclass(slots=True)
+class Member(Record):
+    id: str
+    name: str
+    email: str
+    member_type: str
+    registration_date: Optional[datetime]
+    books_checked_out: List[str]
+    max_books: int
+    status: str
+
+    TIMESTAMP_FIELDS = ("registration_date",)
+    INTERNED_FIELDS = ("member_type", "status")
+
+
+@dataclass(slots=True)
+class Checkout(Record):
+    id: str
+    book_id: str
+    member_id: str
+    checkout_date: datetime
+    due_date: datetime
+    return_date: Optional[datetime]
+    status: str
+    renewal_count: int = 0
+
+    TIMESTAMP_FIELDS = ("checkout_date", "due_date", "return_date")
+    INTERNED_FIELDS = ("book_id", "member_id", "status")
+
+
+@dataclass(slots=True)
+class Reservation(Record):
+    id: str
+    book_id: str
+    member_id: str
+    reservation_date: datetime
+    status: str
+    priority: int = 1
+
+    TIMESTAMP_FIELDS = ("reservation_date",)
+    INTERNED_FIELDS = ("book_id", "member_id", "status")
+
+
+# Record type of each library table
+RECORD_TYPES = {
+    "books": Book,
+    "members": Member,
+    "checkouts": Checkout,
+    "reservations": Reservation,
+}
+
+# Every timestamp column, for decoding rows that join several tables
+TIMESTAMP_COLUMNS = frozenset(
+    name for record_type in RECORD_TYPES.values() for name in record_type.TIMESTAMP_FIELDS
+)
+
+
+class LibraryStats:
+    """
+    Collection, member and circulation counts for library://stats, kept
+    current by applying each record change as a delta instead of rescanning.
+
+    Stores call add() with every new record, and remove() with the old
+    version followed by add() with the new version when a record changes.
+    """
+
+    def __init__(self):
+        self.total_titles = 0
+        self.total_copies = 0
+        self.available_copies = 0
+        self.categories = {}  # category -> {"count", "available"}
+        self.total_members = 0
+        self.active_members = 0
+        self.member_types = {}  # member_type -> count
+        self.active_checkouts = 0
+        self.active_reservations = 0
+
+    @classmethod
+    def from_records(cls, data: dict) -> "LibraryStats":
+        """Build the counts from scratch over every record (or record dict) in data."""
+        stats = cls()
+        for table in LIBRARY_TABLES:
+            for record in data.get(table, []):
+                stats.add(table, RECORD_TYPES[table].from_dict(record))
+        return stats
+
+    @classmethod
+    def from_dict(cls, counts: dict) -> "LibraryStats":
+        """Rebuild from the output of as_dict() (or an equivalent aggregate query)."""
+        stats = cls()
+        for name, value in counts.items():
+            setattr(stats, name, copy.deepcopy(value))
+        return stats
+
+    def add(self, table: str, record: Record) -> None:
+        self._apply(table, record, 1)
+
+    def remove(self, table: str, record: Record) -> None:
+        self._apply(table, record, -1)
+
+    def as_dict(self) -> dict:
+        return {
+            "total_titles": self.total_titles,
+            "total_copies": self.total_copies,
+            "available_copies": self.available_copies,
+            "categories": copy.deepcopy(self.categories),
+            "total_members": self.total_members,
+            "active_members": self.active_members,
+            "member_types": dict(self.member_types),
+            "active_checkouts": self.active_checkouts,
+            "active_reservations": self.active_reservations,
+        }
+
+    def _apply(self, table: str, record: Record, sign: int) -> None:
+        if table == "books":
+            self.total_titles += sign
+            self.total_copies += sign * record.copies_total
+            self.available_copies += sign * record.copies_available
+            entry = self.categories.setdefault(record.category, {"count": 0, "available": 0})
+            entry["count"] += sign
+            if record.copies_available > 0:
+                entry["available"] += sign
+            if entry["count"] == 0:
+                del self.categories[record.category]
+        elif table == "members":
+            self.total_members += sign
+            if record.status == "active":
+                self.active_members += sign
+            member_type = record.member_type
+            self.member_types[member_type] = self.member_types.get(member_type, 0) + sign
+            if self.member_types[member_type] == 0:
+                del self.member_types[member_type]
+        elif table == "checkouts":
+            if record.status == "active":
+                self.active_checkouts += sign
+        elif table == "reservations":
+            if record.status == "active":
+                self.active_reservations += sign
+
+
+def verify_statistics(maintained: dict, recomputed: dict) -> None:
+    """Raise AssertionError if incrementally maintained counts drifted from a full recompute."""
+    if maintained != recomputed:
+        drift = {
+            key: {"maintained": maintained.get(key), "recomputed": recomputed.get(key)}
+            for key in recomputed
+            if maintained.get(key) != recomputed.get(key)
+        }
+        raise AssertionError(f"Library statistics drifted: {json.dumps(drift)}")
+
+
+class LibraryStore:
+    """
+    In-memory library data with hash indexes on every primary key and
+    secondary indexes for the lookups the library:// resources perform.
+
+    Secondary indexes:
+        - books by category name (one partition per category, addressable by slug)
+        - books with copies available
+        - checkouts by member_id
+        - active checkouts ordered by due date
+        - reservations by book_id
+
+    Records are Book/Member/Checkout/Reservation instances; add_* also
+    accepts plain dicts in the LIBRARY_DATA format. All mutations go through
+    the add_*/update_* methods so the indexes stay consistent with the
+    records. Each mutation bumps the generation of its table, which keys the
+    serialized-response cache. Mutations made inside transaction() are
+    undone if the block raises.
+    """
+
+    def __init__(self, data: dict):
+        self.books = {}
+        self.members = {}
+        self.checkouts = {}
+        self.reservations = {}
+
+        self._books_by_category = defaultdict(dict)  # category name -> {id: book}
+        self._category_names = {}  # category slug -> category name
+        self._category_slugs = {}  # category name -> slug
+        self._available_books = {}  # id -> book, for books with copies available
+        self._checkouts_by_member = defaultdict(dict)  # member_id -> {id: checkout}
+        self._active_by_due = []  # Sorted (due datetime, checkout id) pairs
+        # Running overdue totals for the active checkouts due before _overdue_as_of
+        self._overdue_as_of = None
+        self._overdue_day_total = 0  # Sum of their due days (see split_day)
+        self._overdue_times = []  # Sorted times of day they fall due
+        self._reservations_by_book = defaultdict(dict)  # book_id -> {id: reservation}
+        self._undo = None  # Undo log of the open transaction
+        self._lock = threading.RLock()
+        self.stats = LibraryStats()
+        self.generations = dict.fromkeys(LIBRARY_TABLES, 0)
+        self.last_modified = datetime.now()
+        self.listeners = []  # Called with the table name after each mutation
+
+        # Copy the seed so the store never mutates the caller's data
+        data = copy.deepcopy(data)
+        for book in data.get("books", []):
+            self.add_book(book)
+        for member in data.get("members", []):
+            self.add_member(member)
+        for checkout in data.get("checkouts", []):
+            self.add_checkout(checkout)
+        for reservation in data.get("reservations", []):
+            self.add_reservation(reservation)
+
+    # -- Mutations ------------------------------------------------------------
+
+    @contextmanager
+    def transaction(self):
+        """
+        Hold the store lock for a group of mutations and undo all of them if
+        the block raises. Nested transactions join the outermost one.
+        """
+        with self._lock:
+            if self._undo is not None:
+                yield
+                return
+            self._undo = []
+            try:
+                yield
+            except BaseException:
+                undo, self._undo = self._undo, None
+                for step in reversed(undo):
+                    step()
+                raise
+            finally:
+                self._undo = None
+
+    def add_book(self, book) -> Book:
+        book = Book.from_dict(book)
+        with self._lock:
+            self.books[book.id] = book
+            self._index_book(book)
+            self.stats.add("books", book)
+            self._logged_add("books", book.id)
+            self._bump("books")
+            return book
+
+    def update_book(self, book_id: str, **changes) -> Book:
+        with self._lock:
+            book = self.books[book_id]
+            self._logged_update(self.update_book, book, changes)
+            self.stats.remove("books", book)
+            self._unindex_book(book)
+            book.update(changes)
+            self._index_book(book)
+            self.stats.add("books", book)
+            self._bump("books")
+            return book
+
+    def add_member(self, member) -> Member:
+        member = Member.from_dict(member)
+        with self._lock:
+            self.members[member.id] = member
+            self.stats.add("members", member)
+            self._logged_add("members", member.id)
+            self._bump("members")
+            return member
+
+    def update_member(self, member_id: str, **changes) -> Member:
+        with self._lock:
+            member = self.members[member_id]
+            self._logged_update(self.update_member, member, changes)
+            self.stats.remove("members", member)
+            member.update(changes)
+            self.stats.add("members", member)
+            self._bump("members")
+            return member
+
+    def add_checkout(self, checkout) -> Checkout:
+        checkout = Checkout.from_dict(checkout)
+        with self._lock:
+            self.checkouts[checkout.id] = checkout
+            self._index_checkout(checkout)
+            self.stats.add("checkouts", checkout)
+            self._logged_add("checkouts", checkout.id)
+            self._bump("checkouts")
+            return checkout
+
+    def update_checkout(self, checkout_id: str, **changes) -> Checkout:
+        with self._lock:
+            checkout = self.checkouts[checkout_id]
+            self._logged_update(self.update_checkout, checkout, changes)
+            self.stats.remove("checkouts", checkout)
+            self._unindex_checkout(checkout)
+            checkout.update(changes)
+            self._index_checkout(checkout)
+            self.stats.add("checkouts", checkout)
+            self._bump("checkouts")
+            return checkout
+
+    def add_reservation(self, reservation) -> Reservation:
+        reservation = Reservation.from_dict(reservation)
+        with self._lock:
+            self.reservations[reservation.id] = reservation
+            self._reservations_by_book[reservation.book_id][reservation.id] = reservation
+            self.stats.add("reservations", reservation)
+            self._logged_add("reservations", reservation.id)
+            self._bump("reservations")
+            return reservation
+
+    def update_reservation(self, reservation_id: str, **changes) -> Reservation:
+        with self._lock:
+            reservation = self.reservations[reservation_id]
+            self._logged_update(self.update_reservation, reservation, changes)
+            self.stats.remove("reservations", reservation)
+            self._reservations_by_book[reservation.book_id].pop(reservation.id, None)
+            reservation.update(changes)
+            self._reservations_by_book[reservation.book_id][reservation.id] = reservation
+            self.stats.add("reservations", reservation)
+            self._bump("reservations")
+            return reservation
+
+    # -- Queries --------------------------------------------------------------
+
+    def generation(self, *tables: str) -> tuple:
+        """Current generation of each given table; changes whenever one is mutated."""
+        with self._lock:
+            return tuple(self.generations[table] for table in tables)
+
+    def get_book(self, book_id: str):
+        return self.books.get(book_id)
+
+    def get_member(self, member_id: str):
+        return self.members.get(member_id)
+
+    def get_checkout(self, checkout_id: str):
+        return self.checkouts.get(checkout_id)
+
+    def get_reservation(self, reservation_id: str):
+        return self.reservations.get(reservation_id)
+
+    def all_books(self) -> list:
+        with self._lock:
+            return list(self.books.values())
+
+    def available_books(self) -> list:
+        with self._lock:
+            return list(self._available_books.values())
+
+    def resolve_category(self, category: str) -> Optional[tuple]:
+        """
+        (name, slug) of the category given by its slug, its exact name or,
+        failing those, its name in any case; None if there is no such category.
+        """
+        with self._lock:
+            name = self._category_names.get(category)
+            if name is None and category in self._books_by_category:
+                name = category
+            if name is None:
+                name = self._category_names.get(category.lower())
+            if name is None:
+                folded = category.casefold()
+                name = next(
+                    (other for other in self._books_by_category if other.casefold() == folded),
+                    None,
+                )
+            if name is None:
+                return None
+            return name, self._category_slugs[name]
+
+    def books_in_category(self, category: str) -> list:
+        """Books in category, given as for resolve_category."""
+        with self._lock:
+            resolved = self.resolve_category(category)
+            if resolved is None:
+                return []
+            return list(self._books_by_category[resolved[0]].values())
+
+    def category_partitions(self) -> list:
+        """Name, slug and book counts of every category, in first-seen order."""
+        with self._lock:
+            return [
+                {
+                    "name": name,
+                    "slug": self._category_slugs[name],
+                    "book_count": len(books),
+                    "available_count": sum(1 for book in books.values() if book.copies_available > 0),
+                }
+                for name, books in self._books_by_category.items()
+            ]
+
+    def all_members(self) -> list:
+        with self._lock:
+            return list(self.members.values())
+
+    def checkouts_for_member(self, member_id: str, active_only: bool = True) -> list:
+        with self._lock:
+            checkouts = self._checkouts_by_member.get(member_id, {}).values()
+            return [c for c in checkouts if not active_only or c.status == "active"]
+
+    def reservations_for_book(self, book_id: str, active_only: bool = True) -> list:
+        """Reservations on a book in priority order."""
+        with self._lock:
+            reservations = self._reservations_by_book.get(book_id, {}).values()
+            return sorted(
+                (r for r in reservations if not active_only or r.status == "active"),
+                key=lambda r: (r.priority, r.id),
+            )
+
+    def active_checkouts_due_before(
+        self, moment: datetime, limit: int = None, offset: int = 0
+    ) -> list:
+        """Active checkouts whose due date is strictly before moment, earliest first."""
+        with self._lock:
+            end = bisect_left(self._active_by_due, (moment, ""))
+            if limit is not None:
+                end = min(end, offset + limit)
+            return [
+                self.checkouts[checkout_id]
+                for _, checkout_id in self._active_by_due[offset:end]
+            ]
+
+    def active_checkouts_by_member(self) -> dict:
+        """Map member_id to the titles and dates of that member's active checkouts."""
+        with self._lock:
+            result = {}
+            for member_id in self.members:
+                rows = []
+                for checkout in self.checkouts_for_member(member_id):
+                    book = self.books.get(checkout.book_id)
+                    if book:
+                        rows.append(
+                            {
+                                "book_title": book.title,
+                                "checkout_date": checkout.checkout_date,
+                                "due_date": checkout.due_date,
+                            }
+                        )
+                result[member_id] = rows
+            return result
+
+    def overdue_summary(self, moment: datetime) -> dict:
+        """
+        Count of active checkouts due before moment and their total whole days overdue.
+
+        Read from running totals: a checkout due on day d at time t is
+        (day - d) whole days overdue at moment, one fewer if t is later in
+        the day than moment. Only checkouts that fell due since the last
+        call are added, and checkouts, returns and renewals keep the totals
+        current in between.
+        """
+        with self._lock:
+            self._advance_overdue(moment)
+            day, time_of_day = split_day(moment)
+            count = len(self._overdue_times)
+            later_in_day = count - bisect_right(self._overdue_times, time_of_day)
+            total_days = count * day - self._overdue_day_total - later_in_day
+            return {"count": count, "total_days_overdue": total_days}
+
+    def overdue_checkouts(self, moment: datetime, limit: int = None, offset: int = 0) -> list:
+        """
+        Active checkouts due before moment, earliest first, joined with their
+        book and member. Only the requested page is materialized.
+        """
+        with self._lock:
+            rows = []
+            for checkout in self.active_checkouts_due_before(moment, limit, offset):
+                book = self.books.get(checkout.book_id)
+                member = self.members.get(checkout.member_id)
+                if book and member:
+                    rows.append(
+                        {
+                            "book_title": book.title,
+                            "book_id": book.id,
+                            "member_name": member.name,
+                            "member_email": member.email,
+                            "checkout_date": checkout.checkout_date,
+                            "due_date": checkout.due_date,
+                        }
+                    )
+            return rows
+
+    def statistics(self, verify: bool = False) -> dict:
+        """Raw collection, member and circulation counts for library://stats."""
+        with self._lock:
+            counts = self.stats.as_dict()
+            if verify:
+                recomputed = LibraryStats.from_records(
+                    {
+                        "books": self.books.values(),
+                        "members": self.members.values(),
+                        "checkouts": self.checkouts.values(),
+                        "reservations": self.reservations.values(),
+                    }
+                )
+                verify_statistics(counts, recomputed.as_dict())
+            return counts
+
+    # -- Index maintenance ----------------------------------------------------
+
+    def _bump(self, table: str) -> None:
+        self.generations[table] += 1
+        self.last_modified = datetime.now()
+        for listener in self.listeners:
+            listener(table)
+
+    def _logged_add(self, table: str, record_id: str) -> None:
+        if self._undo is not None:
+            self._undo.append(lambda: self._discard(table, record_id))
+
+    def _logged_update(self, update, record: Record, changes: dict) -> None:
+        if self._undo is not None:
+            previous = {name: getattr(record, name) for name in changes}
+            self._undo.append(lambda: update(record.id, **previous))
+
+    def _discard(self, table: str, record_id: str) -> None:
+        """Remove a record added earlier in a transaction that is being undone."""
+        record = getattr(self, table).pop(record_id)
+        if table == "books":
+            self._unindex_book(record)
+        elif table == "checkouts":
+            self._unindex_checkout(record)
+        elif table == "reservations":
+            self._reservations_by_book[record.book_id].pop(record_id, None)
+        self.stats.remove(table, record)
+        self._bump(table)
+
+    def _index_book(self, book: Book) -> None:
+        if book.category not in self._books_by_category:
+            slug = unique_category_slug(book.category, self._category_names)
+            self._category_names[slug] = book.category
+            self._category_slugs[book.category] = slug
+        self._books_by_category[book.category][book.id] = book
+        if book.copies_available > 0:
+            self._available_books[book.id] = book
+
+    def _unindex_book(self, book: Book) -> None:
+        partition = self._books_by_category[book.category]
+        partition.pop(book.id, None)
+        if not partition:
+            del self._books_by_category[book.category]
+            del self._category_names[self._category_slugs.pop(book.category)]
+        self._available_books.pop(book.id, None)
+
+    def _index_checkout(self, checkout: Checkout) -> None:
+        self._checkouts_by_member[checkout.member_id][checkout.id] = checkout
+        if checkout.status == "active":
+            insort(self._active_by_due, (checkout.due_date, checkout.id))
+            if self._overdue_as_of is not None and checkout.due_date < self._overdue_as_of:
+                self._count_overdue(checkout.due_date)
+
+    def _unindex_checkout(self, checkout: Checkout) -> None:
+        self._checkouts_by_member[checkout.member_id].pop(checkout.id, None)
+        if checkout.status == "active":
+            key = (checkout.due_date, checkout.id)
+            position = bisect_left(self._active_by_due, key)
+            if position < len(self._active_by_due) and self._active_by_due[position] == key:
+                del self._active_by_due[position]
+                if self._overdue_as_of is not None and checkout.due_date < self._overdue_as_of:
+                    self._count_overdue(checkout.due_date, -1)
+
+    def _count_overdue(self, due_at: datetime, sign: int = 1) -> None:
+        day, time_of_day = split_day(due_at)
+        self._overdue_day_total += sign * day
+        if sign > 0:
+            insort(self._overdue_times, time_of_day)
+        else:
+            del self._overdue_times[bisect_left(self._overdue_times, time_of_day)]
+
+    def _advance_overdue(self, moment: datetime) -> None:
+        # Move the overdue boundary to moment, counting in (or out, if moment
+        # is earlier) just the checkouts whose due dates lie in between
+        start = 0
+        if self._overdue_as_of is not None:
+            start = bisect_left(self._active_by_due, (self._overdue_as_of, ""))
+        end = bisect_left(self._active_by_due, (moment, ""))
+        for due_at, _ in self._active_by_due[start:end]:
+            self._count_overdue(due_at)
+        for due_at, _ in self._active_by_due[end:start]:
+            self._count_overdue(due_at, -1)
+        self._overdue_as_of = moment
+
+
+# Schema migrations for the SQLite backend; PRAGMA user_version records how many ran
+LIBRARY_MIGRATIONS = [
+    # 1: core tables (list-valued fields are stored as JSON text)
+    """
+    CREATE TABLE books (
+        id TEXT PRIMARY KEY,
+        title TEXT NOT NULL,
+        authors TEXT NOT NULL DEFAULT '[]',
+        isbn TEXT,
+        category TEXT NOT NULL,
+        publisher TEXT,
+        publication_year INTEGER,
+        copies_total INTEGER NOT NULL DEFAULT 0,
+        copies_available INTEGER NOT NULL DEFAULT 0,
+        location TEXT,
+        status TEXT NOT NULL,
+        last_updated TEXT
+    );
+    CREATE TABLE members (
+        id TEXT PRIMARY KEY,
+        name TEXT NOT NULL,
+        email TEXT,
+        member_type TEXT NOT NULL,
+        registration_date TEXT,
+        books_checked_out TEXT NOT NULL DEFAULT '[]',
+        max_books INTEGER NOT NULL DEFAULT 0,
+        status TEXT NOT NULL
+    );
+    CREATE TABLE checkouts (
+        id TEXT PRIMARY KEY,
+        book_id TEXT NOT NULL REFERENCES books (id),
+        member_id TEXT NOT NULL REFERENCES members (id),
+        checkout_date TEXT NOT NULL,
+        due_date TEXT NOT NULL,
+        return_date TEXT,
+        status TEXT NOT NULL,
+        renewal_count INTEGER NOT NULL DEFAULT 0
+    );
+    CREATE TABLE reservations (
+        id TEXT PRIMARY KEY,
+        book_id TEXT NOT NULL REFERENCES books (id),
+        member_id TEXT NOT NULL REFERENCES members (id),
+        reservation_date TEXT NOT NULL,
+        status TEXT NOT NULL,
+        priority INTEGER NOT NULL DEFAULT 1
+    );
+    """,
+    # 2: indexes for the resource queries
+    """
+    CREATE INDEX idx_books_category ON books (category COLLATE NOCASE);
+    CREATE INDEX idx_books_available ON books (id) WHERE copies_available > 0;
+    CREATE INDEX idx_checkouts_member_status ON checkouts (member_id, status);
+    CREATE INDEX idx_checkouts_active_due ON checkouts (due_date) WHERE status = 'active';
+    CREATE INDEX idx_reservations_book_status ON reservations (book_id, status, priority);
+    """,
+    # 3: category slug partitions (category_slug() is registered by migrate_library_db)
+    """
+    ALTER TABLE books ADD COLUMN category_slug TEXT;
+    UPDATE books SET category_slug = category_slug(category);
+    CREATE INDEX idx_books_category_slug ON books (category_slug);
+    """,
+    # 4: slugs unique per category name (punctuation no longer merges categories)
+    """
+    UPDATE books SET category_slug = category_slug(category);
+    """,
+    # 5: numbered slugs; SQLiteLibraryStore assigns them to books left without one
+    """
+    UPDATE books SET category_slug = NULL;
+    """,
+]
+
+# Columns holding JSON-encoded lists, per table
+JSON_COLUMNS = {"books": ("authors",), "members": ("books_checked_out",)}
+
+# Columns computed from record fields on write, per table: column -> (source field,
+# name of the SQLiteLibraryStore method computing it)
+DERIVED_COLUMNS = {"books": {"category_slug": ("category", "_slug_for_category")}}
+
+
+def migrate_library_db(conn: sqlite3.Connection) -> int:
+    """Apply any pending LIBRARY_MIGRATIONS and return the resulting schema version."""
+    conn.create_function("category_slug", 1, category_slug, deterministic=True)
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    for number, script in enumerate(LIBRARY_MIGRATIONS[version:], start=version + 1):
+        # Each migration and its version bump commit together or not at all
+        conn.executescript(f"BEGIN;\n{script}\nPRAGMA user_version = {number};\nCOMMIT;")
+    return len(LIBRARY_MIGRATIONS)
+
+
+class SQLiteLibraryStore:
+    """
+    Library data persisted in SQLite, with the same interface as LibraryStore.
+
+    Resource queries are single set-based statements (joins and aggregates)
+    over indexed tables instead of per-record lookups. The database is
+    migrated on open and seeded from the given data when it is empty.
+    Every mutation runs in a transaction; mutations grouped with
+    transaction() commit together or roll back together.
+    """
+
+    def __init__(self, db_file: str, seed: dict = None):
+        self.db_file = db_file
+        os.makedirs(os.path.dirname(db_file) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(
+            db_file, check_same_thread=False, factory=instrumentation.InstrumentedConnection
+        )
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._lock = threading.RLock()
+        self._transaction_depth = 0
+        self.generations = dict.fromkeys(LIBRARY_TABLES, 0)
+        self.last_modified = datetime.now()
+        self.listeners = []  # Called with the table name after each mutation
+
+        migrate_library_db(self._conn)
+        self._assign_category_slugs()
+        self.stats = LibraryStats.from_dict(self._aggregate_statistics())
+        if seed and not self._conn.execute("SELECT 1 FROM books LIMIT 1").fetchone():
+            self.load_seed(seed)
+
+    def load_seed(self, data: dict) -> None:
+        """Import books, members, checkouts and reservations in one transaction."""
+        with self.transaction():
+            for table in LIBRARY_TABLES:
+                for record in data.get(table, []):
+                    self._insert(table, record)
+
+    def close(self) -> None:
+        self._conn.close()
+
+    @contextmanager
+    def transaction(self):
+        """
+        Run a group of mutations in one SQLite transaction, committed when the
+        block exits and rolled back if it raises. Nested transactions join the
+        outermost one.
+        """
+        with self._lock:
+            if self._transaction_depth:
+                self._transaction_depth += 1
+                try:
+                    yield
+                finally:
+                    self._transaction_depth -= 1
+                return
+            self._transaction_depth = 1
+            try:
+                with self._conn:
+                    yield
+            except BaseException:
+                # The counts saw the rolled-back changes; rebuild them from the data
+                self.stats = LibraryStats.from_dict(self._aggregate_statistics())
+                raise
+            finally:
+                self._transaction_depth = 0
+
+    # -- Mutations ------------------------------------------------------------
+
+    def add_book(self, book) -> Book:
+        with self.transaction():
+            return self._insert("books", book)
+
+    def update_book(self, book_id: str, **changes) -> Book:
+        return self._update("books", book_id, changes)
+
+    def add_member(self, member) -> Member:
+        with self.transaction():
+            return self._insert("members", member)
+
+    def update_member(self, member_id: str, **changes) -> Member:
+        return self._update("members", member_id, changes)
+
+    def add_checkout(self, checkout) -> Checkout:
+        with self.transaction():
+            return self._insert("checkouts", checkout)
+
+    def update_checkout(self, checkout_id: str, **changes) -> Checkout:
+        return self._update("checkouts", checkout_id, changes)
+
+    def add_reservation(self, reservation) -> Reservation:
+        with self.transaction():
+            return self._insert("reservations", reservation)
+
+    def update_reservation(self, reservation_id: str, **changes) -> Reservation:
+        return self._update("reservations", reservation_id, changes)
+
+    # -- Queries --------------------------------------------------------------
+
+    def generation(self, *tables: str) -> tuple:
+        """Current generation of each given table; changes whenever one is mutated."""
+        with self._lock:
+            return tuple(self.generations[table] for table in tables)
+
+    def get_book(self, book_id: str):
+        return self._fetch_one("SELECT * FROM books WHERE id = ?", [book_id], "books")
+
+    def get_member(self, member_id: str):
+        return self._fetch_one("SELECT * FROM members WHERE id = ?", [member_id], "members")
+
+    def get_checkout(self, checkout_id: str):
+        return self._fetch_one(
+            "SELECT * FROM checkouts WHERE id = ?", [checkout_id], "checkouts"
+        )
+
+    def get_reservation(self, reservation_id: str):
+        return self._fetch_one(
+            "SELECT * FROM reservations WHERE id = ?", [reservation_id], "reservations"
+        )
+
+    def all_books(self) -> list:
+        return self._fetch_all("SELECT * FROM books ORDER BY rowid", [], "books")
+
+    def available_books(self) -> list:
+        return self._fetch_all(
+            "SELECT * FROM books WHERE copies_available > 0 ORDER BY rowid", [], "books"
+        )
+
+    def resolve_category(self, category: str) -> Optional[tuple]:
+        """
+        (name, slug) of the category given by its slug, its exact name or,
+        failing those, its name in any (ASCII) case; None if there is no such category.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                """SELECT category, category_slug FROM books WHERE category_slug IN (?, ?)
+                   ORDER BY category_slug = ? DESC LIMIT 1""",
+                [category, category.lower(), category],
+            ).fetchone()
+            if row is None:
+                # Served by idx_books_category; an exact-case match wins
+                row = self._conn.execute(
+                    """SELECT category, category_slug FROM books WHERE category = ? COLLATE NOCASE
+                       ORDER BY category = ? DESC, rowid LIMIT 1""",
+                    [category, category],
+                ).fetchone()
+        return (row["category"], row["category_slug"]) if row else None
+
+    def books_in_category(self, category: str) -> list:
+        """Books in category, given as for resolve_category."""
+        resolved = self.resolve_category(category)
+        if resolved is None:
+            return []
+        return self._fetch_all(
+            "SELECT * FROM books WHERE category_slug = ? ORDER BY rowid", [resolved[1]], "books"
+        )
+
+    def category_partitions(self) -> list:
+        """Name, slug and book counts of every category, in first-seen order."""
+        # Slugs are derived from the exact name, so each group has a single slug
+        return self._fetch_all(
+            """SELECT category AS name, category_slug AS slug, MIN(rowid) AS first_rowid,
+                      COUNT(*) AS book_count,
+                      SUM(copies_available > 0) AS available_count
+               FROM books GROUP BY category ORDER BY first_rowid""",
+            [],
+        )
+
+    def all_members(self) -> list:
+        return self._fetch_all("SELECT * FROM members ORDER BY rowid", [], "members")
+
+    def checkouts_for_member(self, member_id: str, active_only: bool = True) -> list:
+        query = "SELECT * FROM checkouts WHERE member_id = ?"
+        if active_only:
+            query += " AND status = 'active'"
+        return self._fetch_all(query + " ORDER BY rowid", [member_id], "checkouts")
+
+    def reservations_for_book(self, book_id: str, active_only: bool = True) -> list:
+        """Reservations on a book in priority order."""
+        query = "SELECT * FROM reservations WHERE book_id = ?"
+        if active_only:
+            query += " AND status = 'active'"
+        return self._fetch_all(query + " ORDER BY priority, id", [book_id], "reservations")
+
+    def active_checkouts_by_member(self) -> dict:
+        """Map member_id to the titles and dates of that member's active checkouts."""
+        rows = self._fetch_all(
+            """SELECT c.member_id, b.title AS book_title, c.checkout_date, c.due_date
+               FROM checkouts c JOIN books b ON b.id = c.book_id
+               WHERE c.status = 'active'
+               ORDER BY c.member_id, c.rowid""",
+            [],
+        )
+        result = {member.id: [] for member in self.all_members()}
+        for row in rows:
+            result.setdefault(row.pop("member_id"), []).append(row)
+        return result
+
+    def overdue_summary(self, moment: datetime) -> dict:
+        """Count of active checkouts due before moment and their total whole days overdue."""
+        with self._lock:
+            row = self._conn.execute(
+                """SELECT COUNT(*) AS count,
+                          COALESCE(SUM(
+                              (CAST(strftime('%s', :now) AS INTEGER)
+                               - CAST(strftime('%s', due_date) AS INTEGER)) / 86400
+                          ), 0) AS total_days_overdue
+                   FROM checkouts
+                   WHERE status = 'active' AND due_date < :now""",
+                {"now": format_timestamp(moment)},
+            ).fetchone()
+        return dict(row)
+
+    def overdue_checkouts(self, moment: datetime, limit: int = None, offset: int = 0) -> list:
+        """
+        Active checkouts due before moment, earliest first, joined with their
+        book and member. Only the requested page is materialized.
+        """
+        return self._fetch_all(
+            """SELECT b.title AS book_title, b.id AS book_id,
+                      m.name AS member_name, m.email AS member_email,
+                      c.checkout_date, c.due_date
+               FROM checkouts c
+               JOIN books b ON b.id = c.book_id
+               JOIN members m ON m.id = c.member_id
+               WHERE c.status = 'active' AND c.due_date < ?
+               ORDER BY c.due_date, c.id
+               LIMIT ? OFFSET ?""",
+            [format_timestamp(moment), -1 if limit is None else limit, offset],
+        )
+
+    def statistics(self, verify: bool = False) -> dict:
+        """Raw collection, member and circulation counts for library://stats."""
+        with self._lock:
+            counts = self.stats.as_dict()
+            if verify:
+                verify_statistics(counts, self._aggregate_statistics())
+            return counts
+
+    # -- Helpers --------------------------------------------------------------
+
+    def _aggregate_statistics(self) -> dict:
+        """Compute the library://stats counts with aggregate queries."""
+        with self._lock:
+            totals = self._conn.execute(
+                """SELECT
+                       (SELECT COUNT(*) FROM books) AS total_titles,
+                       (SELECT COALESCE(SUM(copies_total), 0) FROM books) AS total_copies,
+                       (SELECT COALESCE(SUM(copies_available), 0) FROM books) AS available_copies,
+                       (SELECT COUNT(*) FROM members) AS total_members,
+                       (SELECT COUNT(*) FROM members WHERE status = 'active') AS active_members,
+                       (SELECT COUNT(*) FROM checkouts WHERE status = 'active') AS active_checkouts,
+                       (SELECT COUNT(*) FROM reservations WHERE status = 'active') AS active_reservations"""
+            ).fetchone()
+            categories = self._conn.execute(
+                """SELECT category, COUNT(*) AS count,
+                          SUM(copies_available > 0) AS available
+                   FROM books GROUP BY category ORDER BY MIN(rowid)"""
+            ).fetchall()
+            member_types = self._conn.execute(
+                """SELECT member_type, COUNT(*) AS count
+                   FROM members GROUP BY member_type ORDER BY MIN(rowid)"""
+            ).fetchall()
+
+        result = dict(totals)
+        result["categories"] = {
+            row["category"]: {"count": row["count"], "available": row["available"]}
+            for row in categories
+        }
+        result["member_types"] = {row["member_type"]: row["count"] for row in member_types}
+        return result
+
+    def _insert(self, table: str, record) -> Record:
+        record = RECORD_TYPES[table].from_dict(record)
+        encoded = self._encode(table, record.fields())
+        columns = ", ".join(encoded)
+        placeholders = ", ".join("?" * len(encoded))
+        self._conn.execute(
+            f"INSERT INTO {table} ({columns}) VALUES ({placeholders})", list(encoded.values())
+        )
+        self.stats.add(table, record)
+        self._bump(table)
+        return record
+
+    def _update(self, table: str, record_id: str, changes: dict) -> Record:
+        changes = RECORD_TYPES[table].coerce(changes)
+        with self.transaction():
+            # Inside the transaction, so derived values see a consistent table
+            changes = self._encode(table, changes)
+            before = self._fetch_one(f"SELECT * FROM {table} WHERE id = ?", [record_id], table)
+            if changes:
+                assignments = ", ".join(f"{column} = ?" for column in changes)
+                cursor = self._conn.execute(
+                    f"UPDATE {table} SET {assignments} WHERE id = ?",
+                    [*changes.values(), record_id],
+                )
+                if cursor.rowcount == 0:
+                    raise KeyError(record_id)
+            record = self._fetch_one(f"SELECT * FROM {table} WHERE id = ?", [record_id], table)
+            if record is None:
+                raise KeyError(record_id)
+            self.stats.remove(table, before)
+            self.stats.add(table, record)
+            self._bump(table)
+            return record
+
+    def _bump(self, table: str) -> None:
+        self.generations[table] += 1
+        self.last_modified = datetime.now()
+        for listener in self.listeners:
+            listener(table)
+
+    def _slug_for_category(self, category: str) -> str:
+        """The category's slug, numbering a new one past the slugs already in use."""
+        with self._lock:
+            rows = self._conn.execute(
+                """SELECT category, category_slug FROM books
+                   WHERE category = ? COLLATE NOCASE AND category_slug IS NOT NULL""",
+                [category],
+            ).fetchall()
+            for row in rows:
+                if row["category"] == category:
+                    return row["category_slug"]
+            base = category_slug(category)
+            taken = {
+                row[0]
+                for row in self._conn.execute(
+                    "SELECT DISTINCT category_slug FROM books WHERE category_slug GLOB ?",
+                    [base + "*"],
+                )
+            }
+        return unique_category_slug(category, taken)
+
+    def _assign_category_slugs(self) -> None:
+        """Give every category whose books have no slug yet one, in first-seen order."""
+        with self.transaction():
+            categories = self._conn.execute(
+                """SELECT category FROM books WHERE category_slug IS NULL
+                   GROUP BY category ORDER BY MIN(rowid)"""
+            ).fetchall()
+            for (category,) in categories:
+                self._conn.execute(
+                    "UPDATE books SET category_slug = ? WHERE category = ? AND category_slug IS NULL",
+                    [self._slug_for_category(category), category],
+                )
+
+    def _encode(self, table: str, values: dict) -> dict:
+        """Column values for coerced record fields."""
+        json_columns = JSON_COLUMNS.get(table, ())
+        encoded = {
+            column: json.dumps(value) if column in json_columns else value
+            for column, value in RECORD_TYPES[table].dump(values).items()
+        }
+        for column, (field, method) in DERIVED_COLUMNS.get(table, {}).items():
+            if field in values:
+                encoded[column] = getattr(self, method)(values[field])
+        return encoded
+
+    def _decode(self, row: sqlite3.Row, table: str = None):
+        """A record of the table's type, or a dict with parsed timestamps for joined rows."""
+        values = dict(row)
+        if table is None:
+            for column in TIMESTAMP_COLUMNS.intersection(values):
+                if values[column] is not None:
+                    values[column] = parse_timestamp(values[column])
+            return values
+        for column in JSON_COLUMNS.get(table, ()):
+            if column in values:
+                values[column] = json.loads(values[column])
+        for column in DERIVED_COLUMNS.get(table, ()):
+            values.pop(column, None)
+        return RECORD_TYPES[table].from_dict(values)
+
+    def _fetch_one(self, query: str, params: list, table: str = None):
+        with self._lock:
+            row = self._conn.execute(query, params).fetchone()
+        return self._decode(row, table) if row else None
+
+    def _fetch_all(self, query: str, params: list, table: str = None) -> list:
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [self._decode(row, table) for row in rows]
+
+
+def open_store(backend: str = None):
+    """Create the library store for the configured backend."""
+    backend = backend or LIBRARY_BACKEND
+    if backend == "sqlite":
+        return SQLiteLibraryStore(LIBRARY_DB, seed=LIBRARY_DATA)
+    if backend == "memory":
+        return LibraryStore(LIBRARY_DATA)
+    raise ValueError(f"Unknown library backend: {backend}")
+
+
+store = open_store()
+
+
+def utc_now() -> datetime:
+    """Current time at the one-second precision the library data uses."""
+    return datetime.now(timezone.utc).replace(microsecond=0)
+
+
+def new_record_id(prefix: str) -> str:
+    return f"{prefix}-{uuid.uuid4().hex[:12].upper()}"
+
+
+def require_record(record, kind: str, record_id: str):
+    if record is None:
+        raise ValueError(f"Unknown {kind}: {record_id}")
+    return record
+
+
+def require_active_member(library_store, member_id: str) -> Member:
+    member = require_record(library_store.get_member(member_id), "member", member_id)
+    if member.status != "active":
+        raise ValueError(f"Member {member_id} is {member.status}")
+    return member
+
+
+def close_reservation(library_store, reservation: Reservation, status: str) -> None:
+    """End a reservation and move everyone queued behind it up one place."""
+    for other in library_store.reservations_for_book(reservation.book_id):
+        if other.priority > reservation.priority:
+            library_store.update_reservation(other.id, priority=other.priority - 1)
+    library_store.update_reservation(reservation.id, status=status)
+
+
+def perform_checkout(library_store, book_id: str, member_id: str, now: datetime = None) -> Checkout:
+    """
+    Lend a copy of a book to a member.
+
+    Copies are held for the earliest active reservations, so a member can
+    only take a copy that is not held for someone ahead of them; the
+    member's own reservation is fulfilled by the checkout.
+    """
+    now = now or utc_now()
+    with library_store.transaction():
+        book = require_record(library_store.get_book(book_id), "book", book_id)
+        member = require_active_member(library_store, member_id)
+        if len(member.books_checked_out) >= member.max_books:
+            raise ValueError(f"Member {member_id} already has {member.max_books} books checked out")
+
+        queue = library_store.reservations_for_book(book_id)
+        position = next((i for i, r in enumerate(queue) if r.member_id == member_id), None)
+        held = len(queue) if position is None else position
+        if book.copies_available <= held:
+            raise ValueError(f"No copy of {book_id} is available to member {member_id}")
+        if position is not None:
+            close_reservation(library_store, queue[position], "fulfilled")
+
+        copies_available = book.copies_available - 1
+        library_store.update_book(
+            book_id,
+            copies_available=copies_available,
+            status="available" if copies_available else "checked_out",
+            last_updated=now,
+        )
+        library_store.update_member(
+            member_id, books_checked_out=[*member.books_checked_out, book_id]
+        )
+        return library_store.add_checkout(
+            {
+                "id": new_record_id("CO"),
+                "book_id": book_id,
+                "member_id": member_id,
+                "checkout_date": now,
+                "due_date": now + timedelta(days=LOAN_PERIOD_DAYS),
+                "return_date": None,
+                "status": "active",
+                "renewal_count": 0,
+            }
+        )
+
+
+def perform_return(library_store, checkout_id: str, now: datetime = None) -> dict:
+    """Check a book back in; returns the closed checkout and any fine owed."""
+    now = now or utc_now()
+    with library_store.transaction():
+        checkout = require_record(library_store.get_checkout(checkout_id), "checkout", checkout_id)
+        if checkout.status != "active":
+            raise ValueError(f"Checkout {checkout_id} is {checkout.status}")
+        book = require_record(library_store.get_book(checkout.book_id), "book", checkout.book_id)
+        member = require_record(
+            library_store.get_member(checkout.member_id), "member", checkout.member_id
+        )
+
+        library_store.update_book(
+            book.id,
+            copies_available=min(book.copies_available + 1, book.copies_total),
+            status="available",
+            last_updated=now,
+        )
+        books_checked_out = list(member.books_checked_out)
+        if book.id in books_checked_out:
+            books_checked_out.remove(book.id)
+        library_store.update_member(member.id, books_checked_out=books_checked_out)
+        checkout = library_store.update_checkout(checkout_id, status="returned", return_date=now)
+
+        days_overdue = max((now - checkout.due_date).days, 0)
+        return {"checkout": checkout, "days_overdue": days_overdue, "fine_amount": days_overdue * FINE_PER_DAY}
+
+
+def perform_renewal(library_store, checkout_id: str, now: datetime = None) -> Checkout:
+    """Extend an active checkout unless it hit MAX_RENEWALS or others are waiting for the book."""
+    now = now or utc_now()
+    with library_store.transaction():
+        checkout = require_record(library_store.get_checkout(checkout_id), "checkout", checkout_id)
+        if checkout.status != "active":
+            raise ValueError(f"Checkout {checkout_id} is {checkout.status}")
+        if checkout.renewal_count >= MAX_RENEWALS:
+            raise ValueError(f"Checkout {checkout_id} was already renewed {MAX_RENEWALS} times")
+        if any(r.member_id != checkout.member_id for r in library_store.reservations_for_book(checkout.book_id)):
+            raise ValueError(f"Book {checkout.book_id} is reserved by another member")
+
+        return library_store.update_checkout(
+            checkout_id,
+            due_date=max(checkout.due_date, now) + timedelta(days=LOAN_PERIOD_DAYS),
+            renewal_count=checkout.renewal_count + 1,
+        )
+
+
+def perform_reservation(library_store, book_id: str, member_id: str, now: datetime = None) -> Reservation:
+    """Queue a member for a book, behind every existing active reservation."""
+    now = now or utc_now()
+    with library_store.transaction():
+        require_record(library_store.get_book(book_id), "book", book_id)
+        require_active_member(library_store, member_id)
+        queue = library_store.reservations_for_book(book_id)
+        if any(r.member_id == member_id for r in queue):
+            raise ValueError(f"Member {member_id} already has a reservation for {book_id}")
+
+        return library_store.add_reservation(
+            {
+                "id": new_record_id("R"),
+                "book_id": book_id,
+                "member_id": member_id,
+                "reservation_date": now,
+                "status": "active",
+                "priority": max((r.priority for r in queue), default=0) + 1,
+            }
+        )
+
+
+# Circulation operations by bulk event action, with the event fields each takes
+CIRCULATION_ACTIONS = {
+    "checkout": (perform_checkout, ("book_id", "member_id")),
+    "return": (perform_return, ("checkout_id",)),
+    "renew": (perform_renewal, ("checkout_id",)),
+    "reserve": (perform_reservation, ("book_id", "member_id")),
+}
+
+
+def apply_circulation_event(library_store, event: dict):
+    """Apply one {"action": ..., ...fields, "timestamp"?: ISO time, UTC without an offset} event."""
+    action = event.get("action")
+    if action not in CIRCULATION_ACTIONS:
+        raise ValueError(f"Unknown action: {action!r}")
+    operation, names = CIRCULATION_ACTIONS[action]
+    unknown = set(event) - set(names) - {"action", "timestamp"}
+    if unknown:
+        raise ValueError(f"Unexpected fields for {action}: {', '.join(sorted(unknown))}")
+    missing = [name for name in names if not event.get(name)]
+    if missing:
+        raise ValueError(f"Missing fields for {action}: {', '.join(missing)}")
+    now = parse_timestamp(event["timestamp"]) if event.get("timestamp") else None
+    return operation(library_store, *(event[name] for name in names), now=now)
+
+
+def apply_circulation_events(library_store, events: list, atomic: bool = True) -> dict:
+    """
+    Apply many circulation events in order.
+
+    Args:
+        library_store: Store to mutate.
+        events: Event dicts as taken by apply_circulation_event.
+        atomic: Apply everything in one transaction and roll all of it back
+            on the first failure; otherwise each event commits on its own
+            and failures are reported per event.
+
+    Returns:
+        Counts of applied and failed events, the id of the record each
+        applied event created or changed, and the errors.
+    """
+    if len(events) > MAX_BULK_EVENTS:
+        raise ValueError(f"At most {MAX_BULK_EVENTS} events can be applied at once")
+
+    applied = []
+    errors = []
+
+    def apply(index: int, event: dict) -> None:
+        result = apply_circulation_event(library_store, event)
+        record = result["checkout"] if isinstance(result, dict) else result
+        applied.append({"index": index, "action": event["action"], "id": record.id})
+
+    if atomic:
+        with library_store.transaction():
+            for index, event in enumerate(events):
+                try:
+                    apply(index, event)
+                except (ValueError, KeyError, TypeError) as e:
+                    raise ValueError(
+                        f"Event {index} ({event.get('action')}) failed, no events were applied: {e}"
+                    ) from e
+    else:
+        for index, event in enumerate(events):
+            try:
+                apply(index, event)
+            except (ValueError, KeyError, TypeError) as e:
+                errors.append({"index": index, "action": event.get("action"), "error": str(e)})
+
+    return {"applied": len(applied), "failed": len(errors), "results": applied, "errors": errors}
+
+
+class ResponseCache:
+    """
+    Serialized resource payloads keyed on the generations of the tables they
+    read. An entry is reused until one of those tables is mutated, so
+    unchanged data is never re-serialized. Each payload carries an ETag
+    (content hash) that clients can compare to skip unchanged reads.
+    """
+
+    def __init__(self, max_size: int = 1024):
+        self.max_size = max_size
+        self._entries = {}  # uri -> (store, generation, compact, body, etag)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, uri: str, tables: tuple, build) -> tuple:
+        """
+        Return (body, etag) for uri, calling build() to serialize it only when
+        the cached entry is missing or stale.
+        """
+        generation = store.generation(*tables)
+        compact = json_codec.COMPACT_JSON
+        with self._lock:
+            entry = self._entries.get(uri)
+            if entry and entry[0] is store and entry[1:3] == (generation, compact):
+                self.hits += 1
+                return entry[3], entry[4]
+            self.misses += 1
+
+        body = build()
+        etag = make_etag(body)
+        # Don't cache a payload the data moved under while it was being built
+        if store.generation(*tables) == generation:
+            with self._lock:
+                if uri not in self._entries and len(self._entries) >= self.max_size:
+                    self._entries.pop(next(iter(self._entries)))
+                self._entries[uri] = (store, generation, compact, body, etag)
+        return body, etag
+
+    def etags(self) -> dict:
+        """ETags of the cached payloads that are still current."""
+        with self._lock:
+            entries = list(self._entries.items())
+        return {
+            uri: etag
+            for uri, (owner, generation, compact, _, etag) in entries
+            if owner is store
+            and compact == json_codec.COMPACT_JSON
+            and generation == store.generation(*RESOURCE_TABLES[resource_kind(uri)])
+        }
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+# Tables each resource reads, by resource kind; keys both the response
+# cache and the change notifications sent to subscribers
+RESOURCE_TABLES = {
+    "catalog": ("books",),
+    "available": ("books",),
+    "category": ("books",),
+    "categories": ("books",),
+    "members": ("books", "members", "checkouts"),
+    "overdue": ("books", "members", "checkouts"),
+    "stats": LIBRARY_TABLES,
+    "versions": LIBRARY_TABLES,
+}
+
+response_cache = ResponseCache()
+
+
+def make_etag(body: str) -> str:
+    """Content hash of a serialized payload."""
+    return '"' + hashlib.sha256(body.encode("utf-8")).hexdigest()[:32] + '"'
+
+
+def resource_kind(uri: str) -> str:
+    """Resource kind of a library:// URI, e.g. "category" for library://category/Design."""
+    return uri[len("library://"):].split("/", 1)[0]
+
+
+def resource_tables(uri: str) -> tuple:
+    """
+    Tables a subscribed URI depends on: none outside library://, and every
+    library table for a library:// kind missing from RESOURCE_TABLES.
+    """
+    if not uri.startswith("library://"):
+        return ()
+    return RESOURCE_TABLES.get(resource_kind(uri), LIBRARY_TABLES)
+
+
+def cached_resource(uri: str, build) -> tuple:
+    """Serialized payload and ETag for uri, rebuilt only when its tables change."""
+    return response_cache.get(uri, RESOURCE_TABLES[resource_kind(uri)], build)
+
+
+def not_modified(uri: str, etag: str) -> str:
+    """Response for a conditional read whose ETag still matches."""
+    return dumps({"uri": uri, "etag": etag, "not_modified": True})
+
+
+def conditional_read(uri: str, build, if_none_match: str) -> str:
+    """Serve uri unless the client's ETag (quoted or bare) is still current."""
+    body, etag = cached_resource(uri, build)
+    if if_none_match.strip('"') == etag.strip('"'):
+        return not_modified(uri, etag)
+    return body
+
+
+class ResourceSubscriptions:
+    """
+    Clients subscribed to library:// resources, notified when data they
+    depend on changes.
+
+    Stores report each mutated table through their listeners. Changes are
+    collected for NOTIFY_COALESCE_SECONDS and then one resource-updated
+    notification is sent per affected subscribed URI, so a burst of
+    mutations costs each subscriber a single re-read.
+    """
+
+    def __init__(self, coalesce_seconds: float = NOTIFY_COALESCE_SECONDS):
+        self.coalesce_seconds = coalesce_seconds
+        self._subscribers = defaultdict(set)  # uri -> {session}
+        self._dirty_tables = set()
+        self._flush_pending = False
+        self._flush_tasks = set()  # The loop only keeps weak references to tasks
+        self._loop = None
+        self._lock = threading.Lock()
+        self.changes = 0
+        self.notifications = 0
+
+    def watch(self, library_store) -> None:
+        """Route a store's mutations to subscribers."""
+        library_store.listeners.append(self.table_changed)
+
+    def subscribe(self, uri: str, session) -> None:
+        with self._lock:
+            self._subscribers[uri].add(session)
+            self._loop = asyncio.get_running_loop()
+
+    def unsubscribe(self, uri: str, session) -> None:
+        with self._lock:
+            self._subscribers[uri].discard(session)
+            if not self._subscribers[uri]:
+                del self._subscribers[uri]
+
+    def table_changed(self, table: str) -> None:
+        """Record a mutation; safe to call from any thread."""
+        with self._lock:
+            if not self._subscribers or self._loop is None:
+                return
+            self.changes += 1
+            self._dirty_tables.add(table)
+            if self._flush_pending:
+                return
+            self._flush_pending = True
+            loop = self._loop
+        try:
+            loop.call_soon_threadsafe(
+                loop.call_later, self.coalesce_seconds, self._start_flush
+            )
+        except RuntimeError:
+            # The event loop has shut down; nobody is left to notify
+            with self._lock:
+                self._flush_pending = False
+
+    def affected(self, tables: set) -> dict:
+        """Subscribed URIs that read any of tables, with their sessions."""
+        with self._lock:
+            return {
+                uri: set(sessions)
+                for uri, sessions in self._subscribers.items()
+                if tables.intersection(resource_tables(uri))
+            }
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "subscribed_uris": len(self._subscribers),
+                "changes": self.changes,
+                "notifications": self.notifications,
+            }
+
+    def _start_flush(self) -> None:
+        task = self._loop.create_task(self.flush())
+        self._flush_tasks.add(task)
+        task.add_done_callback(self._flush_tasks.discard)
+
+    async def flush(self) -> None:
+        """Notify subscribers of every resource touched since the last flush."""
+        with self._lock:
+            tables = self._dirty_tables
+            self._dirty_tables = set()
+            self._flush_pending = False
+
+        for uri, sessions in self.affected(tables).items():
+            for session in sessions:
+                try:
+                    await session.send_resource_updated(uri)
+                    self.notifications += 1
+                except Exception:
+                    # The client went away; stop notifying it
+                    self.unsubscribe(uri, session)
+
+
+subscriptions = ResourceSubscriptions()
+subscriptions.watch(store)
+
+
+@mcp._mcp_server.subscribe_resource()
+async def subscribe_resource(uri) -> None:
+    subscriptions.subscribe(str(uri), mcp._mcp_server.request_context.session)
+
+
+@mcp._mcp_server.unsubscribe_resource()
+async def unsubscribe_resource(uri) -> None:
+    subscriptions.unsubscribe(str(uri), mcp._mcp_server.request_context.session)
+
+
+def _get_capabilities(notification_options, experimental_capabilities):
+    """Advertise resource subscriptions, which FastMCP always reports as unsupported."""
+    capabilities = type(mcp._mcp_server).get_capabilities(
+        mcp._mcp_server, notification_options, experimental_capabilities
+    )
+    if capabilities.resources is not None:
+        capabilities.resources.subscribe = True
+    return capabilities
+
+
+mcp._mcp_server.get_capabilities = _get_capabilities
+
+
+def build_catalog() -> str:
+    books = store.all_books()
+    catalog = {
+        "total_books": len(books),
+        "last_updated": store.last_modified.isoformat(),
+        "books": books,
+    }
+
+    return dumps(catalog)
+
+
+def build_available() -> str:
+    books = store.all_books()
+    available_books = store.available_books()
+
+    result = {
+        "available_count": len(available_books),
+        "total_books": len(books),
+        "availability_rate": f"{(len(available_books)/len(books)*100):.1f}%",
+        "books": available_books,
+    }
+
+    return dumps(result)
+
+
+def build_category(category: str) -> str:
+    filtered_books = store.books_in_category(category)
+
+    result = {
+        # Report the category's own name whether it was asked for by name or slug
+        "category": filtered_books[0].category if filtered_books else category,
+        "book_count": len(filtered_books),
+        "books": filtered_books,
+    }
+
+    return dumps(result)
+
+
 @mcp.resource("library://catalog")
 def get_full_catalog() -> str:
     """
     Returns the complete library catalog with all books and their detailed information.
     """
     try:
-        books = LIBRARY_DATA["books"]
-        catalog = {
-            "total_books": len(books),
-            "last_updated": datetime.now().isoformat(),
-            "books": books,
-        }
+        body, _ = cached_resource("library://catalog", build_catalog)
 
-        return json.dumps(catalog, indent=2)
+        return body
 
     except Exception as e:
 
-        return json.dumps({"error": str(e)})
+        return dumps({"error": str(e)})
+
+
+@mcp.resource("library://catalog/if-none-match/{etag}")
+def get_full_catalog_if_changed(etag: str) -> str:
+    """
+    Returns the catalog, or a small not_modified marker if etag is still current.
+    """
+    try:
+        return conditional_read("library://catalog", build_catalog, etag)
+
+    except Exception as e:
+
+        return dumps({"error": str(e)})
 
 
 @mcp.resource("library://available")
@@ -137,45 +1864,130 @@ def get_available_books() -> str:
     Returns only books that are currently available for checkout.
     """
     try:
-        books = LIBRARY_DATA["books"]
-        available_books = [book for book in books if book["copies_available"] > 0]
+        body, _ = cached_resource("library://available", build_available)
 
-        result = {
-            "available_count": len(available_books),
-            "total_books": len(books),
-            "availability_rate": f"{(len(available_books)/len(books)*100):.1f}%",
-            "books": available_books,
-        }
+        return body
+
+    except Exception as e:
 
-        return json.dumps(result, indent=2)
+        return dumps({"error": str(e)})
+
+
+@mcp.resource("library://available/if-none-match/{etag}")
+def get_available_books_if_changed(etag: str) -> str:
+    """
+    Returns the available books, or a small not_modified marker if etag is still current.
+    """
+    try:
+        return conditional_read("library://available", build_available, etag)
 
     except Exception as e:
 
-        return json.dumps({"error": str(e)})
+        return dumps({"error": str(e)})
+
+
+def category_resource(category: str) -> tuple:
+    """
+    Canonical library://category/{slug} URI and builder for a category given
+    by slug or name; the URI is None for an unknown category, which is not cached.
+    """
+    resolved = store.resolve_category(category)
+    if resolved is None:
+        return None, lambda: build_category(category)
+    slug = resolved[1]
+    return f"library://category/{slug}", lambda: build_category(slug)
 
 
 @mcp.resource("library://category/{category}")
 def get_books_by_category(category: str) -> str:
     """
-    Returns books filtered by category (e.g., Computer Science, Design, etc.).
+    Returns books filtered by category, given by slug or name in any case
+    (e.g., computer-science, Design). See library://categories for all slugs.
     """
     try:
-        books = LIBRARY_DATA["books"]
-        filtered_books = [
-            book for book in books if book["category"].lower() == category.lower()
-        ]
+        uri, build = category_resource(category)
+        if uri is None:
+            return build()
+        body, _ = cached_resource(uri, build)
+
+        return body
+
+    except Exception as e:
+
+        return dumps({"error": str(e)})
+
+
+@mcp.resource("library://category/{category}/if-none-match/{etag}")
+def get_books_by_category_if_changed(category: str, etag: str) -> str:
+    """
+    Returns books in a category, or a small not_modified marker if etag is still current.
+    """
+    try:
+        uri, build = category_resource(category)
+        if uri is None:
+            return build()
+        return conditional_read(uri, build, etag)
+
+    except Exception as e:
+
+        return dumps({"error": str(e)})
+
+
+def build_categories() -> str:
+    categories = []
+    for partition in store.category_partitions():
+        categories.append(
+            {
+                "name": partition["name"],
+                "slug": partition["slug"],
+                "uri": f"library://category/{partition['slug']}",
+                "book_count": partition["book_count"],
+                "available_count": partition["available_count"],
+            }
+        )
+
+    return dumps({"category_count": len(categories), "categories": categories})
+
+
+@mcp.resource("library://categories")
+def get_categories() -> str:
+    """
+    Returns every category with its slug, resource URI and book counts.
+    """
+    try:
+        body, _ = cached_resource("library://categories", build_categories)
+
+        return body
+
+    except Exception as e:
+
+        return dumps({"error": str(e)})
+
+
+@mcp.resource("library://versions")
+def get_resource_versions() -> str:
+    """
+    Returns table generations and the ETags of cached resources, so clients
+    can tell whether a payload changed without re-reading it.
+    """
+    try:
+        # Make sure the heaviest resources always have a current ETag listed
+        cached_resource("library://catalog", build_catalog)
+        cached_resource("library://available", build_available)
 
         result = {
-            "category": category,
-            "book_count": len(filtered_books),
-            "books": filtered_books,
+            "generations": dict(zip(LIBRARY_TABLES, store.generation(*LIBRARY_TABLES))),
+            "last_modified": store.last_modified.isoformat(),
+            "etags": response_cache.etags(),
+            "cache": response_cache.stats(),
+            "subscriptions": subscriptions.stats(),
         }
 
-        return json.dumps(result, indent=2)
+        return dumps(result)
 
     except Exception as e:
 
-        return json.dumps({"error": str(e)})
+        return dumps({"error": str(e)})
 
 
 @mcp.resource("library://members")
@@ -184,57 +1996,69 @@ def get_member_information() -> str:
     Returns information about library members and their current checkouts.
     """
     try:
-        members = LIBRARY_DATA["members"]
-        checkouts = LIBRARY_DATA["checkouts"]
+        members = store.all_members()
+        checkouts_by_member = store.active_checkouts_by_member()
         current_time = datetime.now(timezone.utc)
 
         # Enhance member data with checkout details
         enhanced_members = []
         for member in members:
-            member_copy = member.copy()
+            # Timestamps stay datetimes until the response is encoded
+            member_entry = member.fields()
             member_books = []
 
-            for checkout in checkouts:
-                if (
-                    checkout["member_id"] == member["id"]
-                    and checkout["status"] == "active"
-                ):
-                    book = next(
-                        (
-                            b
-                            for b in LIBRARY_DATA["books"]
-                            if b["id"] == checkout["book_id"]
-                        ),
-                        None,
-                    )
-                    if book:
-                        due_date = datetime.fromisoformat(
-                            checkout["due_date"].replace("Z", "+00:00")
-                        )
-                        member_books.append(
-                            {
-                                "book_title": book["title"],
-                                "checkout_date": checkout["checkout_date"],
-                                "due_date": checkout["due_date"],
-                                "is_overdue": due_date < current_time,
-                            }
-                        )
+            for checkout in checkouts_by_member.get(member.id, []):
+                member_books.append(
+                    {
+                        "book_title": checkout["book_title"],
+                        "checkout_date": checkout["checkout_date"],
+                        "due_date": checkout["due_date"],
+                        "is_overdue": checkout["due_date"] < current_time,
+                    }
+                )
 
-            member_copy["current_checkouts"] = member_books
-            member_copy["books_checked_out_count"] = len(member_books)
-            enhanced_members.append(member_copy)
+            member_entry["current_checkouts"] = member_books
+            member_entry["books_checked_out_count"] = len(member_books)
+            enhanced_members.append(member_entry)
 
         result = {
             "total_members": len(members),
-            "active_members": len([m for m in members if m["status"] == "active"]),
+            "active_members": len([m for m in members if m.status == "active"]),
             "members": enhanced_members,
         }
 
-        return json.dumps(result, indent=2)
+        return dumps(result)
 
     except Exception as e:
 
-        return json.dumps({"error": str(e)})
+        return dumps({"error": str(e)})
+
+
+def overdue_report(limit: int = None, offset: int = 0) -> dict:
+    """
+    Build the overdue report from the store's due-date index.
+
+    Totals come from the store's overdue summary (running totals in memory);
+    days overdue and fines are only computed for the rows on the requested page.
+    """
+    # Use timezone-aware current time to match the data format
+    current_time = datetime.now(timezone.utc)
+    summary = store.overdue_summary(current_time)
+
+    overdue_items = []
+
+    # Book and member details come joined from the store
+    for item in store.overdue_checkouts(current_time, limit, offset):
+        days_overdue = (current_time - item["due_date"]).days
+        item["days_overdue"] = days_overdue
+        item["fine_amount"] = days_overdue * FINE_PER_DAY
+        overdue_items.append(item)
+
+    return {
+        "overdue_count": summary["count"],
+        "total_fine_amount": summary["total_days_overdue"] * FINE_PER_DAY,
+        "overdue_items": overdue_items,
+    }
 
 
 @mcp.resource("library://overdue")
@@ -243,64 +2067,30 @@ def get_overdue_books() -> str:
     Returns information about overdue books and members.
     """
     try:
-        from datetime import timezone
+        result = overdue_report()
 
-        checkouts = LIBRARY_DATA["checkouts"]
-        # Use timezone-aware current time to match the data format
-        current_time = datetime.now(timezone.utc)
+        return dumps(result)
 
-        overdue_items = []
+    except Exception as e:
 
-        for checkout in checkouts:
-            if checkout["status"] == "active":
-                due_date = datetime.fromisoformat(
-                    checkout["due_date"].replace("Z", "+00:00")
-                )
-                if due_date < current_time:
-                    # Get book and member details
-                    book = next(
-                        (
-                            b
-                            for b in LIBRARY_DATA["books"]
-                            if b["id"] == checkout["book_id"]
-                        ),
-                        None,
-                    )
-                    member = next(
-                        (
-                            m
-                            for m in LIBRARY_DATA["members"]
-                            if m["id"] == checkout["member_id"]
-                        ),
-                        None,
-                    )
+        return dumps({"error": str(e)})
 
-                    if book and member:
-                        days_overdue = (current_time - due_date).days
-                        overdue_items.append(
-                            {
-                                "book_title": book["title"],
-                                "book_id": book["id"],
-                                "member_name": member["name"],
-                                "member_email": member["email"],
-                                "checkout_date": checkout["checkout_date"],
-                                "due_date": checkout["due_date"],
-                                "days_overdue": days_overdue,
-                                "fine_amount": days_overdue * 0.50,  # $0.50 per day
-                            }
-                        )
 
-        result = {
-            "overdue_count": len(overdue_items),
-            "total_fine_amount": sum(item["fine_amount"] for item in overdue_items),
-            "overdue_items": overdue_items,
-        }
+@mcp.resource("library://overdue/{limit}/{offset}")
+def get_overdue_books_page(limit: int, offset: int) -> str:
+    """
+    Returns one page of overdue books, most overdue first (e.g. library://overdue/20/40).
+    """
+    try:
+        result = overdue_report(max(0, limit), max(0, offset))
+        result["limit"] = limit
+        result["offset"] = offset
 
-        return json.dumps(result, indent=2)
+        return dumps(result)
 
     except Exception as e:
 
-        return json.dumps({"error": str(e)})
+        return dumps({"error": str(e)})
 
 
 @mcp.resource("library://stats")
@@ -309,81 +2099,128 @@ def get_library_statistics() -> str:
     Returns comprehensive library statistics and analytics.
     """
     try:
-        books = LIBRARY_DATA["books"]
-        members = LIBRARY_DATA["members"]
-        checkouts = LIBRARY_DATA["checkouts"]
-        reservations = LIBRARY_DATA["reservations"]
+        stats = store.statistics(verify=LIBRARY_STATS_VERIFY)
 
         # Calculate statistics
-        total_copies = sum(book["copies_total"] for book in books)
-        available_copies = sum(book["copies_available"] for book in books)
+        total_copies = stats["total_copies"]
+        available_copies = stats["available_copies"]
         checked_out_copies = total_copies - available_copies
 
-        # Category distribution
-        categories = {}
-        for book in books:
-            category = book["category"]
-            if category not in categories:
-                categories[category] = {"count": 0, "available": 0}
-            categories[category]["count"] += 1
-            if book["copies_available"] > 0:
-                categories[category]["available"] += 1
-
-        # Member type distribution
-        member_types = {}
-        for member in members:
-            member_type = member["member_type"]
-            member_types[member_type] = member_types.get(member_type, 0) + 1
-
         result = {
             "collection_stats": {
-                "total_titles": len(books),
+                "total_titles": stats["total_titles"],
                 "total_copies": total_copies,
                 "available_copies": available_copies,
                 "checked_out_copies": checked_out_copies,
                 "utilization_rate": f"{(checked_out_copies/total_copies*100):.1f}%",
             },
             "member_stats": {
-                "total_members": len(members),
-                "active_members": len([m for m in members if m["status"] == "active"]),
-                "member_types": member_types,
+                "total_members": stats["total_members"],
+                "active_members": stats["active_members"],
+                "member_types": stats["member_types"],
             },
             "circulation_stats": {
-                "active_checkouts": len(
-                    [c for c in checkouts if c["status"] == "active"]
-                ),
-                "active_reservations": len(
-                    [r for r in reservations if r["status"] == "active"]
-                ),
+                "active_checkouts": stats["active_checkouts"],
+                "active_reservations": stats["active_reservations"],
             },
-            "category_breakdown": categories,
+            "category_breakdown": stats["categories"],
             "generated_at": datetime.now().isoformat(),
         }
 
-        return json.dumps(result, indent=2)
+        return dumps(result)
 
     except Exception as e:
 
-        return json.dumps({"error": str(e)})
+        return dumps({"error": str(e)})
+
 
+@mcp.tool()
+def checkout_book(book_id: str, member_id: str) -> Dict[str, Any]:
+    """
+    Check out a copy of a book to a member.
+
+    Args:
+        book_id: Book to lend (e.g., "B001")
+        member_id: Borrowing member (e.g., "M002")
 
-@mcp.resource("library://category/computer-science")
-def get_computer_science_books() -> str:
-    """Returns books in Computer Science category."""
-    return get_books_by_category("Computer Science")
+    Returns:
+        The new checkout, with its due date
+    """
+    return perform_checkout(store, book_id, member_id).to_dict()
 
 
-@mcp.resource("library://category/software-engineering")
-def get_software_engineering_books() -> str:
-    """Returns books in Software Engineering category."""
-    return get_books_by_category("Software Engineering")
+@mcp.tool()
+def return_book(checkout_id: str) -> Dict[str, Any]:
+    """
+    Return a checked-out book.
+
+    Args:
+        checkout_id: Active checkout to close (e.g., "CO001")
+
+    Returns:
+        The closed checkout, days overdue and the fine owed
+    """
+    result = perform_return(store, checkout_id)
+    result["checkout"] = result["checkout"].to_dict()
+    return result
+
+
+@mcp.tool()
+def renew_checkout(checkout_id: str) -> Dict[str, Any]:
+    """
+    Extend the due date of an active checkout.
+
+    Args:
+        checkout_id: Active checkout to renew (e.g., "CO001")
+
+    Returns:
+        The renewed checkout
+    """
+    return perform_renewal(store, checkout_id).to_dict()
+
+
+@mcp.tool()
+def reserve_book(book_id: str, member_id: str) -> Dict[str, Any]:
+    """
+    Join the reservation queue for a book.
+
+    Args:
+        book_id: Book to reserve (e.g., "B002")
+        member_id: Reserving member (e.g., "M002")
+
+    Returns:
+        The new reservation, with its place in the queue as priority
+    """
+    return perform_reservation(store, book_id, member_id).to_dict()
+
+
+@mcp.tool()
+def apply_circulation_batch(events: List[Dict[str, Any]], atomic: bool = True) -> Dict[str, Any]:
+    """
+    Apply many checkouts, returns, renewals and reservations in one call.
+
+    Args:
+        events: Events applied in order, each with an "action" of "checkout"
+            (book_id, member_id), "return" (checkout_id), "renew"
+            (checkout_id) or "reserve" (book_id, member_id), and an optional
+            ISO "timestamp" for when it happened
+        atomic: All-or-nothing in one transaction (default); when false each
+            event commits on its own and failures are reported per event
+
+    Returns:
+        Applied and failed counts, the record id for each applied event, and errors
+    """
+    return apply_circulation_events(store, events, atomic)
 
 
-@mcp.resource("library://category/database-systems")
-def get_database_books() -> str:
-    """Returns books in Database Systems category."""
-    return get_books_by_category("Database Systems")
+json_codec.use_for_tools(mcp)
+instrumentation.instrument(mcp)
 
 
 if __name__ == "__main__":
+    if "--sqlite" in sys.argv:
+        store = open_store("sqlite")
+        subscriptions.watch(store)
+    if "--compact" in sys.argv:
+        json_codec.COMPACT_JSON = True
     mcp.run()
\ No newline at end of file
@@ -1,11 +1,100 @@
 from typing import Any, Dict, List, Optional
+from collections import deque
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
 from mcp.server.fastmcp import FastMCP
+import asyncio
+import atexit
+import base64
+import contextvars
+import functools
+import inspect
+import itertools
+import json
+import os
+import random
 import sqlite3
+import sys
+import threading
+import time
+
+import instrumentation
+import json_codec
 
 mcp = FastMCP("SQLite Server")
 
 DB_PATH = "C:\\Users\\shukl\\OneDrive\\Desktop\\MCP COURSE\\db\\"
 
+# Connection pool settings (per database file)
+POOL_MAX_SIZE = 8  # Maximum open connections per database
+POOL_IDLE_TIMEOUT = 300.0  # Seconds an idle connection is kept before eviction
+POOL_ACQUIRE_TIMEOUT = 30.0  # Seconds to wait for a free connection
+
+# Async execution settings
+DB_WORKER_THREADS = POOL_MAX_SIZE  # One worker per pooled connection
+DEFAULT_TOOL_CONCURRENCY = 4  # Concurrent executions allowed per tool
+
+# Name search settings
+SEARCH_INDEXED_TABLES = ("countries", "states", "cities")  # Get a trigram index
+SEARCH_INDEX_MIN_LENGTH = 3  # Trigram matching needs at least three characters
+
+# Batch lookup settings
+MAX_BATCH_CODES = 250  # Most codes a single batch tool call may request
+
+# Pagination settings
+MAX_PAGE_SIZE = 500  # Largest page any list tool will return
+STREAM_CHUNK_SIZE = 100  # Rows pulled from a cursor per fetchmany call
+
+# In-memory snapshot settings
+SNAPSHOT_DATABASES: List[str] = []  # Databases served from memory (opt-in)
+SNAPSHOT_POLL_INTERVAL = 5.0  # Seconds between checks for a changed source file
+
+# Prepared statements kept per connection; comfortably above the fixed tool queries
+STATEMENT_CACHE_SIZE = 64
+
+# Chatter leaderboard settings
+CHATTER_LEADERBOARD_IN_MEMORY = False  # Serve leaderboard reads from a maintained in-memory ranking
+DEFAULT_LEADERBOARD_LIMIT = 25  # Chatters returned by get_chatter_leaderboard by default
+
+# Query guard settings (pooled connections)
+QUERY_TIMEOUT = 5.0  # Seconds a statement may run before it is interrupted (None disables)
+PROGRESS_HANDLER_STEPS = 1000  # SQLite VM instructions between deadline checks
+SLOW_QUERY_THRESHOLD = 0.25  # Seconds of execute + fetch time before a statement is logged
+SLOW_QUERY_LOG = os.path.join(os.path.dirname(os.path.abspath(__file__)), "slow_queries.jsonl")
+SLOW_QUERY_MAX_STATEMENTS = 200  # Distinct statements tracked for get_slow_queries
+
+
+@dataclass(frozen=True)
+class ConnectionProfile:
+    """Open mode and PRAGMA tuning applied to every new connection to a database."""
+
+    read_only: bool = False  # Open with a mode=ro URI
+    journal_mode: Optional[str] = None  # e.g. "wal"; None keeps the file's mode
+    mmap_size: int = 0  # Bytes of the file to memory-map (0 disables)
+    cache_size: Optional[int] = None  # Page cache; negative values are KiB
+    temp_store_memory: bool = False  # Keep temp tables and sort spills in RAM
+    query_only: bool = False  # Reject any statement that would write
+
+
+# world.db is static reference data that every tool only reads
+READ_ONLY_PROFILE = ConnectionProfile(
+    read_only=True,
+    journal_mode="wal",
+    mmap_size=256 * 1024 * 1024,
+    cache_size=-64 * 1024,
+    temp_store_memory=True,
+    query_only=True,
+)
+DEFAULT_PROFILE = ConnectionProfile()
+
+DB_PROFILES: Dict[str, ConnectionProfile] = {
+    "world.db": READ_ONLY_PROFILE,
+}
+
+
 def dict_from_row(row):
     """Convert sqlite3.Row to dictionary."""
     return dict(row) if row else None
@@ -16,74 +105,1822 @@ def dicts_from_rows(rows):
     return [dict(row) for row in rows]
 
 
-def get_db_connection(db_name: str):
-    """Create and return a database connection."""
-    conn = sqlite3.connect(DB_PATH + db_name)
+_journal_modes_set = set()
+_journal_modes_lock = threading.Lock()
+
+
+def _ensure_journal_mode(db_file: str, journal_mode: str) -> None:
+    """Persist the journal mode once, since read-only connections cannot change it."""
+    with _journal_modes_lock:
+        if db_file in _journal_modes_set:
+            return
+        try:
+            conn = sqlite3.connect(db_file)
+            try:
+                conn.execute(f"PRAGMA journal_mode={journal_mode}")
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            pass  # Read-only media: keep whatever mode the file already has
+        _journal_modes_set.add(db_file)
+
+
+def get_db_connection(db_name: str, profile: Optional[ConnectionProfile] = None):
+    """Create and return a database connection tuned by the database's profile."""
+    profile = profile or DB_PROFILES.get(db_name, DEFAULT_PROFILE)
+    db_file = DB_PATH + db_name
+
+    with _snapshots_lock:
+        snapshot = _snapshots.get(db_name)
+
+    if snapshot is not None:
+        target, uri = snapshot.uri, True
+    elif profile.read_only:
+        target, uri = Path(db_file).resolve().as_uri() + "?mode=ro", True
+    else:
+        target, uri = db_file, False
+
+    if profile.journal_mode and snapshot is None:
+        _ensure_journal_mode(db_file, profile.journal_mode)
+
+    # Pooled connections may be handed to different threads over their lifetime
+    conn = sqlite3.connect(
+        target,
+        uri=uri,
+        check_same_thread=False,
+        cached_statements=STATEMENT_CACHE_SIZE,
+        factory=GuardedConnection,
+    )
+    conn.db_name = db_name
     conn.row_factory = sqlite3.Row  # This allows accessing columns by name
+
+    # Opening is pool housekeeping, not work done by the tool that needed a connection
+    with instrumentation.untracked():
+        if profile.mmap_size and snapshot is None:
+            conn.execute(f"PRAGMA mmap_size={int(profile.mmap_size)}")
+        if profile.cache_size is not None:
+            conn.execute(f"PRAGMA cache_size={int(profile.cache_size)}")
+        if profile.temp_store_memory:
+            conn.execute("PRAGMA temp_store=MEMORY")
+        if profile.query_only:
+            conn.execute("PRAGMA query_only=ON")
     return conn
 
 
+# =============================================================================
+# QUERY DEADLINES AND SLOW-QUERY LOG
+# =============================================================================
+
+
+class QueryTimeoutError(sqlite3.OperationalError):
+    """A statement ran past QUERY_TIMEOUT and was interrupted."""
+
+
+@dataclass
+class QueryRun:
+    """One statement execution, from execute() until its rows are exhausted."""
+
+    sql: str
+    params: Any
+    tool: Optional[str]
+    seconds: float = 0.0  # Time spent inside execute and fetch calls
+    rows: int = 0
+
+
+def explain_plan(conn: sqlite3.Connection, sql: str, params: Any) -> Optional[List[str]]:
+    """Return the EXPLAIN QUERY PLAN details for sql, or None if it cannot be explained."""
+    try:
+        # The base execute skips the guarded cursor, so this is neither timed nor logged
+        rows = sqlite3.Connection.execute(conn, f"EXPLAIN QUERY PLAN {sql}", params)
+        return [row[3] for row in rows]
+    except (sqlite3.Error, ValueError):
+        return None
+
+
+class SlowQueryLog:
+    """
+    Record of statements slower than SLOW_QUERY_THRESHOLD or interrupted by
+    QUERY_TIMEOUT.
+
+    Each occurrence is appended as one JSON line to the log file, with its
+    parameters, duration and query plan, and folded into per-statement totals
+    for get_slow_queries.
+    """
+
+    def __init__(self, path: Optional[str], max_statements: int):
+        self.path = path
+        self.max_statements = max_statements
+        self._statements: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self.logged = 0
+        self.timeouts = 0
+        self.write_errors = 0
+
+    def record(self, conn: "GuardedConnection", run: QueryRun, status: str) -> None:
+        """Log a slow ("slow") or interrupted ("timeout") statement."""
+        entry = {
+            "logged_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "database": conn.db_name,
+            "tool": run.tool,
+            "status": status,
+            "duration_ms": round(run.seconds * 1000, 3),
+            "rows": run.rows,
+            "sql": run.sql,
+            "params": run.params,
+            "plan": explain_plan(conn, run.sql, run.params) if run.params is not None else None,
+        }
+        line = json_codec.dumps(entry, compact=True)
+        key = " ".join(run.sql.split())
+
+        with self._lock:
+            self.logged += 1
+            self.timeouts += status == "timeout"
+
+            totals = self._statements.get(key)
+            if totals is None:
+                if len(self._statements) >= self.max_statements:
+                    # Forget the statement that has cost the least so far
+                    cheapest = min(self._statements, key=lambda k: self._statements[k]["total_ms"])
+                    del self._statements[cheapest]
+                totals = self._statements[key] = {
+                    "sql": key,
+                    "database": conn.db_name,
+                    "count": 0,
+                    "timeouts": 0,
+                    "total_ms": 0.0,
+                    "max_ms": 0.0,
+                }
+            totals["count"] += 1
+            totals["timeouts"] += status == "timeout"
+            totals["total_ms"] += entry["duration_ms"]
+            totals["max_ms"] = max(totals["max_ms"], entry["duration_ms"])
+            totals.update(
+                last_seen=entry["logged_at"],
+                last_tool=run.tool,
+                last_params=run.params,
+                last_rows=run.rows,
+                plan=entry["plan"],
+            )
+
+            if self.path:
+                try:
+                    with open(self.path, "a", encoding="utf-8") as f:
+                        f.write(line + "\n")
+                except OSError:
+                    self.write_errors += 1
+
+    def top(self, limit: int = 10, order_by: str = "total") -> List[Dict[str, Any]]:
+        """Return the slowest statements by total time, worst single run ("max") or count."""
+        sort_keys = {"total": "total_ms", "max": "max_ms", "count": "count"}
+        if order_by not in sort_keys:
+            raise ValueError(f"order_by must be one of: {', '.join(sort_keys)}")
+        with self._lock:
+            statements = sorted(
+                self._statements.values(), key=lambda s: s[sort_keys[order_by]], reverse=True
+            )[: max(limit, 0)]
+            return [
+                {**s, "total_ms": round(s["total_ms"], 3), "avg_ms": round(s["total_ms"] / s["count"], 3)}
+                for s in statements
+            ]
+
+    def clear(self) -> None:
+        """Forget the per-statement totals (the log file is kept)."""
+        with self._lock:
+            self._statements.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return logging counters."""
+        with self._lock:
+            return {
+                "logged": self.logged,
+                "timeouts": self.timeouts,
+                "statements": len(self._statements),
+                "write_errors": self.write_errors,
+            }
+
+
+slow_query_log = SlowQueryLog(SLOW_QUERY_LOG, SLOW_QUERY_MAX_STATEMENTS)
+
+
+class GuardedCursor(instrumentation.InstrumentedCursor):
+    """Cursor that times each statement across execute and fetches for the slow-query log."""
+
+    _run: Optional[QueryRun] = None
+
+    def execute(self, sql, parameters=()):
+        self._run = self.connection.begin_statement(sql, parameters)
+        self._timed(super().execute, sql, parameters)
+        return self
+
+    def executemany(self, sql, seq_of_parameters):
+        # Parameters are not kept, so these are logged without a plan
+        self._run = self.connection.begin_statement(sql, None)
+        self._timed(super().executemany, sql, seq_of_parameters)
+        self._advance(0, True)
+        return self
+
+    def fetchone(self):
+        row = self._timed(super().fetchone)
+        self._advance(row is not None, row is None)
+        return row
+
+    def fetchmany(self, size=None):
+        size = self.arraysize if size is None else size
+        rows = self._timed(super().fetchmany, size)
+        self._advance(len(rows), len(rows) < size)
+        return rows
+
+    def fetchall(self):
+        rows = self._timed(super().fetchall)
+        self._advance(len(rows), True)
+        return rows
+
+    def __next__(self):
+        try:
+            row = self._timed(super().__next__)
+        except StopIteration:
+            self._advance(0, True)
+            raise
+        self._advance(1, False)
+        return row
+
+    def _timed(self, method, *args):
+        run = self._run
+        started = time.perf_counter()
+        try:
+            return method(*args)
+        except sqlite3.OperationalError as e:
+            if run is None or not self.connection.past_deadline():
+                raise
+            error = e
+        finally:
+            if run is not None:
+                run.seconds += time.perf_counter() - started
+
+        # Only reached when the progress handler interrupted the statement
+        self.connection.finish_statement(run, "timeout")
+        raise QueryTimeoutError(
+            f"Query interrupted after exceeding the {QUERY_TIMEOUT}s timeout"
+        ) from error
+
+    def _advance(self, rows: int, exhausted: bool) -> None:
+        run = self._run
+        if run is None:
+            return
+        run.rows += rows
+        if exhausted:
+            self._run = None
+            self.connection.finish_statement(run)
+
+
+class GuardedConnection(instrumentation.InstrumentedConnection):
+    """
+    Connection that interrupts statements running past QUERY_TIMEOUT and
+    reports those slower than SLOW_QUERY_THRESHOLD to slow_query_log.
+
+    The deadline is checked from SQLite's progress handler every
+    PROGRESS_HANDLER_STEPS virtual machine instructions, so even a single
+    long sort or scan is cut off.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.db_name: Optional[str] = None
+        self.deadline: Optional[float] = None
+        self._run: Optional[QueryRun] = None
+        self.set_progress_handler(self.past_deadline, PROGRESS_HANDLER_STEPS)
+
+    def cursor(self, factory=GuardedCursor):
+        return super().cursor(factory)
+
+    def past_deadline(self) -> bool:
+        return self.deadline is not None and time.monotonic() > self.deadline
+
+    def begin_statement(self, sql: str, params: Any) -> QueryRun:
+        """Close out the previous statement and start the clock on a new one."""
+        self.finish_statement()
+        call = instrumentation.current_call()
+        if isinstance(params, tuple):
+            params = list(params)
+        self._run = QueryRun(sql, params, call.name if call else None)
+        self.deadline = time.monotonic() + QUERY_TIMEOUT if QUERY_TIMEOUT else None
+        return self._run
+
+    def finish_statement(self, run: Optional[QueryRun] = None, status: str = "ok") -> None:
+        """
+        End the current statement (or run, if it is still current) and log it if slow.
+
+        Called when its rows are exhausted, when it times out, when the next
+        statement starts and when the connection goes back to the pool.
+        """
+        current = self._run
+        if current is None or (run is not None and run is not current):
+            return
+        self._run = None
+        self.deadline = None
+        if status == "ok" and current.seconds >= SLOW_QUERY_THRESHOLD:
+            status = "slow"
+        if status != "ok":
+            slow_query_log.record(self, current, status)
+
+
+# =============================================================================
+# CONNECTION POOL
+# =============================================================================
+
+
+class PoolClosedError(RuntimeError):
+    """The pool was closed, e.g. replaced by a snapshot reload, before a checkout."""
+
+
+class ConnectionPool:
+    """
+    Bounded, thread-safe pool of long-lived connections to one database.
+
+    Connections are health-checked when handed out and closed once they have
+    been idle for longer than idle_timeout, so hot tools keep running against
+    a warm page cache without holding file handles forever.
+    """
+
+    def __init__(
+        self,
+        db_name: str,
+        max_size: int = POOL_MAX_SIZE,
+        idle_timeout: float = POOL_IDLE_TIMEOUT,
+    ):
+        self.db_name = db_name
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self._idle: deque = deque()  # (connection, released_at), newest last
+        self._size = 0  # Open connections, idle and checked out
+        self._cond = threading.Condition()
+        self._closed = False
+        # Tables with a name search index, looked up on first search (see search_index_tables)
+        self.search_tables: Optional[frozenset] = None
+
+    def acquire(self, timeout: float = POOL_ACQUIRE_TIMEOUT) -> sqlite3.Connection:
+        """Check out a healthy connection, opening a new one if the pool allows."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise PoolClosedError(f"Connection pool for {self.db_name} is closed")
+                self._evict_idle()
+                if self._idle:
+                    conn, _ = self._idle.pop()
+                    if self._is_healthy(conn):
+                        return conn
+                    self._discard(conn)
+                    continue
+                if self._size < self.max_size:
+                    self._size += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(
+                        f"Timed out waiting for a connection to {self.db_name}"
+                    )
+                self._cond.wait(remaining)
+
+        # Open outside the lock so a slow open does not block other callers
+        try:
+            return get_db_connection(self.db_name)
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+
+    def release(self, conn: sqlite3.Connection) -> None:
+        """Return a connection to the pool."""
+        conn.finish_statement()
+        if conn.in_transaction:
+            conn.rollback()
+        with self._cond:
+            if self._closed:
+                self._discard(conn)
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        """Context manager that checks a connection out and always returns it."""
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            # Broken connections are weeded out by the health check on acquire
+            self.release(conn)
+
+    def close(self) -> None:
+        """Close every idle connection and refuse further checkouts."""
+        with self._cond:
+            self._closed = True
+            while self._idle:
+                conn, _ = self._idle.pop()
+                self._discard(conn)
+            self._cond.notify_all()
+
+    def stats(self) -> Dict[str, int]:
+        """Return current pool occupancy."""
+        with self._cond:
+            return {
+                "open": self._size,
+                "idle": len(self._idle),
+                "in_use": self._size - len(self._idle),
+                "max_size": self.max_size,
+            }
+
+    def _evict_idle(self) -> None:
+        # Idle list is ordered oldest first, so stop at the first fresh entry
+        cutoff = time.monotonic() - self.idle_timeout
+        while self._idle and self._idle[0][1] < cutoff:
+            conn, _ = self._idle.popleft()
+            self._discard(conn)
+
+    def _discard(self, conn: sqlite3.Connection) -> None:
+        self._size -= 1
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+    @staticmethod
+    def _is_healthy(conn: sqlite3.Connection) -> bool:
+        try:
+            with instrumentation.untracked():
+                conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+
+_pools: Dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_name: str) -> ConnectionPool:
+    """Return the shared connection pool for a database, creating it on first use."""
+    with _pools_lock:
+        pool = _pools.get(db_name)
+        if pool is None:
+            pool = _pools[db_name] = ConnectionPool(db_name)
+        return pool
+
+
+@contextmanager
+def pooled_connection(db_name: str):
+    """
+    Borrow a connection to db_name from its pool (use as a context manager).
+
+    A pool closed between get_pool() and the checkout has been replaced
+    (see load_snapshot), so the checkout is retried on the current one.
+    """
+    while True:
+        pool = get_pool(db_name)
+        try:
+            conn = pool.acquire()
+            break
+        except PoolClosedError:
+            continue
+    try:
+        yield conn
+    finally:
+        pool.release(conn)
+
+
+@atexit.register
+def close_all_pools() -> None:
+    """Close every connection pool."""
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close()
+        _pools.clear()
+
+
+# =============================================================================
+# ASYNC EXECUTION
+# =============================================================================
+
+# Blocking sqlite3 calls run here so they never stall FastMCP's event loop
+_db_executor = ThreadPoolExecutor(
+    max_workers=DB_WORKER_THREADS, thread_name_prefix="sqlite-worker"
+)
+
+
+class ToolLimiter:
+    """Caps concurrent executions of one tool and records queueing metrics."""
+
+    def __init__(self, name: str, max_concurrency: int):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.calls = 0
+        self.errors = 0
+        self.queued = 0  # Calls currently waiting for a slot
+        self.running = 0
+        self.max_queued = 0
+        self.total_wait_seconds = 0.0
+        self.total_run_seconds = 0.0
+
+    async def run(self, func, *args, **kwargs):
+        """Wait for a free slot, then run func on the database worker pool."""
+        queued_at = time.perf_counter()
+        if self._semaphore.locked():
+            self.queued += 1
+            self.max_queued = max(self.max_queued, self.queued)
+            try:
+                await self._semaphore.acquire()
+            finally:
+                self.queued -= 1
+        else:
+            await self._semaphore.acquire()
+
+        started_at = time.perf_counter()
+        self.total_wait_seconds += started_at - queued_at
+        self.running += 1
+        try:
+            loop = asyncio.get_running_loop()
+            # Run in a copy of the caller's context so per-call metrics follow it
+            context = contextvars.copy_context()
+            return await loop.run_in_executor(
+                _db_executor, functools.partial(context.run, func, *args, **kwargs)
+            )
+        except Exception:
+            self.errors += 1
+            raise
+        finally:
+            self.running -= 1
+            self.calls += 1
+            self.total_run_seconds += time.perf_counter() - started_at
+            self._semaphore.release()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return counters and average wait/run times in milliseconds."""
+        calls = self.calls or 1
+        return {
+            "max_concurrency": self.max_concurrency,
+            "calls": self.calls,
+            "errors": self.errors,
+            "queued": self.queued,
+            "running": self.running,
+            "max_queued": self.max_queued,
+            "avg_wait_ms": round(self.total_wait_seconds / calls * 1000, 3),
+            "avg_run_ms": round(self.total_run_seconds / calls * 1000, 3),
+        }
+
+
+_limiters: Dict[str, ToolLimiter] = {}
+
+
+def offload(max_concurrency: int = DEFAULT_TOOL_CONCURRENCY):
+    """
+    Turn a blocking tool function into a coroutine that runs on the worker pool.
+
+    Apply it beneath @mcp.tool() so FastMCP registers the async wrapper; the
+    original signature and docstring are preserved for the tool schema.
+    """
+
+    def decorator(func):
+        limiter = _limiters[func.__name__] = ToolLimiter(
+            func.__name__, max_concurrency
+        )
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            return await limiter.run(func, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+# =============================================================================
+# IN-MEMORY SNAPSHOTS
+# =============================================================================
+
+
+class Snapshot:
+    """A copy of a database file loaded into a shared in-memory database."""
+
+    _generations = itertools.count(1)
+
+    def __init__(self, db_name: str):
+        self.db_name = db_name
+        self.generation = next(self._generations)
+        self.uri = f"file:{db_name}-snapshot-{self.generation}?mode=memory&cache=shared"
+        # Taken before copying, so a write during the copy triggers a reload
+        self.source_signature = _file_signature(DB_PATH + db_name)
+        self.loaded_at = time.time()
+
+        # The memory database lives as long as at least one connection is open
+        self._holder = sqlite3.connect(self.uri, uri=True, check_same_thread=False)
+        source = sqlite3.connect(DB_PATH + db_name)
+        try:
+            source.backup(self._holder)
+        finally:
+            source.close()
+
+    def close(self) -> None:
+        """Release the snapshot once in-flight readers have finished with it."""
+        self._holder.close()
+
+
+_snapshots: Dict[str, Snapshot] = {}
+_snapshots_lock = threading.Lock()
+_snapshot_watcher: Optional[threading.Thread] = None
+
+
+def _file_signature(db_file: str) -> tuple:
+    """
+    Modification time and size of a database file and its WAL, if any.
+
+    An empty WAL counts as no WAL: opening a connection creates or touches
+    it without changing the data, which would otherwise look like a write.
+    """
+    signature = []
+    for path in (db_file, db_file + "-wal"):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            signature.append(None)
+            continue
+        if path != db_file and stat.st_size == 0:
+            signature.append(None)
+        else:
+            signature.append((stat.st_mtime_ns, stat.st_size))
+    return tuple(signature)
+
+
+def data_signature(db_name: str) -> tuple:
+    """
+    Identifies the data reads of db_name currently see: the snapshot
+    generation while it is served from memory, otherwise the file signature.
+    """
+    with _snapshots_lock:
+        snapshot = _snapshots.get(db_name)
+    if snapshot is not None:
+        return ("snapshot", snapshot.generation)
+    return _file_signature(DB_PATH + db_name)
+
+
+def load_snapshot(db_name: str) -> Snapshot:
+    """Load db_name into memory and atomically switch its pool over to the copy."""
+    snapshot = Snapshot(db_name)
+    with _snapshots_lock:
+        previous = _snapshots.get(db_name)
+        _snapshots[db_name] = snapshot
+
+    # New checkouts open against the fresh copy; connections still in use
+    # finish on the old one and are closed when they are released
+    with _pools_lock:
+        pool = _pools.pop(db_name, None)
+    if pool is not None:
+        pool.close()
+    if previous is not None:
+        previous.close()
+
+    return snapshot
+
+
+def _watch_snapshots() -> None:
+    while True:
+        time.sleep(SNAPSHOT_POLL_INTERVAL)
+        with _snapshots_lock:
+            snapshots = list(_snapshots.values())
+        for snapshot in snapshots:
+            try:
+                if _file_signature(DB_PATH + snapshot.db_name) != snapshot.source_signature:
+                    load_snapshot(snapshot.db_name)
+            except (OSError, sqlite3.Error) as e:
+                # Keep serving the current copy and retry on the next poll
+                print(f"Snapshot reload of {snapshot.db_name} failed: {e}", file=sys.stderr)
+
+
+def enable_snapshot(db_name: str) -> Snapshot:
+    """Serve db_name from memory and reload it whenever the file changes."""
+    global _snapshot_watcher
+
+    snapshot = load_snapshot(db_name)
+    with _snapshots_lock:
+        if _snapshot_watcher is None:
+            _snapshot_watcher = threading.Thread(
+                target=_watch_snapshots, name="snapshot-watcher", daemon=True
+            )
+            _snapshot_watcher.start()
+    return snapshot
+
+
+# =============================================================================
+# RESULT CACHE
+# =============================================================================
+
+
+class ResultCache:
+    """
+    TTL + LRU cache of one tool's results.
+
+    Entries remember the data signature (see data_signature) they were
+    computed against and are dropped as soon as it changes: when the file
+    changes on disk, or when a snapshot-served database is reloaded.
+    """
+
+    def __init__(self, name: str, db_name: str, ttl: float, max_size: int):
+        self.name = name
+        self.db_name = db_name
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: OrderedDict = OrderedDict()  # key -> (expires_at, signature, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.invalidated = 0
+        self.evicted = 0
+
+    def get(self, key) -> tuple:
+        """Return (found, value) for key, counting the hit or miss."""
+        signature = data_signature(self.db_name)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, entry_signature, value = entry
+                if entry_signature != signature:
+                    self.invalidated += 1
+                elif expires_at < time.monotonic():
+                    self.expired += 1
+                else:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return True, value
+                del self._entries[key]
+            self.misses += 1
+            return False, None
+
+    def put(self, key, value, signature: tuple) -> None:
+        """Store value, evicting the least recently used entries past max_size."""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, signature, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evicted += 1
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and current size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "expired": self.expired,
+                "invalidated": self.invalidated,
+                "evicted": self.evicted,
+            }
+
+
+_caches: Dict[str, ResultCache] = {}
+
+
+def _freeze(value):
+    """Make an argument value hashable so it can be part of a cache key."""
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    return value
+
+
+def call_key(signature: inspect.Signature, normalize: Dict[str, Any], args, kwargs) -> tuple:
+    """Key a call on its bound arguments, defaults included, after normalize."""
+    bound = signature.bind(*args, **kwargs)
+    bound.apply_defaults()
+    return tuple(
+        (name, _freeze(normalize[name](value) if name in normalize else value))
+        for name, value in bound.arguments.items()
+    )
+
+
+def cached(
+    db_name: str = "world.db",
+    ttl: float = 300.0,
+    max_size: int = 256,
+    normalize: Optional[Dict[str, Any]] = None,
+):
+    """
+    Cache an async tool's results, keyed on its normalized arguments.
+
+    Apply it between @mcp.tool() and @offload() so hits return without
+    touching the worker pool. normalize maps argument names to functions
+    applied before keying, e.g. {"country_code": str.upper}.
+    """
+    normalize = normalize or {}
+
+    def decorator(func):
+        cache = _caches[func.__name__] = ResultCache(
+            func.__name__, db_name, ttl, max_size
+        )
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            key = call_key(signature, normalize, args, kwargs)
+
+            found, value = cache.get(key)
+            if found:
+                return value
+
+            # Capture the signature first so a concurrent write forces a refresh
+            seen = data_signature(db_name)
+            value = await func(*args, **kwargs)
+            cache.put(key, value, seen)
+            return value
+
+        return wrapper
+
+    return decorator
+
+
+# =============================================================================
+# IN-FLIGHT COALESCING
+# =============================================================================
+
+
+class InFlightCalls:
+    """
+    Single-flight table for one tool: concurrent calls with the same key
+    share the execution that is already running instead of starting their own.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._pending: Dict[tuple, asyncio.Future] = {}
+        self.calls = 0
+        self.executions = 0
+        self.coalesced = 0  # Calls answered by another call's execution
+        self.max_followers = 0  # Most calls ever sharing one execution, minus the leader
+        self._followers: Dict[tuple, int] = {}
+
+    async def run(self, key: tuple, func, *args, **kwargs):
+        """Await the in-flight execution for key, or start one with func."""
+        self.calls += 1
+        while key in self._pending:
+            future = self._pending[key]
+            self.coalesced += 1
+            self._followers[key] += 1
+            self.max_followers = max(self.max_followers, self._followers[key])
+            try:
+                # Shielded so a cancelled follower does not cancel the leader
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled() or asyncio.current_task().cancelling():
+                    raise
+            # The leader was cancelled but this call was not: follow or lead again
+            self.coalesced -= 1
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending[key] = future
+        self._followers[key] = 0
+        self.executions += 1
+        try:
+            result = await func(*args, **kwargs)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # Mark retrieved in case nobody was waiting
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._pending[key]
+            del self._followers[key]
+
+    def stats(self) -> Dict[str, Any]:
+        """Return call, execution and coalescing counters."""
+        return {
+            "calls": self.calls,
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "coalesce_rate": round(self.coalesced / self.calls, 3) if self.calls else 0.0,
+            "in_flight": len(self._pending),
+            "max_followers": self.max_followers,
+        }
+
+
+_in_flight: Dict[str, InFlightCalls] = {}
+
+
+def coalesced(normalize: Optional[Dict[str, Any]] = None):
+    """
+    Share one execution among concurrent identical calls of an async tool.
+
+    Apply it between @cached() (if any) and @offload() so a burst of
+    identical calls, e.g. at session start, costs one connection and one
+    query. Calls are identical when their normalized arguments match, with
+    normalize as for @cached().
+    """
+    normalize = normalize or {}
+
+    def decorator(func):
+        in_flight = _in_flight[func.__name__] = InFlightCalls(func.__name__)
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            key = call_key(signature, normalize, args, kwargs)
+            return await in_flight.run(key, func, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+# =============================================================================
+# NAME SEARCH INDEX
+# =============================================================================
+
+def build_search_index(db_name: str = "world.db", force: bool = False) -> List[str]:
+    """
+    Create or refresh the FTS5 trigram indexes over each table's name column.
+
+    Each index is an external-content shadow table ({table}_fts), kept in
+    step with inserts, updates and deletes on its table by triggers. An index
+    is rebuilt when its triggers had to be (re)created, so writes made
+    without them are picked up, when its source table's row count or highest
+    id has changed since the last build, or always when force is set.
+
+    Returns:
+        Names of the tables whose index was rebuilt
+    """
+    rebuilt = []
+    # Pooled world.db connections are read-only, so build over a direct connection
+    conn = sqlite3.connect(DB_PATH + db_name)
+    try:
+        with conn:
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS search_index_meta (
+                       table_name TEXT PRIMARY KEY,
+                       row_count INTEGER NOT NULL,
+                       max_id INTEGER NOT NULL
+                   )"""
+            )
+            for table in SEARCH_INDEXED_TABLES:
+                fts_table = f"{table}_fts"
+                conn.execute(
+                    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {fts_table} USING fts5(
+                            name, content='{table}', content_rowid='id',
+                            tokenize='trigram'
+                        )"""
+                )
+                triggers_created = create_search_triggers(conn, table)
+                signature = conn.execute(
+                    f"SELECT COUNT(*), COALESCE(MAX(id), 0) FROM {table}"
+                ).fetchone()
+                stored = conn.execute(
+                    "SELECT row_count, max_id FROM search_index_meta WHERE table_name = ?",
+                    [table],
+                ).fetchone()
+
+                if force or triggers_created or stored != signature:
+                    conn.execute(f"INSERT INTO {fts_table}({fts_table}) VALUES('rebuild')")
+                    conn.execute(
+                        "INSERT OR REPLACE INTO search_index_meta VALUES (?, ?, ?)",
+                        [table, *signature],
+                    )
+                    rebuilt.append(table)
+    finally:
+        conn.close()
+
+    # Let the pool look the indexes up again
+    with _pools_lock:
+        pool = _pools.get(db_name)
+    if pool is not None:
+        pool.search_tables = None
+    return rebuilt
+
+
+def create_search_triggers(conn: sqlite3.Connection, table: str) -> bool:
+    """
+    Create the triggers that mirror writes to table into {table}_fts.
+
+    Returns:
+        Whether any trigger was missing
+    """
+    fts_table = f"{table}_fts"
+    triggers = {
+        f"{fts_table}_insert": f"""AFTER INSERT ON {table} BEGIN
+            INSERT INTO {fts_table}(rowid, name) VALUES (new.id, new.name);
+        END""",
+        f"{fts_table}_delete": f"""AFTER DELETE ON {table} BEGIN
+            INSERT INTO {fts_table}({fts_table}, rowid, name) VALUES ('delete', old.id, old.name);
+        END""",
+        f"{fts_table}_update": f"""AFTER UPDATE OF id, name ON {table} BEGIN
+            INSERT INTO {fts_table}({fts_table}, rowid, name) VALUES ('delete', old.id, old.name);
+            INSERT INTO {fts_table}(rowid, name) VALUES (new.id, new.name);
+        END""",
+    }
+    existing = {
+        row[0]
+        for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = ?", [table]
+        )
+    }
+    missing = [name for name in triggers if name not in existing]
+    for name in missing:
+        conn.execute(f"CREATE TRIGGER {name} {triggers[name]}")
+    return bool(missing)
+
+
+def search_index_tables(conn: sqlite3.Connection) -> frozenset:
+    """
+    Tables in conn's database that have a name search index.
+
+    The index may have been built by another process (or before a restart),
+    so sqlite_master is checked once per pool; snapshot reloads start a new pool.
+    """
+    pool = get_pool(conn.db_name)
+    if pool.search_tables is None:
+        fts_tables = {f"{table}_fts": table for table in SEARCH_INDEXED_TABLES}
+        placeholders = ", ".join("?" * len(fts_tables))
+        with instrumentation.untracked():
+            rows = conn.execute(
+                f"SELECT name FROM sqlite_master WHERE type = 'table' AND name IN ({placeholders})",
+                list(fts_tables),
+            ).fetchall()
+        pool.search_tables = frozenset(fts_tables[row[0]] for row in rows)
+    return pool.search_tables
+
+
+def name_search_query(
+    conn: sqlite3.Connection, table: str, name: str, filters: Dict[str, Any], select: str = ""
+) -> tuple:
+    """
+    Build a name search over table, optionally narrowed by equality filters.
+
+    Uses the table's trigram index with relevance ranking when it is available
+    and the search text is long enough, otherwise falls back to LIKE. select
+    is the column list (see select_list) and defaults to every column.
+
+    Returns:
+        (query, params, order_by) ready for fetch_page
+    """
+    select = select or f"{table}.*"
+    clauses = [f"{table}.{column} = ?" for column in filters]
+    params = list(filters.values())
+
+    if (
+        name
+        and len(name) >= SEARCH_INDEX_MIN_LENGTH
+        and table in search_index_tables(conn)
+    ):
+        # A quoted phrase of trigrams matches the text as a substring
+        phrase = '"' + name.replace('"', '""') + '"'
+        query = (
+            f"SELECT {select}, {table}_fts.rank AS search_rank "
+            f"FROM {table}_fts JOIN {table} ON {table}.id = {table}_fts.rowid "
+            f"WHERE {table}_fts MATCH ?"
+        )
+        params.insert(0, phrase)
+        order_by = [(f"{table}_fts.rank", "search_rank"), (f"{table}.id", "id")]
+    else:
+        if name:
+            clauses.append(f"{table}.name LIKE ?")
+            params.append(f"%{name}%")
+        query = f"SELECT {select} FROM {table} WHERE 1=1"
+        order_by = NAME_ORDER
+
+    for clause in clauses:
+        query += f" AND {clause}"
+
+    return query, params, order_by
+
+
+# =============================================================================
+# PAGINATION
+# =============================================================================
+
+# Keyset used by most list tools: name, with id breaking ties
+NAME_ORDER = [("name", "name"), ("id", "id")]
+
+# Keyset for the chatters leaderboard, walked in descending order
+CHATTER_ORDER = [("messages", "messages"), ("id", "id")]
+
+# Columns selected only to sort and continue pages, never returned
+SORT_ONLY_COLUMNS = ("search_rank",)
+
+
+# Column names per table, read once since the schema does not change at runtime
+_table_columns: Dict[str, List[str]] = {}
+
+
+def table_columns(conn: sqlite3.Connection, table: str) -> List[str]:
+    """Return the column names of table in schema order."""
+    columns = _table_columns.get(table)
+    if columns is None:
+        columns = [row["name"] for row in conn.execute(f"PRAGMA table_info({table})")]
+        _table_columns[table] = columns
+    return columns
+
+
+def select_list(
+    conn: sqlite3.Connection, table: str, fields: Optional[List[str]]
+) -> str:
+    """
+    Build the SELECT column list for a projection of table.
+
+    The keyset columns (name, id) are always selected so pages can be
+    continued; fetch_page drops them again if they were not requested.
+    Unknown field names raise ValueError instead of reaching the SQL.
+    """
+    if not fields:
+        return f"{table}.*"
+
+    columns = table_columns(conn, table)
+    unknown = [field for field in fields if field not in columns]
+    if unknown:
+        raise ValueError(
+            f"Unknown fields for {table}: {', '.join(unknown)}. "
+            f"Available: {', '.join(columns)}"
+        )
+
+    wanted = set(fields) | {key for _, key in NAME_ORDER}
+    return ", ".join(f"{table}.{column}" for column in columns if column in wanted)
+
+
+def encode_cursor(values: List[Any]) -> str:
+    """Pack the sort key of the last row on a page into an opaque token."""
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    """Unpack a token produced by encode_cursor."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, TypeError):
+        raise ValueError("Invalid pagination cursor")
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError("Invalid pagination cursor")
+    return values
+
+
+def keyset_query(
+    query: str,
+    params: List[Any],
+    order_by: List[tuple],
+    cursor: str = "",
+    page_size: int = 50,
+    descending: bool = False,
+) -> tuple:
+    """
+    Extend a filtered SELECT (one that already has a WHERE clause) into one
+    keyset page: rows strictly after the cursor's sort key, ordered by the
+    order_by columns, plus one extra row to detect whether more remain.
+
+    Returns:
+        (query, params) ready for conn.execute
+    """
+    params = list(params)
+    columns = ", ".join(column for column, _ in order_by)
+    if cursor:
+        placeholders = ", ".join("?" * len(order_by))
+        query += f" AND ({columns}) {'<' if descending else '>'} ({placeholders})"
+        params.extend(decode_cursor(cursor, len(order_by)))
+
+    direction = " DESC" if descending else ""
+    query += " ORDER BY " + ", ".join(column + direction for column, _ in order_by)
+    query += " LIMIT ?"
+    params.append(page_size + 1)
+
+    return query, params
+
+
+def stream_rows(cursor: sqlite3.Cursor, chunk_size: int = STREAM_CHUNK_SIZE):
+    """Yield rows from cursor in fetchmany chunks instead of one fetchall."""
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            return
+        yield from rows
+
+
+def fetch_page(
+    conn: sqlite3.Connection,
+    query: str,
+    params: List[Any],
+    order_by: List[tuple],
+    cursor: str = "",
+    page_size: int = 50,
+    descending: bool = False,
+    fields: Optional[List[str]] = None,
+    compact: bool = False,
+) -> Dict[str, Any]:
+    """
+    Run one keyset page of query.
+
+    fields limits the returned columns (keyset columns are used for the
+    cursor and then dropped if not requested; SORT_ONLY_COLUMNS always are). compact returns the column
+    names once with each row as a list, instead of one dict per row.
+
+    Returns:
+        {"items": rows as dicts, "next_cursor": token for the following page,
+        or None when this is the last page}, or
+        {"columns", "rows", "next_cursor"} when compact is set
+    """
+    page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+    query, params = keyset_query(query, params, order_by, cursor, page_size, descending)
+
+    sql_cursor = conn.execute(query, params)
+    columns = [description[0] for description in sql_cursor.description]
+    rows = [tuple(row) for row in stream_rows(sql_cursor)]
+
+    next_cursor = None
+    if len(rows) > page_size:
+        rows.pop()
+        last = dict(zip(columns, rows[-1]))
+        next_cursor = encode_cursor([last[key] for _, key in order_by])
+
+    keep = [
+        index
+        for index, column in enumerate(columns)
+        if column not in SORT_ONLY_COLUMNS and (not fields or column in fields)
+    ]
+    if len(keep) < len(columns):
+        columns = [columns[index] for index in keep]
+        rows = [tuple(row[index] for index in keep) for row in rows]
+
+    if compact:
+        return {
+            "columns": columns,
+            "rows": [list(row) for row in rows],
+            "next_cursor": next_cursor,
+        }
+    return {
+        "items": [dict(zip(columns, row)) for row in rows],
+        "next_cursor": next_cursor,
+    }
+
+
+def normalize_codes(codes: List[str]) -> List[str]:
+    """Upper-case and de-duplicate codes for a batch lookup, keeping their order."""
+    normalized = list(dict.fromkeys(code.strip().upper() for code in codes if code))
+    if len(normalized) > MAX_BATCH_CODES:
+        raise ValueError(f"At most {MAX_BATCH_CODES} codes can be requested at once")
+    return normalized
+
+
+def group_rows(rows, key: str, keys: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+    """Group rows by the value of key, with an entry (possibly empty) for every key."""
+    grouped = {k: [] for k in keys}
+    for row in rows:
+        item = dict(row)
+        grouped[item[key]].append(item)
+    return grouped
+
+
+# =============================================================================
+# INDEX ADVISOR
+# =============================================================================
+
+# Indexes backing the filters and name ordering used by the tools
+RECOMMENDED_INDEXES = {
+    "world.db": [
+        "CREATE INDEX IF NOT EXISTS idx_countries_iso2 ON countries (iso2)",
+        "CREATE INDEX IF NOT EXISTS idx_countries_name ON countries (name)",
+        "CREATE INDEX IF NOT EXISTS idx_countries_currency_name ON countries (currency, name)",
+        "CREATE INDEX IF NOT EXISTS idx_cities_name ON cities (name)",
+        "CREATE INDEX IF NOT EXISTS idx_cities_country_code_name ON cities (country_code, name)",
+        "CREATE INDEX IF NOT EXISTS idx_states_name ON states (name)",
+        "CREATE INDEX IF NOT EXISTS idx_states_country_code_name ON states (country_code, name)",
+        "CREATE INDEX IF NOT EXISTS idx_subregions_region_id_name ON subregions (region_id, name)",
+    ],
+    "community.db": [
+        # Leaderboard order (walked backwards) and rank counts
+        "CREATE INDEX IF NOT EXISTS idx_chatters_messages_id ON chatters (messages, id)",
+        # Incremental sync of the in-memory leaderboard
+        "CREATE INDEX IF NOT EXISTS idx_chatters_last_message_at ON chatters (last_message_at)",
+    ],
+}
+
+
+def tool_queries() -> List[tuple]:
+    """
+    Representative statements issued by the tools, with sample parameters.
+
+    Returns:
+        List of (db_name, tool_name, query, params)
+    """
+    entries = [
+        ("world.db", "get_country", "SELECT * FROM countries WHERE iso2 = ?", ["US"]),
+        ("world.db", "get_countries_batch", "SELECT * FROM countries WHERE iso2 IN (SELECT value FROM json_each(?))", ['["US","FR"]']),
+        ("world.db", "get_cities_in_countries", "SELECT * FROM (SELECT cities.*, ROW_NUMBER() OVER (PARTITION BY cities.country_code ORDER BY cities.name, cities.id) AS position FROM cities WHERE cities.country_code IN (SELECT value FROM json_each(?))) WHERE position <= ? ORDER BY country_code, position", ['["US","FR"]', 50]),
+        ("world.db", "get_states_in_countries", "SELECT * FROM states WHERE country_code IN (SELECT value FROM json_each(?)) ORDER BY country_code, name, id", ['["US","FR"]']),
+        ("world.db", "get_all_regions", "SELECT * FROM regions ORDER BY name", []),
+        ("world.db", "get_subregions_in_region", "SELECT * FROM subregions WHERE region_id = ? ORDER BY name", [1]),
+        ("world.db", "get_countries_summary", "SELECT name, iso2, capital, region FROM countries ORDER BY name", []),
+        ("community.db", "get_chatter_leaderboard", LEADERBOARD_QUERY, [0, DEFAULT_LEADERBOARD_LIMIT, 0]),
+        ("community.db", "get_chatter_rank", RANK_QUERY, [100]),
+        ("world.db", "get_popular_currencies", "SELECT currency, currency_name, COUNT(*) as country_count FROM countries WHERE currency IS NOT NULL GROUP BY currency, currency_name ORDER BY country_count DESC LIMIT 20", []),
+    ]
+
+    # Paged tools are explained on their first page in keyset order
+    for db_name, tool_name, query, params, order_by, descending in [
+        ("world.db", "get_countries", "SELECT * FROM countries WHERE 1=1", [], NAME_ORDER, False),
+        ("world.db", "get_countries_by_region", "SELECT * FROM countries WHERE region LIKE ?", ["%Europe%"], NAME_ORDER, False),
+        ("world.db", "get_countries_by_currency", "SELECT * FROM countries WHERE currency = ?", ["EUR"], NAME_ORDER, False),
+        ("world.db", "get_cities_in_country", "SELECT * FROM cities WHERE country_code = ?", ["US"], NAME_ORDER, False),
+        ("world.db", "get_states_in_country", "SELECT * FROM states WHERE country_code = ?", ["US"], NAME_ORDER, False),
+        ("community.db", "get_top_chatters", "SELECT id, name, messages FROM chatters WHERE 1=1", [], CHATTER_ORDER, True),
+    ]:
+        query, params = keyset_query(query, params, order_by, descending=descending)
+        entries.append((db_name, tool_name, query, params))
+
+    # Name searches are generated, so explain both the indexed and LIKE forms
+    with pooled_connection("world.db") as conn:
+        for tool_name, table, filters in [
+            ("search_countries", "countries", {}),
+            ("search_cities", "cities", {"country_code": "US"}),
+            ("search_states", "states", {"country_code": "US"}),
+        ]:
+            for name in ("Sa", "San"):
+                query, params, order_by = name_search_query(conn, table, name, filters)
+                query, params = keyset_query(query, params, order_by, page_size=30)
+                entries.append(("world.db", tool_name, query, params))
+
+    return entries
+
+
+def advise_indexes(db_name: str = "world.db") -> List[Dict[str, Any]]:
+    """
+    Run EXPLAIN QUERY PLAN over every tool query against db_name.
+
+    Returns:
+        One report per query listing its plan, full table scans and
+        whether it needs a temporary B-tree for sorting or grouping
+    """
+    reports = []
+    queries = tool_queries()
+    with pooled_connection(db_name) as conn:
+        for query_db, tool_name, query, params in queries:
+            if query_db != db_name:
+                continue
+            report = {"tool": tool_name, "query": query}
+            try:
+                plan = [
+                    row["detail"]
+                    for row in conn.execute(f"EXPLAIN QUERY PLAN {query}", params)
+                ]
+            except sqlite3.Error as e:
+                report["error"] = str(e)
+                reports.append(report)
+                continue
+
+            report["plan"] = plan
+            report["full_scans"] = [
+                detail
+                for detail in plan
+                if detail.startswith("SCAN ")
+                and "VIRTUAL TABLE" not in detail
+                and "COVERING INDEX" not in detail
+            ]
+            report["temp_btree"] = any("TEMP B-TREE" in detail for detail in plan)
+            reports.append(report)
+
+    return reports
+
+
+def create_recommended_indexes(db_name: str = "world.db") -> List[str]:
+    """
+    Create any missing recommended indexes for db_name and refresh statistics.
+
+    Returns:
+        Names of the indexes that were newly created
+    """
+    statements = RECOMMENDED_INDEXES.get(db_name, [])
+    if not statements:
+        return []
+
+    # Pooled world.db connections are read-only, so migrate over a direct connection
+    conn = sqlite3.connect(DB_PATH + db_name)
+    try:
+        existing = {
+            row[0]
+            for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")
+        }
+        with conn:
+            for statement in statements:
+                conn.execute(statement)
+        created = [
+            row[0]
+            for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")
+            if row[0] not in existing
+        ]
+        if created:
+            conn.execute("ANALYZE")
+    finally:
+        conn.close()
+
+    return created
+
+
+# =============================================================================
+# CHATTER LEADERBOARD
+# =============================================================================
+
+LEADERBOARD_QUERY = (
+    "SELECT id, name, messages FROM chatters WHERE messages >= ? "
+    "ORDER BY messages DESC, id DESC LIMIT ? OFFSET ?"
+)
+RANK_QUERY = "SELECT COUNT(*) FROM chatters WHERE messages > ?"
+
+
+def ranked(rows: List[tuple], first_rank: int, offset: int) -> List[Dict[str, Any]]:
+    """
+    Attach competition ranks (ties share a rank, the next rank skips) to
+    leaderboard rows, given the rank of the first row and its position.
+    """
+    items = []
+    for position, (chatter_id, name, messages) in enumerate(rows, start=offset + 1):
+        if not items:
+            rank = first_rank
+        elif messages != items[-1]["messages"]:
+            rank = position
+        else:
+            rank = items[-1]["rank"]
+        items.append({"rank": rank, "id": chatter_id, "name": name, "messages": messages})
+    return items
+
+
+def leaderboard_from_db(
+    conn: sqlite3.Connection, limit: int, offset: int, min_messages: int
+) -> List[Dict[str, Any]]:
+    """Top chatters straight from community.db, walking idx_chatters_messages_id."""
+    rows = [tuple(row) for row in conn.execute(LEADERBOARD_QUERY, [min_messages, limit, offset])]
+    if not rows:
+        return []
+    ahead = conn.execute(RANK_QUERY, [rows[0][2]]).fetchone()[0]
+    return ranked(rows, ahead + 1, offset)
+
+
+def chatter_rank_from_db(conn: sqlite3.Connection, chatter_id: int) -> Dict[str, Any]:
+    """One chatter's messages and competition rank, or {} if there is no such chatter."""
+    row = conn.execute(
+        "SELECT id, name, messages FROM chatters WHERE id = ?", [chatter_id]
+    ).fetchone()
+    if row is None:
+        return {}
+    ahead = conn.execute(RANK_QUERY, [row["messages"]]).fetchone()[0]
+    return {"rank": ahead + 1, "id": row["id"], "name": row["name"], "messages": row["messages"]}
+
+
+class IndexableSkipList:
+    """
+    Sorted sequence of unique keys with O(log n) expected insert, remove,
+    bisect and positional access.
+
+    A skip list whose links also record how many positions they skip, so
+    the position of a key is the sum of the widths walked to reach it.
+    """
+
+    MAX_LEVELS = 32
+
+    class _Node:
+        __slots__ = ("key", "next", "width")
+
+        def __init__(self, key, levels: int):
+            self.key = key
+            self.next = [None] * levels
+            self.width = [1] * levels  # Positions skipped by each link
+
+    def __init__(self, keys=()):
+        self._head = self._Node(None, self.MAX_LEVELS)
+        self._size = 0
+        for key in sorted(keys):
+            self.insert(key)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def bisect_left(self, key) -> int:
+        """Number of keys less than key."""
+        node, position = self._head, 0
+        for level in reversed(range(self.MAX_LEVELS)):
+            while node.next[level] is not None and node.next[level].key < key:
+                position += node.width[level]
+                node = node.next[level]
+        return position
+
+    def insert(self, key) -> None:
+        chain = [None] * self.MAX_LEVELS
+        steps_at_level = [0] * self.MAX_LEVELS
+        node = self._head
+        for level in reversed(range(self.MAX_LEVELS)):
+            while node.next[level] is not None and node.next[level].key < key:
+                steps_at_level[level] += node.width[level]
+                node = node.next[level]
+            chain[level] = node
+
+        # Each level up holds half as many nodes as the one below
+        levels = 1
+        while levels < self.MAX_LEVELS and random.random() < 0.5:
+            levels += 1
+        new = self._Node(key, levels)
+        steps = 0
+        for level in range(levels):
+            prev = chain[level]
+            new.next[level] = prev.next[level]
+            prev.next[level] = new
+            new.width[level] = prev.width[level] - steps
+            prev.width[level] = steps + 1
+            steps += steps_at_level[level]
+        for level in range(levels, self.MAX_LEVELS):
+            chain[level].width[level] += 1
+        self._size += 1
+
+    def remove(self, key) -> None:
+        """Remove key, raising KeyError if it is not present."""
+        chain = [None] * self.MAX_LEVELS
+        node = self._head
+        for level in reversed(range(self.MAX_LEVELS)):
+            while node.next[level] is not None and node.next[level].key < key:
+                node = node.next[level]
+            chain[level] = node
+
+        target = node.next[0]
+        if target is None or target.key != key:
+            raise KeyError(key)
+        for level in range(len(target.next)):
+            prev = chain[level]
+            prev.width[level] += target.width[level] - 1
+            prev.next[level] = target.next[level]
+        for level in range(len(target.next), self.MAX_LEVELS):
+            chain[level].width[level] -= 1
+        self._size -= 1
+
+    def slice(self, start: int, stop: int) -> List[Any]:
+        """Keys at positions start .. stop - 1."""
+        stop = min(stop, self._size)
+        if start >= stop:
+            return []
+        # Walk to the key at start (position start + 1, the head being position 0)
+        node, remaining = self._head, start + 1
+        for level in reversed(range(self.MAX_LEVELS)):
+            while node.next[level] is not None and node.width[level] <= remaining:
+                remaining -= node.width[level]
+                node = node.next[level]
+        keys = []
+        while node is not None and len(keys) < stop - start:
+            keys.append(node.key)
+            node = node.next[0]
+        return keys
+
+
+class ChatterLeaderboard:
+    """
+    Every chatter ranked in memory, kept in step with community.db.
+
+    Entries are (-messages, -id) keys in an IndexableSkipList, which is the
+    leaderboard order: moving a chatter and a rank lookup are O(log n), and
+    a top-K read is O(log n + K). refresh() asks SQLite whether another connection has
+    committed since the last sync (PRAGMA data_version on a long-lived
+    connection); if so, only rows whose last_message_at is at or past the
+    newest one already seen are re-read and moved. Deleted chatters show up
+    as a change in the table's row count or id total, and counts changed
+    without a new message (corrections, backfills) as a change in its
+    message total; either triggers a full reload.
+    """
+
+    def __init__(self, db_name: str = "community.db"):
+        self.db_name = db_name
+        self._keys = IndexableSkipList()  # (-messages, -id)
+        self._chatters: Dict[int, tuple] = {}  # id -> (name, messages)
+        self._id_total = 0  # Sum of the ids in _chatters
+        self._message_total = 0  # Sum of their message counts
+        self._high_water = ""  # Largest last_message_at loaded
+        self._conn: Optional[sqlite3.Connection] = None
+        self._data_version = None
+        self._lock = threading.RLock()
+        self.loaded_at: Optional[float] = None
+        self.full_loads = 0
+        self.incremental_syncs = 0
+        self.updates = 0
+
+    def update(self, chatter_id: int, name: str, messages: int) -> None:
+        """Insert a chatter or move it to its new place after a message count change."""
+        with self._lock:
+            current = self._chatters.get(chatter_id)
+            if current is not None:
+                if current == (name, messages):
+                    return
+                self._keys.remove((-current[1], -chatter_id))
+                self._message_total -= current[1]
+            else:
+                self._id_total += chatter_id
+            self._chatters[chatter_id] = (name, messages)
+            self._message_total += messages
+            self._keys.insert((-messages, -chatter_id))
+            self.updates += 1
+
+    def refresh(self) -> None:
+        """Catch up with community.db if it has been written to since the last sync."""
+        with self._lock:
+            if self._conn is None:
+                # A direct connection: a full load of a large table can outlast
+                # QUERY_TIMEOUT, and data_version is only meaningful on one connection
+                self._conn = sqlite3.connect(DB_PATH + self.db_name, check_same_thread=False)
+            data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+            if data_version == self._data_version:
+                return
+            if self.loaded_at is None:
+                self._load(self._conn)
+            else:
+                self._sync(self._conn)
+            self._data_version = data_version
+            self.loaded_at = time.time()
+
+    def top(self, limit: int, offset: int = 0, min_messages: int = 0) -> List[Dict[str, Any]]:
+        """
+        Chatters at positions offset+1 .. offset+limit with at least min_messages,
+        as of the last refresh().
+        """
+        with self._lock:
+            # Keys with -messages <= -min_messages are the ones with enough messages
+            end = min(offset + limit, self._keys.bisect_left((-min_messages + 1,)))
+            keys = self._keys.slice(offset, end)
+            if not keys:
+                return []
+            rows = [(-key[1], self._chatters[-key[1]][0], -key[0]) for key in keys]
+            first_rank = self._keys.bisect_left((keys[0][0],)) + 1
+        return ranked(rows, first_rank, offset)
+
+    def rank(self, chatter_id: int) -> Dict[str, Any]:
+        """
+        One chatter's messages and competition rank as of the last refresh(),
+        or {} if there is no such chatter.
+        """
+        with self._lock:
+            chatter = self._chatters.get(chatter_id)
+            if chatter is None:
+                return {}
+            name, messages = chatter
+            return {
+                "rank": self._keys.bisect_left((-messages,)) + 1,
+                "id": chatter_id,
+                "name": name,
+                "messages": messages,
+            }
+
+    def stats(self) -> Dict[str, Any]:
+        """Return size and sync counters."""
+        with self._lock:
+            return {
+                "chatters": len(self._keys),
+                "full_loads": self.full_loads,
+                "incremental_syncs": self.incremental_syncs,
+                "updates": self.updates,
+                "loaded_at": self.loaded_at,
+            }
+
+    def _load(self, conn: sqlite3.Connection) -> None:
+        chatters, keys, high_water = {}, [], ""
+        cursor = conn.execute("SELECT id, name, messages, last_message_at FROM chatters")
+        for chatter_id, name, messages, last_message_at in stream_rows(cursor, 10000):
+            chatters[chatter_id] = (name, messages)
+            keys.append((-messages, -chatter_id))
+            high_water = max(high_water, last_message_at or "")
+        self._chatters, self._keys, self._high_water = chatters, IndexableSkipList(keys), high_water
+        self._id_total = sum(chatters)
+        self._message_total = sum(messages for _, messages in chatters.values())
+        self.full_loads += 1
+
+    def _sync(self, conn: sqlite3.Connection) -> None:
+        # >= so rows written later within the same timestamp are not missed
+        cursor = conn.execute(
+            "SELECT id, name, messages, last_message_at FROM chatters WHERE last_message_at >= ?",
+            [self._high_water],
+        )
+        for chatter_id, name, messages, last_message_at in stream_rows(cursor):
+            self.update(chatter_id, name, messages)
+            self._high_water = max(self._high_water, last_message_at or "")
+        self.incremental_syncs += 1
+
+        # New rows get ids past the current maximum, so a delete followed by
+        # an insert changes the id total even when the count is unchanged;
+        # the message total catches counts corrected without a new message
+        totals = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(id), 0), COALESCE(SUM(messages), 0) FROM chatters"
+        ).fetchone()
+        if tuple(totals) != (len(self._keys), self._id_total, self._message_total):
+            self._load(conn)
+
+
+_chatter_leaderboard: Optional[ChatterLeaderboard] = None
+_chatter_leaderboard_lock = threading.Lock()
+
+
+def chatter_leaderboard() -> ChatterLeaderboard:
+    """Return the shared in-memory leaderboard, loading it on first use."""
+    global _chatter_leaderboard
+    with _chatter_leaderboard_lock:
+        if _chatter_leaderboard is None:
+            _chatter_leaderboard = ChatterLeaderboard()
+        board = _chatter_leaderboard
+    board.refresh()
+    return board
+
+
 @mcp.tool()
-def search_countries(name: str = "") -> List[Dict[str, Any]]:
+@coalesced()
+@offload()
+def search_countries(
+    name: str = "",
+    cursor: str = "",
+    page_size: int = 20,
+    fields: Optional[List[str]] = None,
+    compact: bool = False,
+) -> Dict[str, Any]:
     """
     Search for countries by name.
 
     Args:
         name: Country name to search for (partial matches allowed)
+        cursor: next_cursor from a previous page to continue from (optional)
+        page_size: Maximum number of countries per page (default 20)
+        fields: Columns to return, e.g. ["name", "iso2"] (optional, default all)
+        compact: Return {"columns", "rows"} with each row as a list instead of dicts
 
     Returns:
-        List of countries matching the search
+        Page of countries matching the search as {"items", "next_cursor"}
+        (or {"columns", "rows", "next_cursor"} when compact)
     """
-    conn = get_db_connection(db_name="world.db")
+    with pooled_connection("world.db") as conn:
+        select = select_list(conn, "countries", fields)
+        query, params, order_by = name_search_query(conn, "countries", name, {}, select)
+        page = fetch_page(
+            conn, query, params, order_by, cursor, page_size, fields=fields, compact=compact
+        )
 
-    if name:
-        query = "SELECT * FROM countries WHERE name LIKE ? ORDER BY name LIMIT 20"
-        params = [f"%{name}%"]
-    else:
-        query = "SELECT * FROM countries ORDER BY name LIMIT 20"
-        params = []
-
-    cursor = conn.execute(query, params)
-    results = dicts_from_rows(cursor.fetchall())
-    conn.close()
-
-    return results
+    return page
 
 
 @mcp.tool()
-def get_countries(name: str = "") -> List[Dict[str, Any]]:
+@coalesced()
+@offload()
+def get_countries(
+    name: str = "",
+    cursor: str = "",
+    page_size: Optional[int] = None,
+    fields: Optional[List[str]] = None,
+    compact: bool = False,
+) -> Dict[str, Any]:
     """
     Simple country search by name.
 
     Args:
         name: Country name to search for. This is optional. Default, return all countries from the database.
+        cursor: next_cursor from a previous page to continue from (optional)
+        page_size: Maximum number of countries per page (default 10 when searching, otherwise 197)
+        fields: Columns to return, e.g. ["name", "iso2"] (optional, default all)
+        compact: Return {"columns", "rows"} with each row as a list instead of dicts
 
     Returns:
-        List of matching countries
+        Page of matching countries as {"items", "next_cursor"}
+        (or {"columns", "rows", "next_cursor"} when compact)
     """
-    conn = get_db_connection(db_name="world.db")
-
-    if name:
-        print(f"Searching for countries with name: '{name}'")
-        query = "SELECT * FROM countries WHERE name LIKE ? ORDER BY name LIMIT 10"
-        params = [f"%{name}%"]
-    else:
-        print("No name provided, returning first 10 countries")
-        query = "SELECT * FROM countries ORDER BY name LIMIT 197"
-        params = []
-
-    print(f"Query: {query}")
-    print(f"Params: {params}")
+    with pooled_connection("world.db") as conn:
+        select = select_list(conn, "countries", fields)
+        if name:
+            query, params, order_by = name_search_query(conn, "countries", name, {}, select)
+            page_size = page_size or 10
+        else:
+            query, params, order_by = f"SELECT {select} FROM countries WHERE 1=1", [], NAME_ORDER
+            page_size = page_size or 197
 
-    cursor = conn.execute(query, params)
-    results = dicts_from_rows(cursor.fetchall())
-    conn.close()
+        page = fetch_page(
+            conn, query, params, order_by, cursor, page_size, fields=fields, compact=compact
+        )
 
-    print(f"Found {len(results)} results")
-    return results
+    return page
 
 
 @mcp.tool()
+@cached(ttl=600.0, max_size=512, normalize={"country_code": str.upper})
+@coalesced(normalize={"country_code": str.upper})
+@offload()
 def get_country(country_code: str) -> Dict[str, Any]:
     """
     Get detailed information about a specific country.
@@ -94,59 +1931,117 @@ def get_country(country_code: str) -> Dict[str, Any]:
     Returns:
         Complete country information
     """
-    conn = get_db_connection(db_name="world.db")
-
-    cursor = conn.execute(
-        "SELECT * FROM countries WHERE iso2 = ?", [country_code.upper()]
-    )
-    result = cursor.fetchone()
-    conn.close()
+    with pooled_connection("world.db") as conn:
+        cursor = conn.execute(
+            "SELECT * FROM countries WHERE iso2 = ?", [country_code.upper()]
+        )
+        result = cursor.fetchone()
 
     return dict_from_row(result) if result else {}
 
 
 @mcp.tool()
-def get_countries_by_region(region: str) -> List[Dict[str, Any]]:
+@coalesced()
+@offload()
+def get_countries_batch(codes: List[str]) -> Dict[str, Any]:
+    """
+    Get detailed information about many countries in one call.
+
+    Args:
+        codes: Two-letter ISO country codes (e.g., ["US", "GB", "FR"])
+
+    Returns:
+        Mapping of each requested code to its country, or null if unknown
+    """
+    codes = normalize_codes(codes)
+
+    with pooled_connection("world.db") as conn:
+        cursor = conn.execute(
+            "SELECT * FROM countries WHERE iso2 IN (SELECT value FROM json_each(?))",
+            [json.dumps(codes)],
+        )
+        found = {row["iso2"]: dict(row) for row in cursor.fetchall()}
+
+    return {code: found.get(code) for code in codes}
+
+
+@mcp.tool()
+@coalesced()
+@offload()
+def get_countries_by_region(
+    region: str,
+    cursor: str = "",
+    page_size: int = 100,
+    fields: Optional[List[str]] = None,
+    compact: bool = False,
+) -> Dict[str, Any]:
     """
     Get all countries in a specific region.
 
     Args:
         region: Region name (e.g., "Europe", "Asia", "Africa")
+        cursor: next_cursor from a previous page to continue from (optional)
+        page_size: Maximum number of countries per page (default 100)
+        fields: Columns to return, e.g. ["name", "iso2"] (optional, default all)
+        compact: Return {"columns", "rows"} with each row as a list instead of dicts
 
     Returns:
-        List of countries in the region
+        Page of countries in the region as {"items", "next_cursor"}
+        (or {"columns", "rows", "next_cursor"} when compact)
     """
-    conn = get_db_connection(db_name="world.db")
+    with pooled_connection("world.db") as conn:
+        page = fetch_page(
+            conn,
+            f"SELECT {select_list(conn, 'countries', fields)} FROM countries WHERE region LIKE ?",
+            [f"%{region}%"],
+            NAME_ORDER,
+            cursor,
+            page_size,
+            fields=fields,
+            compact=compact,
+        )
 
-    cursor = conn.execute(
-        "SELECT * FROM countries WHERE region LIKE ? ORDER BY name", [f"%{region}%"]
-    )
-    results = dicts_from_rows(cursor.fetchall())
-    conn.close()
-
-    return results
+    return page
 
 
 @mcp.tool()
-def get_countries_by_currency(currency: str) -> List[Dict[str, Any]]:
+@cached(ttl=600.0, max_size=256, normalize={"currency": str.upper})
+@coalesced(normalize={"currency": str.upper})
+@offload()
+def get_countries_by_currency(
+    currency: str,
+    cursor: str = "",
+    page_size: int = 100,
+    fields: Optional[List[str]] = None,
+    compact: bool = False,
+) -> Dict[str, Any]:
     """
     Find all countries that use a specific currency.
 
     Args:
         currency: Currency code (e.g., "USD", "EUR", "GBP")
+        cursor: next_cursor from a previous page to continue from (optional)
+        page_size: Maximum number of countries per page (default 100)
+        fields: Columns to return, e.g. ["name", "iso2"] (optional, default all)
+        compact: Return {"columns", "rows"} with each row as a list instead of dicts
 
     Returns:
-        List of countries using the currency
+        Page of countries using the currency as {"items", "next_cursor"}
+        (or {"columns", "rows", "next_cursor"} when compact)
     """
-    conn = get_db_connection(db_name="world.db")
-
-    cursor = conn.execute(
-        "SELECT * FROM countries WHERE currency = ? ORDER BY name", [currency.upper()]
-    )
-    results = dicts_from_rows(cursor.fetchall())
-    conn.close()
+    with pooled_connection("world.db") as conn:
+        page = fetch_page(
+            conn,
+            f"SELECT {select_list(conn, 'countries', fields)} FROM countries WHERE currency = ?",
+            [currency.upper()],
+            NAME_ORDER,
+            cursor,
+            page_size,
+            fields=fields,
+            compact=compact,
+        )
 
-    return results
+    return page
 
 
 # =============================================================================
@@ -155,60 +2050,119 @@ def get_countries_by_currency(currency: str) -> List[Dict[str, Any]]:
 
 
 @mcp.tool()
-def search_cities(name: str = "", country_code: str = "") -> List[Dict[str, Any]]:
+@coalesced()
+@offload(max_concurrency=2)
+def search_cities(
+    name: str = "",
+    country_code: str = "",
+    cursor: str = "",
+    page_size: int = 30,
+    fields: Optional[List[str]] = None,
+    compact: bool = False,
+) -> Dict[str, Any]:
     """
     Search for cities by name and optionally filter by country.
 
     Args:
         name: City name to search for (partial matches allowed)
         country_code: Two-letter country code to filter by (optional)
+        cursor: next_cursor from a previous page to continue from (optional)
+        page_size: Maximum number of cities per page (default 30)
+        fields: Columns to return, e.g. ["name", "latitude", "longitude"] (optional, default all)
+        compact: Return {"columns", "rows"} with each row as a list instead of dicts
 
     Returns:
-        List of cities matching the search criteria
+        Page of cities matching the search criteria as {"items", "next_cursor"}
+        (or {"columns", "rows", "next_cursor"} when compact)
     """
-    conn = get_db_connection(db_name="world.db")
-
-    query = "SELECT * FROM cities WHERE 1=1"
-    params = []
+    filters = {"country_code": country_code.upper()} if country_code else {}
 
-    if name:
-        query += " AND name LIKE ?"
-        params.append(f"%{name}%")
+    with pooled_connection("world.db") as conn:
+        select = select_list(conn, "cities", fields)
+        query, params, order_by = name_search_query(conn, "cities", name, filters, select)
+        page = fetch_page(
+            conn, query, params, order_by, cursor, page_size, fields=fields, compact=compact
+        )
 
-    if country_code:
-        query += " AND country_code = ?"
-        params.append(country_code.upper())
-
-    query += " ORDER BY name LIMIT 30"
-
-    cursor = conn.execute(query, params)
-    results = dicts_from_rows(cursor.fetchall())
-    conn.close()
-
-    return results
+    return page
 
 
 @mcp.tool()
-def get_cities_in_country(country_code: str, limit: int = 50) -> List[Dict[str, Any]]:
+@coalesced()
+@offload()
+def get_cities_in_country(
+    country_code: str,
+    limit: int = 50,
+    cursor: str = "",
+    fields: Optional[List[str]] = None,
+    compact: bool = False,
+) -> Dict[str, Any]:
     """
     Get cities in a specific country.
 
     Args:
         country_code: Two-letter country code (e.g., "US", "GB", "FR")
-        limit: Maximum number of cities to return (default 50)
+        limit: Maximum number of cities to return per page (default 50)
+        cursor: next_cursor from a previous page to continue from (optional)
+        fields: Columns to return, e.g. ["name", "latitude", "longitude"] (optional, default all)
+        compact: Return {"columns", "rows"} with each row as a list instead of dicts
 
     Returns:
-        List of cities in the country
+        Page of cities in the country as {"items", "next_cursor"}
+        (or {"columns", "rows", "next_cursor"} when compact)
     """
-    conn = get_db_connection(db_name="world.db")
+    with pooled_connection("world.db") as conn:
+        page = fetch_page(
+            conn,
+            f"SELECT {select_list(conn, 'cities', fields)} FROM cities WHERE country_code = ?",
+            [country_code.upper()],
+            NAME_ORDER,
+            cursor,
+            limit,
+            fields=fields,
+            compact=compact,
+        )
+
+    return page
 
-    cursor = conn.execute(
-        "SELECT * FROM cities WHERE country_code = ? ORDER BY name LIMIT ?",
-        [country_code.upper(), limit],
-    )
-    results = dicts_from_rows(cursor.fetchall())
-    conn.close()
 
+@mcp.tool()
+@coalesced()
+@offload()
+def get_cities_in_countries(
+    codes: List[str], limit_per_country: int = 50
+) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Get cities for many countries in one call.
+
+    Args:
+        codes: Two-letter country codes (e.g., ["US", "GB", "FR"])
+        limit_per_country: Maximum number of cities per country (default 50)
+
+    Returns:
+        Mapping of each requested code to its cities, ordered by name
+    """
+    codes = normalize_codes(codes)
+    limit_per_country = max(1, min(limit_per_country, MAX_PAGE_SIZE))
+
+    with pooled_connection("world.db") as conn:
+        cursor = conn.execute(
+            """SELECT * FROM (
+                   SELECT cities.*, ROW_NUMBER() OVER (
+                       PARTITION BY cities.country_code ORDER BY cities.name, cities.id
+                   ) AS position
+                   FROM cities
+                   WHERE cities.country_code IN (SELECT value FROM json_each(?))
+               )
+               WHERE position <= ?
+               ORDER BY country_code, position""",
+            [json.dumps(codes), limit_per_country],
+        )
+        results = group_rows(cursor.fetchall(), "country_code", codes)
+
+    for cities in results.values():
+        for city in cities:
+            del city["position"]
     return results
 
 
@@ -218,58 +2172,104 @@ def get_cities_in_country(country_code: str, limit: int = 50) -> List[Dict[str,
 
 
 @mcp.tool()
-def search_states(name: str = "", country_code: str = "") -> List[Dict[str, Any]]:
+@coalesced()
+@offload()
+def search_states(
+    name: str = "",
+    country_code: str = "",
+    cursor: str = "",
+    page_size: int = 30,
+    fields: Optional[List[str]] = None,
+    compact: bool = False,
+) -> Dict[str, Any]:
     """
     Search for states/provinces by name and optionally filter by country.
 
     Args:
         name: State/province name to search for (partial matches allowed)
         country_code: Two-letter country code to filter by (optional)
+        cursor: next_cursor from a previous page to continue from (optional)
+        page_size: Maximum number of states/provinces per page (default 30)
+        fields: Columns to return, e.g. ["name", "country_code"] (optional, default all)
+        compact: Return {"columns", "rows"} with each row as a list instead of dicts
 
     Returns:
-        List of states/provinces matching the search criteria
+        Page of states/provinces matching the search criteria as {"items", "next_cursor"}
+        (or {"columns", "rows", "next_cursor"} when compact)
     """
-    conn = get_db_connection(db_name="world.db")
+    filters = {"country_code": country_code.upper()} if country_code else {}
 
-    query = "SELECT * FROM states WHERE 1=1"
-    params = []
+    with pooled_connection("world.db") as conn:
+        select = select_list(conn, "states", fields)
+        query, params, order_by = name_search_query(conn, "states", name, filters, select)
+        page = fetch_page(
+            conn, query, params, order_by, cursor, page_size, fields=fields, compact=compact
+        )
 
-    if name:
-        query += " AND name LIKE ?"
-        params.append(f"%{name}%")
+    return page
 
-    if country_code:
-        query += " AND country_code = ?"
-        params.append(country_code.upper())
 
-    query += " ORDER BY name LIMIT 30"
+@mcp.tool()
+@coalesced()
+@offload()
+def get_states_in_country(
+    country_code: str,
+    cursor: str = "",
+    page_size: int = 100,
+    fields: Optional[List[str]] = None,
+    compact: bool = False,
+) -> Dict[str, Any]:
+    """
+    Get all states/provinces in a specific country.
 
-    cursor = conn.execute(query, params)
-    results = dicts_from_rows(cursor.fetchall())
-    conn.close()
+    Args:
+        country_code: Two-letter country code (e.g., "US", "CA", "AU")
+        cursor: next_cursor from a previous page to continue from (optional)
+        page_size: Maximum number of states/provinces per page (default 100)
+        fields: Columns to return, e.g. ["name", "country_code"] (optional, default all)
+        compact: Return {"columns", "rows"} with each row as a list instead of dicts
 
-    return results
+    Returns:
+        Page of states/provinces in the country as {"items", "next_cursor"}
+        (or {"columns", "rows", "next_cursor"} when compact)
+    """
+    with pooled_connection("world.db") as conn:
+        page = fetch_page(
+            conn,
+            f"SELECT {select_list(conn, 'states', fields)} FROM states WHERE country_code = ?",
+            [country_code.upper()],
+            NAME_ORDER,
+            cursor,
+            page_size,
+            fields=fields,
+            compact=compact,
+        )
+
+    return page
 
 
 @mcp.tool()
-def get_states_in_country(country_code: str) -> List[Dict[str, Any]]:
+@coalesced()
+@offload()
+def get_states_in_countries(codes: List[str]) -> Dict[str, List[Dict[str, Any]]]:
     """
-    Get all states/provinces in a specific country.
+    Get all states/provinces for many countries in one call.
 
     Args:
-        country_code: Two-letter country code (e.g., "US", "CA", "AU")
+        codes: Two-letter country codes (e.g., ["US", "CA", "AU"])
 
     Returns:
-        List of states/provinces in the country
+        Mapping of each requested code to its states/provinces, ordered by name
     """
-    conn = get_db_connection(db_name="world.db")
+    codes = normalize_codes(codes)
 
-    cursor = conn.execute(
-        "SELECT * FROM states WHERE country_code = ? ORDER BY name",
-        [country_code.upper()],
-    )
-    results = dicts_from_rows(cursor.fetchall())
-    conn.close()
+    with pooled_connection("world.db") as conn:
+        cursor = conn.execute(
+            "SELECT * FROM states WHERE country_code IN (SELECT value FROM json_each(?)) "
+            "ORDER BY country_code, name, id",
+            [json.dumps(codes)],
+        )
+        results = group_rows(cursor.fetchall(), "country_code", codes)
 
     return results
 
@@ -280,6 +2280,9 @@ def get_states_in_country(country_code: str) -> List[Dict[str, Any]]:
 
 
 @mcp.tool()
+@cached(ttl=3600.0, max_size=1)
+@coalesced()
+@offload()
 def get_all_regions() -> List[Dict[str, Any]]:
     """
     Get all world regions.
@@ -287,16 +2290,16 @@ def get_all_regions() -> List[Dict[str, Any]]:
     Returns:
         List of all regions
     """
-    conn = get_db_connection(db_name="world.db")
-
-    cursor = conn.execute("SELECT * FROM regions ORDER BY name")
-    results = dicts_from_rows(cursor.fetchall())
-    conn.close()
+    with pooled_connection("world.db") as conn:
+        cursor = conn.execute("SELECT * FROM regions ORDER BY name")
+        results = dicts_from_rows(cursor.fetchall())
 
     return results
 
 
 @mcp.tool()
+@coalesced()
+@offload()
 def get_subregions_in_region(region_id: int) -> List[Dict[str, Any]]:
     """
     Get all subregions within a specific region.
@@ -307,13 +2310,11 @@ def get_subregions_in_region(region_id: int) -> List[Dict[str, Any]]:
     Returns:
         List of subregions in the region
     """
-    conn = get_db_connection(db_name="world.db")
-
-    cursor = conn.execute(
-        "SELECT * FROM subregions WHERE region_id = ? ORDER BY name", [region_id]
-    )
-    results = dicts_from_rows(cursor.fetchall())
-    conn.close()
+    with pooled_connection("world.db") as conn:
+        cursor = conn.execute(
+            "SELECT * FROM subregions WHERE region_id = ? ORDER BY name", [region_id]
+        )
+        results = dicts_from_rows(cursor.fetchall())
 
     return results
 
@@ -324,6 +2325,9 @@ def get_subregions_in_region(region_id: int) -> List[Dict[str, Any]]:
 
 
 @mcp.tool()
+@cached(ttl=3600.0, max_size=1)
+@coalesced()
+@offload(max_concurrency=2)
 def get_database_stats() -> Dict[str, int]:
     """
     Get statistics about the database contents.
@@ -331,22 +2335,22 @@ def get_database_stats() -> Dict[str, int]:
     Returns:
         Dictionary with counts of countries, cities, states, regions, and subregions
     """
-    conn = get_db_connection(db_name="world.db")
+    with pooled_connection("world.db") as conn:
+        stats = {}
 
-    stats = {}
-
-    # Count each table
-    tables = ["countries", "cities", "states", "regions", "subregions"]
-    for table in tables:
-        cursor = conn.execute(f"SELECT COUNT(*) as count FROM {table}")
-        stats[f"total_{table}"] = cursor.fetchone()["count"]
-
-    conn.close()
+        # Count each table
+        tables = ["countries", "cities", "states", "regions", "subregions"]
+        for table in tables:
+            cursor = conn.execute(f"SELECT COUNT(*) as count FROM {table}")
+            stats[f"total_{table}"] = cursor.fetchone()["count"]
 
     return stats
 
 
 @mcp.tool()
+@cached(ttl=3600.0, max_size=1)
+@coalesced()
+@offload()
 def get_countries_summary() -> List[Dict[str, Any]]:
     """
     Get a summary of all countries with basic information.
@@ -354,18 +2358,19 @@ def get_countries_summary() -> List[Dict[str, Any]]:
     Returns:
         List of countries with just name, code, capital, and region
     """
-    conn = get_db_connection(db_name="world.db")
-
-    cursor = conn.execute(
-        "SELECT name, iso2, capital, region FROM countries ORDER BY name"
-    )
-    results = dicts_from_rows(cursor.fetchall())
-    conn.close()
+    with pooled_connection("world.db") as conn:
+        cursor = conn.execute(
+            "SELECT name, iso2, capital, region FROM countries ORDER BY name"
+        )
+        results = dicts_from_rows(cursor.fetchall())
 
     return results
 
 
 @mcp.tool()
+@cached(ttl=3600.0, max_size=1)
+@coalesced()
+@offload()
 def get_popular_currencies() -> List[Dict[str, Any]]:
     """
     Get the most commonly used currencies and how many countries use them.
@@ -373,39 +2378,198 @@ def get_popular_currencies() -> List[Dict[str, Any]]:
     Returns:
         List of currencies with usage counts, ordered by popularity
     """
-    conn = get_db_connection(db_name="world.db")
-
-    cursor = conn.execute(
-        """SELECT currency, currency_name, COUNT(*) as country_count
-           FROM countries 
-           WHERE currency IS NOT NULL
-           GROUP BY currency, currency_name
-           ORDER BY country_count DESC
-           LIMIT 20"""
-    )
-    results = dicts_from_rows(cursor.fetchall())
-    conn.close()
+    with pooled_connection("world.db") as conn:
+        cursor = conn.execute(
+            """SELECT currency, currency_name, COUNT(*) as country_count
+               FROM countries 
+               WHERE currency IS NOT NULL
+               GROUP BY currency, currency_name
+               ORDER BY country_count DESC
+               LIMIT 20"""
+        )
+        results = dicts_from_rows(cursor.fetchall())
 
     return results
 
 
 @mcp.tool()
-def get_top_chatters():
-    """Retrieve the top chatters sorted by number of messages."""
+@coalesced()
+@offload(max_concurrency=2)
+def get_top_chatters(cursor: str = "", page_size: int = 50) -> Dict[str, Any]:
+    """Retrieve the top chatters sorted by number of messages, one page at a time.
+
+    Args:
+        cursor: next_cursor from a previous page to continue from (optional)
+        page_size: Maximum number of chatters per page (default 50)
+    """
 
     # connect to db
-    conn = get_db_connection(db_name="community.db")
-    cursor = conn.cursor()
+    with pooled_connection("community.db") as conn:
+        # Fetch chatters sorted by messages, walking the leaderboard downwards
+        page = fetch_page(
+            conn,
+            "SELECT id, name, messages FROM chatters WHERE 1=1",
+            [],
+            CHATTER_ORDER,
+            cursor,
+            page_size,
+            descending=True,
+        )
 
-    # Execute the query to fetch chatters sorted by messages
-    cursor.execute("SELECT name, messages FROM chatters ORDER BY messages DESC")
-    results = cursor.fetchall()
-    conn.close()
+    return page
 
-    # Format the results as a list of dictionaries
-    chatters = [{"name": name, "messages": messages} for name, messages in results]
-    return chatters
+
+@mcp.tool()
+@coalesced()
+@offload(max_concurrency=2)
+def get_chatter_leaderboard(
+    limit: int = DEFAULT_LEADERBOARD_LIMIT, offset: int = 0, min_messages: int = 0
+) -> Dict[str, Any]:
+    """
+    Get the top chatters by number of messages, with their ranks.
+
+    Args:
+        limit: Number of chatters to return (default 25)
+        offset: Leaderboard positions to skip, for the next page (default 0)
+        min_messages: Only include chatters with at least this many messages
+
+    Returns:
+        {"items": chatters as {"rank", "id", "name", "messages"}, ordered by
+        messages descending (tied chatters share a rank), "source": "memory"
+        or "database"}
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    offset = max(offset, 0)
+
+    if CHATTER_LEADERBOARD_IN_MEMORY:
+        return {
+            "items": chatter_leaderboard().top(limit, offset, min_messages),
+            "source": "memory",
+        }
+
+    with pooled_connection("community.db") as conn:
+        items = leaderboard_from_db(conn, limit, offset, min_messages)
+
+    return {"items": items, "source": "database"}
+
+
+@mcp.tool()
+@coalesced()
+@offload(max_concurrency=2)
+def get_chatter_rank(chatter_id: int) -> Dict[str, Any]:
+    """
+    Get one chatter's position on the leaderboard.
+
+    Args:
+        chatter_id: The chatter's id
+
+    Returns:
+        The chatter's rank, id, name and message count, or an empty
+        object if there is no such chatter
+    """
+    if CHATTER_LEADERBOARD_IN_MEMORY:
+        return chatter_leaderboard().rank(chatter_id)
+
+    with pooled_connection("community.db") as conn:
+        return chatter_rank_from_db(conn, chatter_id)
+
+
+@mcp.tool()
+def get_execution_stats() -> Dict[str, Any]:
+    """
+    Get queueing, caching and timing metrics for the async tool executor.
+
+    Returns:
+        Per-tool concurrency, cache and coalescing counters, and connection pool occupancy
+        per database
+    """
+    with _pools_lock:
+        pools = {name: pool.stats() for name, pool in _pools.items()}
+
+    return {
+        "worker_threads": DB_WORKER_THREADS,
+        "tools": {name: limiter.stats() for name, limiter in _limiters.items()},
+        "caches": {name: cache.stats() for name, cache in _caches.items()},
+        "coalescing": {name: calls.stats() for name, calls in _in_flight.items()},
+        "pools": pools,
+        "json_encoder": json_codec.encoder_name(),
+        "slow_queries": slow_query_log.stats(),
+        "leaderboard": _chatter_leaderboard.stats() if _chatter_leaderboard else None,
+    }
+
+
+@mcp.tool()
+def get_slow_queries(limit: int = 10, order_by: str = "total") -> Dict[str, Any]:
+    """
+    List the slowest SQL statements seen since the server started.
+
+    Args:
+        limit: Maximum number of statements to return (default 10)
+        order_by: "total" for cumulative time (default), "max" for the worst
+            single run or "count" for the most frequently slow
+
+    Returns:
+        The slow and timeout thresholds, the log file, and per statement its
+        SQL, occurrence and timeout counts, total/avg/max milliseconds, last
+        parameters and tool, and EXPLAIN QUERY PLAN output
+    """
+    return {
+        "slow_threshold_ms": SLOW_QUERY_THRESHOLD * 1000,
+        "timeout_seconds": QUERY_TIMEOUT,
+        "log_file": slow_query_log.path,
+        "statements": slow_query_log.top(limit, order_by),
+    }
+
+
+# Render tool results with the shared JSON encoder (compact with --compact)
+json_codec.use_for_tools(mcp)
+# Per-call latency, SQL time, rows and response sizes (metrics://calls, /metrics on HTTP)
+instrumentation.instrument(mcp)
 
 
 if __name__ == "__main__":
+    if "--compact" in sys.argv:
+        json_codec.COMPACT_JSON = True
+
+    if "--build-search-index" in sys.argv:
+        rebuilt = build_search_index("world.db", force=True)
+        print(f"Rebuilt search index for: {', '.join(rebuilt)}")
+        sys.exit(0)
+
+    if "--advise-indexes" in sys.argv:
+        for report in advise_indexes("world.db") + advise_indexes("community.db"):
+            if report.get("error") or report["full_scans"] or report["temp_btree"]:
+                print(f"{report['tool']}: {report['query']}")
+                for detail in report.get("plan", [report.get("error")]):
+                    print(f"    {detail}")
+        sys.exit(0)
+
+    for db_name in RECOMMENDED_INDEXES:
+        try:
+            created = create_recommended_indexes(db_name)
+            if created:
+                print(f"Created indexes: {', '.join(created)}", file=sys.stderr)
+        except sqlite3.Error as e:
+            print(f"Could not create indexes on {db_name}: {e}", file=sys.stderr)
+
+    try:
+        build_search_index("world.db")
+    except sqlite3.Error as e:
+        # Searches fall back to LIKE scans without the index
+        print(f"Search index unavailable: {e}", file=sys.stderr)
+
+    if "--snapshot" in sys.argv and "world.db" not in SNAPSHOT_DATABASES:
+        SNAPSHOT_DATABASES.append("world.db")
+    for db_name in SNAPSHOT_DATABASES:
+        enable_snapshot(db_name)
+
+    if "--memory-leaderboard" in sys.argv:
+        CHATTER_LEADERBOARD_IN_MEMORY = True
+    if CHATTER_LEADERBOARD_IN_MEMORY:
+        try:
+            chatter_leaderboard()  # Load now rather than on the first call
+        except sqlite3.Error as e:
+            CHATTER_LEADERBOARD_IN_MEMORY = False
+            print(f"In-memory leaderboard unavailable: {e}", file=sys.stderr)
+
     mcp.run()
\ No newline at end of file
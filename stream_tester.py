@@ -1,6 +1,8 @@
 from mcp.server.fastmcp import FastMCP
 from random import choice
 
+import instrumentation
+
 mcp = FastMCP("Random Name Tester 2.0")
 
 
@@ -31,5 +33,8 @@ def get_random_name(names: list = None) -> str:
         return choice(default_names)
 
 
+instrumentation.instrument(mcp)
+
+
 if __name__ == "__main__":
     mcp.run(transport="streamable-http")
\ No newline at end of file
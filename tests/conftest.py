@@ -0,0 +1,37 @@
+import pytest
+
+import mcp_resources
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def library_store(request, tmp_path):
+    """A fresh library store seeded with LIBRARY_DATA, on each backend."""
+    if request.param == "sqlite":
+        library_store = mcp_resources.SQLiteLibraryStore(
+            str(tmp_path / "library.db"), seed=mcp_resources.LIBRARY_DATA
+        )
+    else:
+        library_store = mcp_resources.LibraryStore(mcp_resources.LIBRARY_DATA)
+    yield library_store
+    if request.param == "sqlite":
+        library_store._conn.close()
+
+
+@pytest.fixture
+def world_db(tmp_path, monkeypatch):
+    """sqlite_server pointed at a freshly generated 1x world.db and community.db."""
+    import benchmark
+    import sqlite_server
+
+    benchmark.generate_world_db(str(tmp_path / "world.db"), 1)
+    benchmark.generate_community_db(str(tmp_path / "community.db"), 1)
+    monkeypatch.setattr(sqlite_server, "DB_PATH", f"{tmp_path}/")
+    sqlite_server.close_all_pools()
+    for cache in sqlite_server._caches.values():
+        cache.clear()
+    yield tmp_path
+    sqlite_server.close_all_pools()
+    with sqlite_server._snapshots_lock:
+        for snapshot in sqlite_server._snapshots.values():
+            snapshot.close()
+        sqlite_server._snapshots.clear()
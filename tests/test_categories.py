@@ -0,0 +1,93 @@
+import asyncio
+import json
+
+import pytest
+
+import mcp_resources
+
+
+def add_book(library_store, book_id: str, category: str) -> None:
+    library_store.add_book(
+        {
+            "id": book_id,
+            "title": f"Book {book_id}",
+            "authors": [],
+            "isbn": None,
+            "category": category,
+            "publisher": None,
+            "publication_year": None,
+            "copies_total": 1,
+            "copies_available": 1,
+            "location": None,
+            "status": "available",
+            "last_updated": "2024-01-01T00:00:00Z",
+        }
+    )
+
+
+def slugs(library_store) -> dict:
+    return {
+        partition["name"]: partition["slug"]
+        for partition in library_store.category_partitions()
+    }
+
+
+def test_slugs_are_lowercase_and_hyphenated(library_store):
+    add_book(library_store, "X1", "History of the USA")
+    add_book(library_store, "X2", "Children's Books")
+
+    assert slugs(library_store)["Computer Science"] == "computer-science"
+    assert slugs(library_store)["History of the USA"] == "history-of-the-usa"
+    assert slugs(library_store)["Children's Books"] == "children-s-books"
+
+
+def test_colliding_names_get_numbered_slugs(library_store):
+    for book_id, category in [("X1", "C Programming"), ("X2", "C++ Programming"),
+                              ("X3", "C# Programming"), ("X4", "C++ Programming")]:
+        add_book(library_store, book_id, category)
+
+    assert {name: slug for name, slug in slugs(library_store).items() if "Programming" in name} == {
+        "C Programming": "c-programming",
+        "C++ Programming": "c-programming-2",
+        "C# Programming": "c-programming-3",
+    }
+    assert [book.id for book in library_store.books_in_category("c-programming-2")] == ["X2", "X4"]
+    assert [book.id for book in library_store.books_in_category("C# Programming")] == ["X3"]
+
+
+@pytest.mark.parametrize(
+    "category", ["software engineering", "SOFTWARE ENGINEERING", "Software-Engineering", "software-engineering"]
+)
+def test_lookup_ignores_case(library_store, category):
+    assert library_store.resolve_category(category) == ("Software Engineering", "software-engineering")
+    assert [book.id for book in library_store.books_in_category(category)] == ["B002"]
+
+
+def test_unknown_category(library_store):
+    assert library_store.resolve_category("Cooking") is None
+    assert library_store.books_in_category("Cooking") == []
+
+
+def test_slug_is_released_with_the_last_book(library_store):
+    add_book(library_store, "X1", "C++ Programming")
+    library_store.update_book("X1", category="Design")
+
+    assert "C++ Programming" not in slugs(library_store)
+    assert library_store.resolve_category("c-programming") is None
+    assert [book.id for book in library_store.books_in_category("design")] == ["B003", "X1"]
+
+
+def test_category_resource_is_cached_under_its_slug(monkeypatch):
+    library_store = mcp_resources.LibraryStore(mcp_resources.LIBRARY_DATA)
+    monkeypatch.setattr(mcp_resources, "store", library_store)
+    monkeypatch.setattr(mcp_resources, "response_cache", mcp_resources.ResponseCache())
+
+    async def read(uri: str) -> dict:
+        contents = await mcp_resources.mcp.read_resource(uri)
+        return json.loads(list(contents)[0].content)
+
+    for uri in ("library://category/DESIGN", "library://category/design", "library://category/Design"):
+        result = asyncio.run(read(uri))
+        assert (result["category"], result["book_count"]) == ("Design", 1)
+    assert list(mcp_resources.response_cache._entries) == ["library://category/design"]
+    assert asyncio.run(read("library://category/cooking"))["book_count"] == 0
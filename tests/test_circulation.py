@@ -0,0 +1,62 @@
+from datetime import datetime, timezone
+
+import pytest
+
+import mcp_resources
+
+
+def checkout_count(library_store) -> int:
+    return sum(
+        len(library_store.checkouts_for_member(member.id, active_only=False))
+        for member in library_store.all_members()
+    )
+
+
+def test_parse_timestamp_without_offset_is_utc():
+    moment = mcp_resources.parse_timestamp("2024-03-01T10:00:00")
+    assert moment == datetime(2024, 3, 1, 10, tzinfo=timezone.utc)
+
+
+def test_parse_timestamp_rejects_non_strings():
+    with pytest.raises(ValueError):
+        mcp_resources.parse_timestamp(1709287200)
+
+
+def test_batch_with_bad_events_leaves_store_consistent(library_store):
+    result = mcp_resources.apply_circulation_events(
+        library_store,
+        [
+            {"action": "checkout", "book_id": "B001", "member_id": "M002",
+             "timestamp": "2024-03-01T10:00:00"},
+            {"action": "checkout", "book_id": "B003", "member_id": "M002",
+             "timestamp": 1709287200},
+            {"action": "return", "checkout_id": "CO-MISSING"},
+        ],
+        atomic=False,
+    )
+
+    assert result["applied"] == 1
+    assert [error["index"] for error in result["errors"]] == [1, 2]
+    assert checkout_count(library_store) == 2
+    library_store.statistics(verify=True)
+    checkout = library_store.get_checkout(result["results"][0]["id"])
+    assert checkout.checkout_date == datetime(2024, 3, 1, 10, tzinfo=timezone.utc)
+    # Every member's checkouts can still be compared and listed
+    library_store.active_checkouts_by_member()
+    library_store.overdue_summary(mcp_resources.utc_now())
+
+
+def test_atomic_batch_with_bad_event_rolls_back(library_store):
+    before = library_store.statistics()
+    with pytest.raises(ValueError, match="no events were applied"):
+        mcp_resources.apply_circulation_events(
+            library_store,
+            [
+                {"action": "checkout", "book_id": "B001", "member_id": "M002"},
+                {"action": "checkout", "book_id": "B003", "member_id": "M002",
+                 "timestamp": "not a time"},
+            ],
+        )
+
+    assert library_store.statistics(verify=True) == before
+    assert checkout_count(library_store) == 1
@@ -0,0 +1,73 @@
+import random
+import sqlite3
+
+import pytest
+
+import sqlite_server
+
+
+def assert_matches_database(board, conn):
+    board.refresh()
+    expected = sqlite_server.leaderboard_from_db(conn, 500, 0, 0)
+    assert board.top(500) == expected
+    assert board.top(7, 5, 20) == sqlite_server.leaderboard_from_db(conn, 7, 5, 20)
+    for item in expected[:10]:
+        assert board.rank(item["id"]) == sqlite_server.chatter_rank_from_db(conn, item["id"])
+
+
+@pytest.fixture
+def community(world_db):
+    conn = sqlite3.connect(world_db / "community.db")
+    conn.row_factory = sqlite3.Row
+    board = sqlite_server.ChatterLeaderboard()
+    yield board, conn
+    if board._conn is not None:
+        board._conn.close()
+    conn.close()
+
+
+def test_message_count_corrected_without_new_message(community):
+    board, conn = community
+    assert_matches_database(board, conn)
+    with conn:
+        conn.execute("UPDATE chatters SET messages = 999999 WHERE id = 5")
+    assert_matches_database(board, conn)
+    assert board.rank(5)["rank"] == 1
+
+
+def test_delete_plus_insert(community):
+    board, conn = community
+    assert_matches_database(board, conn)
+    with conn:
+        conn.execute("DELETE FROM chatters WHERE id = 3")
+        conn.execute(
+            "INSERT INTO chatters (name, messages, last_message_at) VALUES ('New', 10, '2000-01-01')"
+        )
+    assert_matches_database(board, conn)
+
+
+def test_random_writes(community):
+    board, conn = community
+    rng = random.Random(7)
+    for step in range(60):
+        ids = [row[0] for row in conn.execute("SELECT id FROM chatters")]
+        action = rng.random()
+        with conn:
+            if action < 0.5:
+                conn.execute(
+                    "UPDATE chatters SET messages = messages + ?, last_message_at = ? WHERE id = ?",
+                    [rng.randint(1, 50), f"2100-01-01T00:00:{step:02d}", rng.choice(ids)],
+                )
+            elif action < 0.7:
+                conn.execute(
+                    "UPDATE chatters SET messages = ? WHERE id = ?",
+                    [rng.randint(0, 600), rng.choice(ids)],
+                )
+            elif action < 0.85:
+                conn.execute("DELETE FROM chatters WHERE id = ?", [rng.choice(ids)])
+            else:
+                conn.execute(
+                    "INSERT INTO chatters (name, messages, last_message_at) VALUES (?, ?, ?)",
+                    [f"c{step}", rng.randint(0, 600), f"2100-01-01T00:00:{step:02d}"],
+                )
+        assert_matches_database(board, conn)
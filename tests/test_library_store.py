@@ -0,0 +1,98 @@
+import asyncio
+import json
+import random
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import mcp_resources
+
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+MEMBERS = [member["id"] for member in mcp_resources.LIBRARY_DATA["members"]]
+BOOKS = [book["id"] for book in mcp_resources.LIBRARY_DATA["books"]]
+
+
+def all_checkouts(library_store) -> list:
+    return [
+        checkout
+        for member in library_store.all_members()
+        for checkout in library_store.checkouts_for_member(member.id, active_only=False)
+    ]
+
+
+def brute_force_overdue(library_store, moment: datetime) -> dict:
+    overdue = [
+        moment - checkout.due_date
+        for checkout in all_checkouts(library_store)
+        if checkout.status == "active" and checkout.due_date < moment
+    ]
+    return {"count": len(overdue), "total_days_overdue": sum(late.days for late in overdue)}
+
+
+def random_event(rng: random.Random, library_store, moment: datetime) -> dict:
+    action = rng.choice(["checkout", "checkout", "return", "renew", "reserve"])
+    event = {"action": action, "timestamp": moment.isoformat()}
+    if action in ("checkout", "reserve"):
+        event.update(book_id=rng.choice(BOOKS), member_id=rng.choice(MEMBERS))
+    else:
+        checkouts = [c for c in all_checkouts(library_store) if c.status == "active"]
+        event["checkout_id"] = rng.choice(checkouts).id if checkouts else "CO-NONE"
+    return event
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_random_circulation_keeps_statistics_exact(library_store, seed):
+    rng = random.Random(seed)
+    moment = START
+    for step in range(150):
+        moment += timedelta(hours=rng.randrange(1, 72), seconds=rng.randrange(86400))
+        events = [random_event(rng, library_store, moment) for _ in range(rng.randrange(1, 4))]
+        try:
+            mcp_resources.apply_circulation_events(library_store, events, atomic=rng.random() < 0.5)
+        except ValueError:
+            pass  # An atomic batch failed and was rolled back
+        library_store.statistics(verify=True)
+
+        probe = moment + timedelta(days=rng.randrange(-40, 60), seconds=rng.randrange(86400))
+        assert library_store.overdue_summary(probe) == brute_force_overdue(library_store, probe)
+
+
+def test_overdue_totals_survive_rolled_back_transactions():
+    library_store = mcp_resources.LibraryStore(mcp_resources.LIBRARY_DATA)
+    moment = datetime(2024, 3, 1, 9, tzinfo=timezone.utc)
+    mcp_resources.perform_checkout(library_store, "B001", "M002", now=moment)
+    mcp_resources.perform_checkout(library_store, "B003", "M002", now=moment + timedelta(hours=5))
+    later = moment + timedelta(days=45)
+    assert library_store.overdue_summary(later) == brute_force_overdue(library_store, later)
+
+    # Renewal and return inside a batch that fails, after the running totals
+    # already counted the checkouts they touch
+    checkout_id = next(c.id for c in all_checkouts(library_store) if c.book_id == "B001")
+    with pytest.raises(ValueError):
+        mcp_resources.apply_circulation_events(
+            library_store,
+            [
+                {"action": "renew", "checkout_id": checkout_id},
+                {"action": "return", "checkout_id": "CO001"},
+                {"action": "checkout", "book_id": "B004", "member_id": "M001"},
+                {"action": "return", "checkout_id": "CO-MISSING"},
+            ],
+        )
+    library_store.statistics(verify=True)
+    for probe in (later, moment, later + timedelta(days=400), moment + timedelta(days=30, hours=7)):
+        assert library_store.overdue_summary(probe) == brute_force_overdue(library_store, probe)
+
+
+def test_stats_resource_verifies_when_enabled(library_store, monkeypatch):
+    monkeypatch.setattr(mcp_resources, "store", library_store)
+    monkeypatch.setattr(mcp_resources, "LIBRARY_STATS_VERIFY", True)
+
+    def read() -> dict:
+        contents = asyncio.run(mcp_resources.mcp.read_resource("library://stats"))
+        return json.loads(list(contents)[0].content)
+
+    mcp_resources.perform_checkout(library_store, "B001", "M002")
+    assert read()["circulation_stats"]["active_checkouts"] == 2
+
+    library_store.stats.active_checkouts += 1  # Simulate a missed update
+    assert "drifted" in read()["error"]
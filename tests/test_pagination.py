@@ -0,0 +1,54 @@
+import asyncio
+import sqlite3
+
+import pytest
+
+import sqlite_server
+
+
+def call(tool: str, **arguments) -> dict:
+    _, structured = asyncio.run(sqlite_server.mcp.call_tool(tool, arguments))
+    return structured["result"]
+
+
+def walk(tool: str, **arguments) -> list:
+    """Every item of a keyset-paged tool, following next_cursor to the end."""
+    items, cursor = [], ""
+    while True:
+        page = call(tool, cursor=cursor, **arguments)
+        items.extend(page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return items
+
+
+@pytest.mark.parametrize("page_size", [1, 7, 50])
+def test_top_chatters_pages_cover_the_table_in_order(world_db, page_size):
+    conn = sqlite3.connect(world_db / "community.db")
+    expected = conn.execute(
+        "SELECT id, name, messages FROM chatters ORDER BY messages DESC, id DESC"
+    ).fetchall()
+    conn.close()
+
+    items = walk("get_top_chatters", page_size=page_size)
+    assert [(item["id"], item["name"], item["messages"]) for item in items] == expected
+
+
+def test_city_pages_cover_the_country_in_order(world_db):
+    conn = sqlite3.connect(world_db / "world.db")
+    country_code, = conn.execute(
+        "SELECT country_code FROM cities GROUP BY country_code ORDER BY COUNT(*) DESC LIMIT 1"
+    ).fetchone()
+    expected = conn.execute(
+        "SELECT id, name FROM cities WHERE country_code = ? ORDER BY name, id", [country_code]
+    ).fetchall()
+    conn.close()
+
+    items = walk("get_cities_in_country", country_code=country_code.lower(), limit=9, fields=["name"])
+    assert [item["name"] for item in items] == [name for _, name in expected]
+    assert all(set(item) == {"name"} for item in items)
+
+
+def test_malformed_cursor_is_rejected(world_db):
+    with pytest.raises(Exception, match="Invalid pagination cursor"):
+        call("get_top_chatters", cursor="not-a-cursor")
@@ -0,0 +1,49 @@
+import threading
+
+import sqlite_server
+
+
+def test_checkout_retries_when_the_pool_is_replaced(world_db, monkeypatch):
+    stale = sqlite_server.get_pool("world.db")
+    sqlite_server.load_snapshot("world.db")  # Closes and replaces the pool
+    assert stale._closed
+
+    handed_out = [stale]
+    real_get_pool = sqlite_server.get_pool
+    monkeypatch.setattr(
+        sqlite_server,
+        "get_pool",
+        lambda db_name: handed_out.pop() if handed_out else real_get_pool(db_name),
+    )
+
+    with sqlite_server.pooled_connection("world.db") as conn:
+        assert conn.execute("SELECT COUNT(*) FROM countries").fetchone()[0] > 0
+    assert real_get_pool("world.db").stats()["idle"] == 1
+
+
+def test_reloads_during_concurrent_reads(world_db):
+    sqlite_server.load_snapshot("world.db")
+    errors = []
+    stop = threading.Event()
+
+    def read():
+        while not stop.is_set():
+            try:
+                with sqlite_server.pooled_connection("world.db") as conn:
+                    conn.execute("SELECT COUNT(*) FROM countries").fetchone()
+            except Exception as e:
+                errors.append(e)
+                return
+
+    readers = [threading.Thread(target=read) for _ in range(4)]
+    for reader in readers:
+        reader.start()
+    try:
+        for _ in range(20):
+            sqlite_server.load_snapshot("world.db")
+    finally:
+        stop.set()
+        for reader in readers:
+            reader.join()
+
+    assert errors == []
@@ -0,0 +1,58 @@
+import asyncio
+import sqlite3
+
+import sqlite_server
+
+
+def search(name: str, **arguments) -> dict:
+    _, structured = asyncio.run(
+        sqlite_server.mcp.call_tool("search_countries", {"name": name, **arguments})
+    )
+    return structured["result"]
+
+
+def names(name: str) -> list:
+    return [item["name"] for item in search(name)["items"]]
+
+
+def test_index_follows_writes(world_db):
+    assert sqlite_server.build_search_index() == list(sqlite_server.SEARCH_INDEXED_TABLES)
+    conn = sqlite3.connect(world_db / "world.db")
+    old_name, country_id = conn.execute("SELECT name, id FROM countries LIMIT 1").fetchone()
+
+    with conn:
+        conn.execute("UPDATE countries SET name = 'Zzzland' WHERE id = ?", [country_id])
+        conn.execute("INSERT INTO countries (name, iso2) VALUES ('Qqqland', 'QQ')")
+    assert names("Zzzl") == ["Zzzland"]
+    assert names("Qqql") == ["Qqqland"]
+    assert old_name not in names(old_name)
+
+    with conn:
+        conn.execute("DELETE FROM countries WHERE name = 'Qqqland'")
+    assert names("Qqql") == []
+    conn.close()
+
+
+def test_index_rebuilt_when_triggers_were_missing(world_db):
+    sqlite_server.build_search_index()
+    conn = sqlite3.connect(world_db / "world.db")
+    with conn:
+        conn.execute("DROP TRIGGER countries_fts_update")
+        conn.execute("UPDATE countries SET name = 'Zzzland' WHERE id = 1")
+    conn.close()
+
+    assert "countries" in sqlite_server.build_search_index()
+    assert names("Zzzl") == ["Zzzland"]
+
+
+def test_search_rank_is_not_returned(world_db):
+    sqlite_server.build_search_index()
+    page = search("an", page_size=2)
+    assert page["items"] and all("search_rank" not in item for item in page["items"])
+    assert "search_rank" not in search("ans", compact=True)["columns"]
+
+    # Ranked pages still continue from their cursor
+    first = search("ans", page_size=2)
+    assert first["next_cursor"]
+    second = search("ans", page_size=2, cursor=first["next_cursor"])
+    assert not {item["id"] for item in first["items"]} & {item["id"] for item in second["items"]}
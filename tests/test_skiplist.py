@@ -0,0 +1,52 @@
+import random
+
+import pytest
+
+from sqlite_server import IndexableSkipList
+
+
+def assert_matches(skip_list: IndexableSkipList, expected: list) -> None:
+    assert len(skip_list) == len(expected)
+    assert skip_list.slice(0, len(expected) + 5) == expected
+    for start, stop in [(0, 1), (3, 9), (len(expected) - 2, len(expected)), (7, 7), (9, 3)]:
+        assert skip_list.slice(start, stop) == expected[max(start, 0):stop]
+
+
+def test_random_inserts_and_removes_match_sorted():
+    rng = random.Random(7)
+    skip_list = IndexableSkipList()
+    keys = set()
+    for _ in range(2000):
+        key = (rng.randrange(-300, 0), -rng.randrange(1, 50))
+        if key in keys and rng.random() < 0.6:
+            skip_list.remove(key)
+            keys.discard(key)
+        elif key not in keys:
+            skip_list.insert(key)
+            keys.add(key)
+    expected = sorted(keys)
+    assert_matches(skip_list, expected)
+
+    for probe in [(-301, 0), (-150, -25), (0, 0), *rng.sample(expected, 20)]:
+        assert skip_list.bisect_left(probe) == sum(key < probe for key in expected)
+    for position in rng.sample(range(len(expected)), 20):
+        assert skip_list.slice(position, position + 1) == [expected[position]]
+
+
+def test_built_from_keys_and_emptied():
+    keys = random.Random(3).sample(range(1000), 200)
+    skip_list = IndexableSkipList(keys)
+    assert_matches(skip_list, sorted(keys))
+
+    for key in keys:
+        skip_list.remove(key)
+    assert len(skip_list) == 0
+    assert skip_list.slice(0, 10) == []
+    assert skip_list.bisect_left(500) == 0
+
+
+def test_remove_missing_key_raises():
+    skip_list = IndexableSkipList([1, 2, 3])
+    with pytest.raises(KeyError):
+        skip_list.remove(4)
+    assert skip_list.slice(0, 3) == [1, 2, 3]